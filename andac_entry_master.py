@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Deque, List, Optional, Dict, Sequence
 
+from indicator_engine import RollingSum
+from rolling_extrema import RollingExtrema
 
 
 @dataclass
@@ -50,28 +53,16 @@ class AndacEntryMaster:
         self.opt_volumen_strong = opt_volumen_strong
         self.opt_session_filter = opt_session_filter
 
-        self.candles: List[Dict[str, float]] = []
+        self.candles: Deque[Dict[str, float]] = deque(maxlen=lookback + 20)
+        self.closes: Deque[float] = deque(maxlen=15)
+        self.volumes = RollingSum(lookback)
+        self.extrema = RollingExtrema(lookback)
+        self._index = 0
         self.prev_bull_signal = False
         self.prev_bear_signal = False
 
     @staticmethod
-    def _sma(values: List[float], length: int) -> float:
-        if len(values) < length:
-            return sum(values) / len(values)
-        return sum(values[-length:]) / length
-
-    @staticmethod
-    def _highest(values: List[float], length: int) -> float:
-        slice_ = values[-length:] if len(values) >= length else values
-        return max(slice_)
-
-    @staticmethod
-    def _lowest(values: List[float], length: int) -> float:
-        slice_ = values[-length:] if len(values) >= length else values
-        return min(slice_)
-
-    @staticmethod
-    def _atr(candles: List[Dict[str, float]], length: int) -> float:
+    def _atr(candles: Sequence[Dict[str, float]], length: int) -> float:
         if len(candles) < length + 1:
             return 0.0
         trs = []
@@ -84,7 +75,7 @@ class AndacEntryMaster:
         return sum(trs) / length
 
     @staticmethod
-    def _rsi(closes: List[float], length: int) -> float:
+    def _rsi(closes: Sequence[float], length: int) -> float:
         if len(closes) < length + 1:
             return 50.0
         gains = []
@@ -103,31 +94,29 @@ class AndacEntryMaster:
 
     def evaluate(self, candle: Dict[str, float], symbol: str = "BTCUSDT") -> AndacSignal:
 
+        hoch_vorher = self.extrema.high_lookback
+        tief_vorher = self.extrema.low_lookback
+        self.extrema.push(self._index, candle["high"], candle["low"])
+        self._index += 1
+
+        # volume SMA and ATR cover the candles before this one
+        vol_schnitt = self.volumes.total / max(len(self.volumes), 1)
+        atr = self._atr(self.candles, 14)
+        self.volumes.push(candle.get("volume", 0.0))
+        self.closes.append(candle["close"])
         self.candles.append(candle)
-        if len(self.candles) > self.lookback + 20:
-            self.candles.pop(0)
         if len(self.candles) < self.lookback + 2:
             return AndacSignal(None, 50.0, False, False)
 
-        highs = [c["high"] for c in self.candles]
-        lows = [c["low"] for c in self.candles]
-        volumes = [c.get("volume", 0.0) for c in self.candles]
-        closes = [c["close"] for c in self.candles]
-
-        hoch_vorher = self._highest(highs[:-1], self.lookback)
-        tief_vorher = self._lowest(lows[:-1], self.lookback)
-
         bruch_oben = candle["high"] > hoch_vorher + self.puffer
         bruch_unten = candle["low"] < tief_vorher - self.puffer
 
-        vol_schnitt = self._sma(volumes[:-1], self.lookback)
-        atr = self._atr(self.candles[:-1], 14)
         big_candle = abs(candle["close"] - candle["open"]) > atr
         vol_spike = candle["volume"] > vol_schnitt * self.vol_mult and big_candle
         if self.opt_volumen_strong:
             vol_spike = vol_spike and candle["volume"] > vol_schnitt * 1.5
 
-        rsi = self._rsi(closes, 14)
+        rsi = self._rsi(self.closes, 14)
 
         session_ok = not self.opt_session_filter or 7 <= datetime.utcnow().hour <= 20
 
@@ -0,0 +1,217 @@
+# async_runtime.py
+"""Single event loop for feed ingestion, signal evaluation, orders and health checks."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+import global_state
+import latency_metrics
+from config_manager import config
+from kline_decoder import Kline, KlineDecoder, is_open_frame
+from status_events import StatusDispatcher
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """Run the candle handler as a coroutine consumer of a bounded queue.
+
+    Candles enter through :meth:`feed`, either from the threaded WebSocket
+    client (the producer thread blocks while the queue is full) or from
+    :func:`kline_reader` when the optional ``websockets`` package is
+    installed. The handler may block (sleeps, REST calls), so it runs one
+    candle at a time on a dedicated signal thread while the loop keeps
+    serving periodic checks and readers. Orders leave through
+    :class:`order_dispatcher.OrderDispatcher`, not through the runtime.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict], Any],
+        queue_size: int = 100,
+    ) -> None:
+        self.handler = handler
+        self.queue_size = queue_size
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.queue: asyncio.Queue[dict] | None = None
+        self._signals = ThreadPoolExecutor(max_workers=1, thread_name_prefix="signal")
+        self._periodic: List[tuple[Callable[[], Any], float]] = []
+        self._readers: List[Callable[[], Awaitable[None]]] = []
+        self._stopped: asyncio.Event | None = None
+        self._ready = threading.Event()
+
+    @property
+    def backlog(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def add_periodic(self, check: Callable[[], Any], interval: float) -> None:
+        """Call *check* every *interval* seconds on the loop."""
+        self._periodic.append((check, interval))
+
+    def add_reader(self, reader: Callable[[], Awaitable[None]]) -> None:
+        self._readers.append(reader)
+
+    def feed(self, candle: dict, timeout: float = 5) -> None:
+        """Hand a candle to the signal consumer from any thread."""
+        if not self._ready.wait(timeout):
+            logger.warning("⚠️ Async-Runtime nicht bereit – Candle verworfen")
+            return
+        if self._in_loop():
+            try:
+                self.queue.put_nowait(candle)
+            except asyncio.QueueFull:
+                logger.warning("⚠️ Feed überlastet – Candles könnten verloren gehen")
+            return
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(candle), self.loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            future.cancel()
+            logger.warning("⚠️ Feed überlastet – Candles könnten verloren gehen")
+
+    def stop(self) -> None:
+        if self.loop and self._stopped:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    async def _consume(self) -> None:
+        while True:
+            candle = await self.queue.get()
+            latency_metrics.stamp_candle(candle, "dequeued")
+            start = time.perf_counter()
+            try:
+                await self.loop.run_in_executor(
+                    self._signals, contextvars.copy_context().run, self.handler, candle
+                )
+            except Exception as exc:
+                logger.error("SignalWorker Fehler: %s", exc)
+            latency_metrics.finish_candle(candle)
+            logger.debug(
+                "Candle verarbeitet in %.0fms", (time.perf_counter() - start) * 1000
+            )
+            if self.queue.empty():
+                StatusDispatcher.dispatch("feed", True)
+
+    async def _repeat(self, check: Callable[[], Any], interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = check()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as exc:
+                logger.error("Runtime-Check %s fehlgeschlagen: %s", check.__name__, exc)
+
+    async def run_async(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopped = asyncio.Event()
+        self._ready.set()
+        tasks = [asyncio.create_task(self._consume())]
+        tasks += [asyncio.create_task(self._repeat(c, i)) for c, i in self._periodic]
+        tasks += [asyncio.create_task(reader()) for reader in self._readers]
+        logger.info("⚡ Async-Runtime gestartet (%s Tasks)", len(tasks))
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._ready.clear()
+            self._signals.shutdown(wait=False)
+
+    def run(self) -> None:
+        """Block until :meth:`stop` is called."""
+        asyncio.run(self.run_async())
+
+
+def kline_reader(
+    url: str,
+    on_candle: Callable[[dict], None],
+    on_reconnect: Optional[Callable[[], Any]] = None,
+    backoff: tuple[int, ...] = (5, 10, 30),
+    on_update: Optional[Callable[[Kline, float], None]] = None,
+) -> Callable[[], Awaitable[None]]:
+    """Return a coroutine function reading closed klines from *url*.
+
+    Like :class:`binance_ws.BinanceCandleWebSocket`, it drops closed
+    klines older than 90 s or not newer than ``global_state.last_candle_ts``.
+    *on_candle* runs in a worker thread so REST backfills and a full
+    candle queue never block the loop. *on_update* gets the unfinished
+    klines in the loop itself and must return quickly. Requires the
+    optional ``websockets`` package.
+    """
+    if websockets is None:
+        raise RuntimeError("websockets ist nicht installiert")
+    decoder = KlineDecoder(config.get("ws_decoder", "auto"))
+
+    async def read() -> None:
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                    logger.info("Binance WebSocket verbunden (asyncio)")
+                    if attempt and on_reconnect:
+                        await asyncio.to_thread(on_reconnect)
+                    attempt = 0
+                    async for message in ws:
+                        recv = time.perf_counter()
+                        if on_update is not None and is_open_frame(message):
+                            update = decoder.decode_update(message)
+                            if update is not None:
+                                try:
+                                    on_update(update, recv)
+                                except Exception as exc:
+                                    logger.error("Kline-Update konnte nicht verarbeitet werden: %s", exc)
+                            continue
+                        kline = decoder.decode(message)
+                        if kline is None:
+                            continue
+                        now = time.time()
+                        global_state.last_feed_time = now
+                        candle_ts = kline.open_time
+                        if now - candle_ts > 90:
+                            logger.warning(
+                                "⚠️ Veraltete Candle empfangen: Zeitdifferenz = %.2fs", now - candle_ts
+                            )
+                            continue
+                        last_ts = global_state.last_candle_ts
+                        if last_ts is not None and candle_ts <= last_ts:
+                            logger.debug("Doppelte Candle verworfen: %s", candle_ts)
+                            continue
+                        candle = kline.to_candle()
+                        candle["source"] = "ws"
+                        latency_metrics.stamp_candle(candle, "ws_recv", recv)
+                        latency_metrics.stamp_candle(candle, "decoded")
+                        try:
+                            await asyncio.to_thread(on_candle, candle)
+                        except Exception as exc:
+                            logger.warning("Fehler beim Weiterleiten der Candle: %s", exc)
+                            continue
+                        global_state.last_candle_ts = candle_ts
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("WebSocket Fehler: %s", exc)
+            attempt += 1
+            StatusDispatcher.dispatch("feed", False, "🔄 Reconnect läuft…")
+            await asyncio.sleep(backoff[min(attempt, len(backoff)) - 1])
+
+    return read
@@ -0,0 +1,360 @@
+# backtester.py
+"""Vectorized offline backtest of the Andac entry logic."""
+
+from __future__ import annotations
+
+import argparse
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from adaptive_sl_manager import AdaptiveSLManager
+from config import SETTINGS
+from feed_simulator import FeedSimulator
+from pnl_utils import simulated_trade_result
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "lookback": 20,
+    "puffer": 10.0,
+    "volumen_factor": 1.2,
+    "opt_rsi_ema": False,
+    "opt_safe_mode": False,
+    "opt_engulf": False,
+    "opt_engulf_bruch": False,
+    "opt_engulf_big": False,
+    "opt_confirm_delay": False,
+    "opt_mtf_confirm": False,
+    "opt_volumen_strong": False,
+    "take_profit_atr_multiplier": SETTINGS["take_profit_atr_multiplier"],
+    "use_adaptive_sl": True,
+    "capital": SETTINGS["capital"],
+    "leverage": SETTINGS["multiplier"],
+    "position_size": 1.0,
+    "taker_fee": 0.0004,
+    "fee_percent": 0.04,
+    "max_hold_candles": 10,
+    "cooldown": 3,
+}
+
+
+def _window_sum(values: np.ndarray, length: int) -> np.ndarray:
+    """Sum of the last *length* values up to each index (shorter at the start)."""
+    total = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(1, len(values) + 1)
+    return total[idx] - total[np.maximum(0, idx - length)]
+
+
+def rolling_max(values: np.ndarray, length: int) -> np.ndarray:
+    """Max of the last *length* values up to each index in O(n)."""
+    n = len(values)
+    if n == 0:
+        return values.copy()
+    padded = np.concatenate((np.full(length - 1, -np.inf), values))
+    blocks = math.ceil(len(padded) / length)
+    tail = blocks * length - len(padded)
+    padded = np.concatenate((padded, np.full(tail, -np.inf))).reshape(blocks, length)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:n], prefix[length - 1:length - 1 + n])
+
+
+def compute_indicators(
+    cols: Dict[str, np.ndarray], lookback: int, atr_length: int = 14, rsi_length: int = 14
+) -> Dict[str, np.ndarray]:
+    """Return the ``should_enter`` indicator inputs for every candle."""
+    high = cols["high"]
+    low = cols["low"]
+    close = cols["close"]
+    volume = cols["volume"]
+    n = len(close)
+    idx = np.arange(n)
+
+    prev_close = np.empty(n)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    prev_open = np.empty(n)
+    prev_open[0] = np.nan
+    prev_open[1:] = cols["open"][:-1]
+
+    tr = np.zeros(n)
+    if n > 1:
+        tr[1:] = np.maximum(
+            high[1:] - low[1:],
+            np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])),
+        )
+    atr = np.round(_window_sum(tr, atr_length) / atr_length, 2)
+    atr[idx + 1 < atr_length] = 0.0
+
+    diff = np.zeros(n)
+    diff[1:] = close[1:] - close[:-1]
+    gains = _window_sum(np.where(diff > 0, diff, 0.0), rsi_length)
+    losses = _window_sum(np.where(diff < 0, -diff, 0.0), rsi_length)
+    loss_count = _window_sum((diff < 0).astype(np.float64), rsi_length)
+    avg_loss = np.where(loss_count > 0, losses / rsi_length, 0.000001)
+    rsi = np.clip(100 - 100 / (1 + (gains / rsi_length) / avg_loss), 0.0, 100.0)
+    rsi[idx < rsi_length] = 50.0
+
+    high_lb = high.copy()
+    low_lb = low.copy()
+    avg_volume = volume.copy()
+    if n > 1:
+        high_lb[1:] = rolling_max(high, lookback)[:-1]
+        low_lb[1:] = -rolling_max(-low, lookback)[:-1]
+        avg_volume[1:] = (
+            _window_sum(volume, lookback)[:-1] / np.minimum(idx[1:], lookback)
+        )
+
+    return {
+        "atr": atr,
+        "rsi": rsi,
+        "avg_volume": avg_volume,
+        "high_lookback": high_lb,
+        "low_lookback": low_lb,
+        "prev_close": prev_close,
+        "prev_open": prev_open,
+    }
+
+
+def compute_signals(
+    cols: Dict[str, np.ndarray], config: Dict[str, Any], indicators: Optional[Dict[str, np.ndarray]] = None
+) -> np.ndarray:
+    """Evaluate ``should_enter`` for every candle at once.
+
+    Returns ``1`` for long, ``-1`` for short and ``0`` otherwise. The
+    confirm-delay option needs the previous final signal, which starts
+    empty in the runner, so it never lets a signal through.
+    """
+    ind = indicators or compute_indicators(cols, int(config["lookback"]))
+    open_ = cols["open"]
+    high = cols["high"]
+    low = cols["low"]
+    close = cols["close"]
+    rsi = ind["rsi"]
+    prev_close = ind["prev_close"]
+    prev_open = ind["prev_open"]
+    puffer = float(config["puffer"])
+
+    bruch_oben = high > ind["high_lookback"] + puffer
+    bruch_unten = low < ind["low_lookback"] - puffer
+    big_candle = np.abs(close - open_) > ind["atr"]
+    vol_spike = (cols["volume"] > ind["avg_volume"] * float(config["volumen_factor"])) & big_candle
+
+    bull_eng = (close > open_) & (prev_close < prev_open) & (close > prev_open) & (open_ < prev_close)
+    bear_eng = (close < open_) & (prev_close > prev_open) & (close < prev_open) & (open_ > prev_close)
+    engulf_long = bull_eng & (bruch_oben | (not config["opt_engulf_bruch"])) & (
+        big_candle | (not config["opt_engulf_big"])
+    )
+    engulf_short = bear_eng & (bruch_unten | (not config["opt_engulf_bruch"])) & (
+        big_candle | (not config["opt_engulf_big"])
+    )
+
+    long_valid = bruch_oben.copy()
+    short_valid = bruch_unten.copy()
+    if config["opt_volumen_strong"]:
+        long_valid &= vol_spike
+        short_valid &= vol_spike
+    if config["opt_rsi_ema"]:
+        long_valid &= rsi > 50
+        short_valid &= rsi < 50
+    if config["opt_safe_mode"]:
+        long_valid &= ~(rsi < 30)
+        short_valid &= ~(rsi > 70)
+    if config["opt_engulf"]:
+        long_valid &= engulf_long
+        short_valid &= engulf_short
+    if config["opt_confirm_delay"]:
+        long_valid[:] = False
+        short_valid[:] = False
+
+    return np.where(long_valid, 1, np.where(short_valid, -1, 0)).astype(np.int8)
+
+
+@dataclass
+class BacktestResult:
+    start_capital: float
+    final_capital: float
+    equity: np.ndarray
+    candles: int
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def pnl(self) -> float:
+        return self.final_capital - self.start_capital
+
+    @property
+    def trade_count(self) -> int:
+        return len(self.trades)
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return sum(1 for t in self.trades if t["pnl"] > 0) / len(self.trades)
+
+    @property
+    def max_drawdown(self) -> float:
+        if not len(self.equity):
+            return 0.0
+        return float(np.max(np.maximum.accumulate(self.equity) - self.equity))
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "pnl": round(self.pnl, 2),
+            "max_drawdown": round(self.max_drawdown, 2),
+            "trades": self.trade_count,
+            "win_rate": round(self.win_rate, 4),
+            "final_capital": round(self.final_capital, 2),
+            "candles": self.candles,
+        }
+
+
+def _sl_tp(
+    manager: AdaptiveSLManager, cols: Dict[str, np.ndarray], i: int, side: str, config: Dict[str, Any]
+) -> tuple[Optional[float], Optional[float]]:
+    if not config["use_adaptive_sl"]:
+        return None, None
+    entry = float(cols["close"][i])
+    start = max(0, i - manager.atr_period)
+    rows = [
+        {"high": h, "low": l, "close": c}
+        for h, l, c in zip(
+            cols["high"][start:i + 1].tolist(),
+            cols["low"][start:i + 1].tolist(),
+            cols["close"][start:i + 1].tolist(),
+        )
+    ]
+    try:
+        # stop distance as in the live runner: the manager's default
+        sl, tp = manager.get_adaptive_sl_tp(
+            side,
+            entry,
+            rows,
+            tp_multiplier=config["take_profit_atr_multiplier"],
+        )
+        valid = sl < entry < tp if side == "long" else tp < entry < sl
+        if not valid:
+            raise ValueError("Ungültige SL/TP-Relation")
+    except ValueError:
+        if side == "long":
+            sl, tp = round(entry * 0.995, 2), round(entry * 1.01, 2)
+        else:
+            sl, tp = round(entry * 1.005, 2), round(entry * 0.99, 2)
+    return sl, tp
+
+
+def run_backtest(cols: Dict[str, np.ndarray], config: Optional[Dict[str, Any]] = None) -> BacktestResult:
+    """Backtest the paper-trading state machine of the runner on *cols*.
+
+    Signals and indicators are computed vectorized; only signal bars are
+    visited, and each open position scans at most ``max_hold_candles``
+    bars for SL/TP, opposite signal or timed exit. Entries fill at the
+    candle close without random slippage so results are reproducible.
+    """
+    cfg = {**DEFAULT_CONFIG, **(config or {})}
+    signals = compute_signals(cols, cfg)
+    signal_idx = np.flatnonzero(signals)
+    ts = cols["timestamp"]
+    high = cols["high"]
+    low = cols["low"]
+    close = cols["close"]
+    n = len(close)
+
+    manager = AdaptiveSLManager()
+    leverage = float(cfg["leverage"])
+    fee_rate = float(cfg["fee_percent"]) / 100
+    max_hold = int(cfg["max_hold_candles"])
+    cooldown_sec = float(cfg["cooldown"]) * 60
+    capital = float(cfg["capital"])
+    start_capital = capital
+    equity = [capital]
+    trades: List[Dict[str, Any]] = []
+
+    pos = 0
+    cooldown_until = -np.inf
+    while pos < len(signal_idx) and capital > 0:
+        i = int(signal_idx[pos])
+        if ts[i] < cooldown_until:
+            pos = int(np.searchsorted(signal_idx, np.searchsorted(ts, cooldown_until)))
+            continue
+        direction = int(signals[i])
+        side = "long" if direction > 0 else "short"
+        entry = float(close[i])
+        amount = capital * cfg["position_size"]
+        sl, tp = _sl_tp(manager, cols, i, side, cfg)
+        capital -= amount * leverage * cfg["taker_fee"]
+
+        # the timed-exit bar itself is still checked for SL/TP, as in the runner
+        window = slice(i + 1, min(n, i + max_hold + 1))
+        if sl is None:
+            sl_hit = tp_hit = np.zeros(window.stop - window.start, dtype=bool)
+        elif side == "long":
+            sl_hit = low[window] <= sl
+            tp_hit = high[window] >= tp
+        else:
+            sl_hit = high[window] >= sl
+            tp_hit = low[window] <= tp
+        opp_hit = signals[window] == -direction
+        hits = np.flatnonzero(sl_hit | tp_hit | opp_hit)
+
+        if len(hits):
+            k = int(hits[0])
+            j = window.start + k
+            if sl_hit[k]:
+                reason, exit_price = "sl", sl
+            elif tp_hit[k]:
+                reason, exit_price = "tp", tp
+            else:
+                reason = "timed" if j == i + max_hold else "signal"
+                exit_price = float(close[j])
+        elif i + max_hold < n:
+            j = i + max_hold
+            reason, exit_price = "timed", float(close[j])
+        else:
+            j = n - 1
+            reason, exit_price = "end", float(close[j])
+
+        pnl = simulated_trade_result(entry, exit_price, amount, side, leverage, capital, fee_rate)
+        capital += pnl
+        equity.append(capital)
+        trades.append(
+            {
+                "entry_index": i,
+                "exit_index": j,
+                "entry_time": int(ts[i]),
+                "exit_time": int(ts[j]),
+                "side": side,
+                "entry": entry,
+                "exit": exit_price,
+                "sl": sl,
+                "tp": tp,
+                "reason": reason,
+                "pnl": pnl,
+                "capital": capital,
+            }
+        )
+        if reason == "sl":
+            cooldown_until = ts[j] + cooldown_sec
+        pos = int(np.searchsorted(signal_idx, j + 1))
+
+    return BacktestResult(start_capital, capital, np.array(equity), n, trades)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Andac Backtest auf Candle-Datei")
+    parser.add_argument("file")
+    parser.add_argument("--lookback", type=int, default=DEFAULT_CONFIG["lookback"])
+    parser.add_argument("--puffer", type=float, default=DEFAULT_CONFIG["puffer"])
+    parser.add_argument("--vol-mult", type=float, default=DEFAULT_CONFIG["volumen_factor"])
+    args = parser.parse_args(argv)
+    cols = FeedSimulator(args.file).columns()
+    result = run_backtest(
+        cols,
+        {"lookback": args.lookback, "puffer": args.puffer, "volumen_factor": args.vol_mult},
+    )
+    print(" | ".join(f"{k}: {v}" for k, v in result.summary().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench_kline_decoder.py
+"""Compare kline decoding throughput of the legacy parser and KlineDecoder."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, List, Optional
+
+from kline_decoder import KlineDecoder, available_backends
+
+
+def _frame(ts: int, closed: bool) -> str:
+    return json.dumps(
+        {
+            "e": "kline",
+            "E": ts + 1234,
+            "s": "BTCUSDT",
+            "k": {
+                "t": ts,
+                "T": ts + 59_999,
+                "s": "BTCUSDT",
+                "i": "1m",
+                "f": 100,
+                "L": 200,
+                "o": "64000.10",
+                "c": "64010.55",
+                "h": "64020.00",
+                "l": "63990.01",
+                "v": "12.345",
+                "n": 100,
+                "x": closed,
+                "q": "790000.1",
+                "V": "6.1",
+                "Q": "390000.2",
+                "B": "0",
+            },
+        },
+        separators=(",", ":"),
+    )
+
+
+def sample_messages(minutes: int, updates_per_minute: int = 60) -> List[str]:
+    """One closed frame after ``updates_per_minute - 1`` open frames."""
+    messages = []
+    for m in range(minutes):
+        ts = 1_700_000_000_000 + m * 60_000
+        messages.extend(_frame(ts, False) for _ in range(updates_per_minute - 1))
+        messages.append(_frame(ts, True))
+    return messages
+
+
+def legacy_decode(message: str) -> Optional[dict]:
+    data = json.loads(message)
+    k = data.get("k")
+    if not k or not k.get("x"):
+        return None
+    return {
+        "timestamp": k.get("t") // 1000,
+        "open": float(k.get("o")),
+        "high": float(k.get("h")),
+        "low": float(k.get("l")),
+        "close": float(k.get("c")),
+        "volume": float(k.get("v")),
+    }
+
+
+def measure(decode: Callable[[str], object], messages: List[str], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            decode(message)
+        best = min(best, time.perf_counter() - start)
+    return len(messages) / best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Kline-Decoder Benchmark")
+    parser.add_argument("--minutes", type=int, default=2000)
+    parser.add_argument("--closed-only", action="store_true", help="Nur abgeschlossene Frames")
+    args = parser.parse_args(argv)
+
+    messages = sample_messages(args.minutes, 1 if args.closed_only else 60)
+    baseline = measure(legacy_decode, messages)
+    print(f"{'legacy json':<16} {baseline:>12,.0f} msg/s")
+    for backend in available_backends():
+        rate = measure(KlineDecoder(backend).decode, messages)
+        print(f"{backend:<16} {rate:>12,.0f} msg/s  x{rate / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
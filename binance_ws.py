@@ -5,11 +5,12 @@ import threading
 import json
 import time
 import logging
-from typing import Callable, Optional
-from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
 from config import BINANCE_SYMBOL, BINANCE_INTERVAL
+from kline_decoder import Kline, KlineDecoder, is_open_frame
 from status_events import StatusDispatcher
 import global_state
+import latency_metrics
 from config_manager import config
 
 logger = logging.getLogger(__name__)
@@ -58,17 +59,28 @@ last_candle_time: float | None = None
 
 
 
+def kline_stream_url(symbol: str, interval: str) -> str:
+    return f"wss://stream.binance.com:9443/ws/{symbol.lower()}@kline_{interval}"
+
+
 class BinanceCandleWebSocket(BaseWebSocket):
 
     def __init__(
         self,
         on_candle: Optional[Callable[[dict], None]] = None,
         interval: str | None = None,
+        on_reconnect: Optional[Callable[[], None]] = None,
+        on_update: Optional[Callable[[Kline, float], None]] = None,
     ):
         self.on_candle = on_candle
+        self.on_reconnect = on_reconnect
+        # receives klines of the unfinished candle; without it those frames are skipped unparsed
+        self.on_update = on_update
+        self._connected_once = False
+        self.decoder = KlineDecoder(config.get("ws_decoder", "auto"))
         self.symbol = BINANCE_SYMBOL.lower()
         self.interval = interval or BINANCE_INTERVAL
-        url = f"wss://stream.binance.com:9443/ws/{self.symbol}@kline_{self.interval}"
+        url = kline_stream_url(self.symbol, self.interval)
         super().__init__(url, self._on_message)
         self._warning_printed = False
         self.backoff = [5, 10, 30]
@@ -110,20 +122,18 @@ class BinanceCandleWebSocket(BaseWebSocket):
 
     def _on_message(self, ws, message):
         global last_candle_time
+        recv = time.perf_counter()
         try:
-            data = json.loads(message)
-            k = data.get("k")
-            if not k or not k.get("x"):
+            if self.on_update is not None and is_open_frame(message):
+                self._forward_update(message, recv)
+                return
+            kline = self.decoder.decode(message)
+            if kline is None:
                 return
 
-            try:
-                import global_state
-                global_state.last_feed_time = time.time()
-            except Exception as e:
-                logging.error("Fehler beim Setzen von last_feed_time: %s", e)
-
-            candle_ts = k.get("t") // 1000
-            now = int(datetime.now(tz=timezone.utc).timestamp())
+            now = time.time()
+            global_state.last_feed_time = now
+            candle_ts = kline.open_time
 
             if now - candle_ts > 90:
                 logger.warning(
@@ -135,19 +145,14 @@ class BinanceCandleWebSocket(BaseWebSocket):
                 logger.debug("Doppelte Candle verworfen: %s", candle_ts)
                 return
 
-            candle = {
-                "timestamp": candle_ts,
-                "open": float(k.get("o")),
-                "high": float(k.get("h")),
-                "low": float(k.get("l")),
-                "close": float(k.get("c")),
-                "volume": float(k.get("v")),
-                "source": "ws",
-            }
+            candle = kline.to_candle()
+            candle["source"] = "ws"
+            latency_metrics.stamp_candle(candle, "ws_recv", recv)
+            latency_metrics.stamp_candle(candle, "decoded")
 
             logger.debug("Candle received: %s", candle)
 
-            last_candle_time = time.time()
+            last_candle_time = now
 
             if self.on_candle:
                 try:
@@ -162,6 +167,15 @@ class BinanceCandleWebSocket(BaseWebSocket):
                 logger.warning("Candle-Daten unvollständig oder fehlerhaft: %s", e)
                 self._warning_printed = True
 
+    def _forward_update(self, message, recv: float) -> None:
+        kline = self.decoder.decode_update(message)
+        if kline is None:
+            return
+        try:
+            self.on_update(kline, recv)
+        except Exception as exc:
+            logger.error("Kline-Update konnte nicht verarbeitet werden: %s", exc)
+
     def _on_error(self, ws, error):
         logger.error("Candle-WS Fehler: %s", error)
 
@@ -170,3 +184,109 @@ class BinanceCandleWebSocket(BaseWebSocket):
 
     def _on_open(self, ws):
         logger.info("Binance WebSocket verbunden")
+        if self._connected_once and self.on_reconnect:
+            try:
+                self.on_reconnect()
+            except Exception as exc:
+                logger.error("Backfill nach Reconnect fehlgeschlagen: %s", exc)
+        self._connected_once = True
+
+
+class BinanceCombinedWebSocket(BinanceCandleWebSocket):
+    """Kline streams for many (symbol, interval) pairs over one connection.
+
+    Streams are (re)subscribed on every connect via ``SUBSCRIBE`` requests
+    and each closed kline is passed to ``on_candle(symbol, interval, candle)``.
+    """
+
+    MAX_STREAMS = 1024
+    SUBSCRIBE_BATCH = 200
+
+    def __init__(
+        self,
+        on_candle: Callable[[str, str, dict], None],
+        streams: Iterable[tuple[str, str]] = (),
+        on_reconnect: Optional[Callable[[], None]] = None,
+    ):
+        super().__init__(None, on_reconnect=on_reconnect)
+        self.url = "wss://stream.binance.com:9443/stream"
+        self.on_stream_candle = on_candle
+        self.streams: dict[str, tuple[str, str]] = {}
+        self._last_ts: dict[tuple[str, str], int] = {}
+        self._request_id = 0
+        for symbol, interval in streams:
+            self.subscribe(symbol, interval)
+
+    @staticmethod
+    def stream_name(symbol: str, interval: str) -> str:
+        return f"{symbol.lower()}@kline_{interval}"
+
+    def _connected(self) -> bool:
+        sock = self.ws.sock if self.ws else None
+        return bool(sock and sock.connected)
+
+    def _send(self, method: str, names: list[str]) -> None:
+        for start in range(0, len(names), self.SUBSCRIBE_BATCH):
+            if start:
+                time.sleep(0.25)
+            self._request_id += 1
+            self.ws.send(
+                json.dumps(
+                    {
+                        "method": method,
+                        "params": names[start:start + self.SUBSCRIBE_BATCH],
+                        "id": self._request_id,
+                    }
+                )
+            )
+
+    def subscribe(self, symbol: str, interval: str) -> None:
+        name = self.stream_name(symbol, interval)
+        if name in self.streams:
+            return
+        if len(self.streams) >= self.MAX_STREAMS:
+            raise ValueError(f"Maximal {self.MAX_STREAMS} Streams pro Verbindung")
+        self.streams[name] = (symbol.upper(), interval)
+        if self._connected():
+            self._send("SUBSCRIBE", [name])
+
+    def unsubscribe(self, symbol: str, interval: str) -> None:
+        name = self.stream_name(symbol, interval)
+        if self.streams.pop(name, None) and self._connected():
+            self._send("UNSUBSCRIBE", [name])
+
+    def _on_open(self, ws):
+        if self.streams:
+            self._send("SUBSCRIBE", list(self.streams))
+        super()._on_open(ws)
+
+    def _on_message(self, ws, message):
+        recv = time.perf_counter()
+        try:
+            kline = self.decoder.decode(message)
+            if kline is None:
+                return
+            now = time.time()
+            global_state.last_feed_time = now
+            if now - kline.close_time > 90:
+                logger.warning(
+                    "⚠️ Veraltete Candle %s %s: Zeitdifferenz = %.2fs",
+                    kline.symbol,
+                    kline.interval,
+                    now - kline.close_time,
+                )
+                return
+            key = (kline.symbol, kline.interval)
+            last = self._last_ts.get(key)
+            if last is not None and kline.open_time <= last:
+                return
+            candle = kline.to_candle()
+            candle["source"] = "ws"
+            latency_metrics.stamp_candle(candle, "ws_recv", recv)
+            latency_metrics.stamp_candle(candle, "decoded")
+            self.on_stream_candle(kline.symbol, kline.interval, candle)
+            self._last_ts[key] = kline.open_time
+        except Exception as e:
+            if not self._warning_printed:
+                logger.warning("Kombinierte Candle-Daten fehlerhaft: %s", e)
+                self._warning_printed = True
@@ -4,71 +4,309 @@ import hmac
 import hashlib
 import json
 import logging
-from typing import Optional
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+
+import latency_metrics
 
 
 class BitmexClient:
-    """Thin REST client for BitMEX Testnet."""
+    """Thin REST client for BitMEX Testnet.
+
+    All calls share one keep-alive :class:`requests.Session`. Order requests
+    are serialised and signed once and reused while their ``api-expires``
+    is valid, and the last known position is cached so reduce-only closes
+    need a single round-trip.
+    """
 
     def __init__(self,
                  api_key: Optional[str] = None,
                  api_secret: Optional[str] = None,
-                 base_url: str = "https://testnet.bitmex.com") -> None:
+                 base_url: str = "https://testnet.bitmex.com",
+                 pool_size: int = 4,
+                 presign_ttl: int = 30,
+                 position_ttl: float = 30.0) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key or os.getenv("BITMEX_API_KEY")
         self.api_secret = api_secret or os.getenv("BITMEX_API_SECRET")
         self.symbol = "XBTUSD"
         self.logger = logging.getLogger(__name__)
+        self.presign_ttl = presign_ttl
+        self.position_ttl = position_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount(self.base_url, adapter)
+        self._prepared: Dict[Tuple, Tuple[float, requests.PreparedRequest]] = {}
+        self._position: Optional[dict] = None
+        self._position_ts = 0.0
+        self._lock = threading.Lock()
+        self._keepalive: Optional[threading.Thread] = None
+        self._keepalive_stop = threading.Event()
+        # set by OrderScheduler to observe rate-limit headers and failures
+        self.on_response: Optional[Callable[..., None]] = None
+        # set by BitmexState.attach; while it is live the cached position never expires
+        self.position_stream = None
+
+    @property
+    def api_secret(self) -> Optional[str]:
+        return self._api_secret
+
+    @api_secret.setter
+    def api_secret(self, value: Optional[str]) -> None:
+        self._api_secret = value
+        self._mac = hmac.new(value.encode(), digestmod=hashlib.sha256) if value else None
+        self._prepared = {}
 
     # internal helper to create request headers
-    def _headers(self, verb: str, endpoint: str, data: str = "") -> dict:
-        if not self.api_key or not self.api_secret:
+    def _headers(self, verb: str, endpoint: str, data: str = "", ttl: int = 5) -> dict:
+        if not self.api_key or not self._mac:
             raise ValueError("API credentials not set")
-        expires = str(int(time.time()) + 5)
-        message = verb + endpoint + expires + data
-        signature = hmac.new(
-            self.api_secret.encode(), message.encode(), hashlib.sha256
-        ).hexdigest()
+        expires = str(int(time.time()) + ttl)
+        mac = self._mac.copy()
+        mac.update((verb + endpoint + expires + data).encode())
         return {
             "api-expires": expires,
             "api-key": self.api_key,
-            "api-signature": signature,
+            "api-signature": mac.hexdigest(),
             "Content-Type": "application/json",
         }
 
+    def _prepare(self, verb: str, endpoint: str, body: str, ttl: int) -> requests.PreparedRequest:
+        request = requests.Request(
+            verb,
+            self.base_url + endpoint,
+            headers=self._headers(verb, endpoint, body, ttl),
+            data=body,
+        )
+        return self.session.prepare_request(request)
+
+    def _send(self, prepared: requests.PreparedRequest):
+        latency_metrics.mark("sent")
+        try:
+            response = self.session.send(prepared, timeout=10)
+        except requests.RequestException as exc:
+            if self.on_response:
+                self.on_response(None, exc)
+            raise
+        latency_metrics.mark("response")
+        if self.on_response:
+            self.on_response(response)
+        response.raise_for_status()
+        return response.json()
+
     # basic request helper
     def _request(self, verb: str, endpoint: str, *, data: Optional[dict] = None) -> dict:
         body = json.dumps(data) if data else ""
-        headers = self._headers(verb, endpoint, body)
-        url = self.base_url + endpoint
-        response = requests.request(verb, url, headers=headers, data=body, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return self._send(self._prepare(verb, endpoint, body, 5))
 
-    def place_order(self, side: str, quantity: float, reduce_only: bool = False) -> dict:
-        side = side.upper()
-        payload = {
-            "symbol": self.symbol,
-            "orderQty": quantity,
-            "side": side,
-            "ordType": "Market",
-        }
-        if reduce_only:
+    def warm_up(self) -> bool:
+        """Open a pooled connection so the first order skips the TLS handshake."""
+        try:
+            self.session.head(self.base_url + "/api/v1", timeout=5)
+            return True
+        except requests.RequestException as exc:
+            self.logger.warning("BitMEX Warm-up fehlgeschlagen: %s", exc)
+            return False
+
+    def start_keepalive(self, interval: float = 15.0) -> None:
+        """Keep the connection open and pre-signed orders fresh in the background."""
+        if self._keepalive and self._keepalive.is_alive():
+            return
+        self._keepalive_stop.clear()
+
+        def run() -> None:
+            while not self._keepalive_stop.wait(interval):
+                self.warm_up()
+                self._refresh_presigned(interval)
+
+        self._keepalive = threading.Thread(target=run, daemon=True)
+        self._keepalive.start()
+
+    def stop_keepalive(self) -> None:
+        self._keepalive_stop.set()
+
+    def _order_payload(self, side: Optional[str], quantity: Optional[float],
+                       reduce_only: bool, close: bool) -> dict:
+        payload = {"symbol": self.symbol, "ordType": "Market"}
+        if side:
+            payload["side"] = side.capitalize()
+        if quantity is not None:
+            payload["orderQty"] = quantity
+        if close:
+            payload["execInst"] = "Close"
+        elif reduce_only:
             payload["execInst"] = "ReduceOnly"
-        return self._request("POST", "/api/v1/order", data=payload)
+        return payload
 
-    def get_open_position(self) -> Optional[dict]:
-        data = self._request("GET", "/api/v1/position")
+    def presign_order(self, side: Optional[str], quantity: Optional[float] = None,
+                      reduce_only: bool = False, close: bool = False) -> requests.PreparedRequest:
+        """Serialise and sign an order now so sending it later costs one write."""
+        key = (side and side.capitalize(), quantity, reduce_only, close)
+        body = json.dumps(self._order_payload(side, quantity, reduce_only, close))
+        prepared = self._prepare("POST", "/api/v1/order", body, self.presign_ttl)
+        with self._lock:
+            self._prepared[key] = (time.time() + self.presign_ttl, prepared)
+        return prepared
+
+    def _take_presigned(self, key: Tuple) -> Optional[requests.PreparedRequest]:
+        with self._lock:
+            entry = self._prepared.pop(key, None)
+        if entry and entry[0] - time.time() > 1:
+            return entry[1]
+        return None
+
+    def _refresh_presigned(self, margin: float) -> None:
+        with self._lock:
+            keys = [k for k, (exp, _) in self._prepared.items() if exp - time.time() <= margin + 1]
+        for key in keys:
+            try:
+                self.presign_order(*key)
+            except ValueError:
+                return
+
+    def _submit_order(self, side: Optional[str], quantity: Optional[float],
+                      reduce_only: bool = False, close: bool = False) -> dict:
+        key = (side and side.capitalize(), quantity, reduce_only, close)
+        prepared = self._take_presigned(key)
+        if prepared is None:
+            body = json.dumps(self._order_payload(side, quantity, reduce_only, close))
+            prepared = self._prepare("POST", "/api/v1/order", body, 5)
+        latency_metrics.mark("signed")
+        result = self._send(prepared)
+        self._apply_fill(result)
+        return result
+
+    def place_order(self, side: str, quantity: float, reduce_only: bool = False) -> dict:
+        return self._submit_order(side.upper(), quantity, reduce_only)
+
+    def place_orders(self, legs: Iterable[Tuple[str, float]], reduce_only: bool = False) -> List[dict]:
+        """Send several market orders in one ``POST /api/v1/order/bulk`` request."""
+        orders = [self._order_payload(side, qty, reduce_only, False) for side, qty in legs]
+        body = json.dumps({"orders": orders})
+        prepared = self._prepare("POST", "/api/v1/order/bulk", body, 5)
+        latency_metrics.mark("signed")
+        result = self._send(prepared)
+        for order in result:
+            self._apply_fill(order)
+        return result
+
+    def place_protection(self, side: str, quantity: float, stop_px: Optional[float] = None,
+                         take_profit: Optional[float] = None, link_id: str = "") -> List[dict]:
+        """Rest a stop-market SL and a reduce-only limit TP for a *side* position in one bulk request.
+
+        *side* is the side of the position (``Buy``/``Sell``); both orders
+        take the opposite side. Their ``clOrdID`` is ``<link_id>-sl`` and
+        ``<link_id>-tp`` so they can be amended, cancelled and found again.
+        """
+        exit_side = "Sell" if side.capitalize() == "Buy" else "Buy"
+        orders = []
+        if stop_px is not None:
+            orders.append({
+                "symbol": self.symbol, "side": exit_side, "orderQty": quantity, "ordType": "Stop",
+                "stopPx": stop_px, "execInst": "ReduceOnly,LastPrice", "clOrdID": f"{link_id}-sl",
+            })
+        if take_profit is not None:
+            orders.append({
+                "symbol": self.symbol, "side": exit_side, "orderQty": quantity, "ordType": "Limit",
+                "price": take_profit, "execInst": "ReduceOnly", "clOrdID": f"{link_id}-tp",
+            })
+        if not orders:
+            return []
+        return self._request("POST", "/api/v1/order/bulk", data={"orders": orders})
+
+    def amend_order(self, cl_ord_id: Optional[str] = None, order_id: Optional[str] = None,
+                    **fields) -> dict:
+        """``PUT /api/v1/order``: change ``stopPx``, ``price`` or ``orderQty`` of a resting order."""
+        data = dict(fields)
+        if order_id:
+            data["orderID"] = order_id
+        else:
+            data["origClOrdID"] = cl_ord_id
+        return self._request("PUT", "/api/v1/order", data=data)
+
+    def cancel_orders(self, cl_ord_ids: Iterable[str] = (), order_ids: Iterable[str] = ()) -> List[dict]:
+        data = {}
+        if cl_ord_ids:
+            data["clOrdID"] = list(cl_ord_ids)
+        if order_ids:
+            data["orderID"] = list(order_ids)
+        if not data:
+            return []
+        return self._request("DELETE", "/api/v1/order", data=data)
+
+    def get_open_orders(self) -> List[dict]:
+        query = urlencode({"symbol": self.symbol, "filter": json.dumps({"open": True})})
+        return self._request("GET", "/api/v1/order?" + query)
+
+    def _set_position(self, position: Optional[dict]) -> None:
+        old = (self._position or {}).get("currentQty") or 0
+        new = (position or {}).get("currentQty") or 0
+        if (old > 0) != (new > 0) or (old < 0) != (new < 0):
+            self._prepared = {}
+        self._position = position
+        self._position_ts = time.time()
+
+    def update_position(self, position: Optional[dict]) -> None:
+        """Replace the cached position, e.g. from a private WebSocket."""
+        with self._lock:
+            self._set_position(position)
+
+    def _apply_fill(self, order: dict) -> None:
+        filled = order.get("cumQty") if isinstance(order, dict) else None
+        if not filled:
+            return
+        delta = filled if order.get("side") == "Buy" else -filled
+        with self._lock:
+            if self._position is None:
+                return
+            position = dict(self._position)
+            position["currentQty"] = position.get("currentQty", 0) + delta
+            self._set_position(position)
+
+    @property
+    def streamed(self) -> bool:
+        return self.position_stream is not None and self.position_stream.live
+
+    def cached_position(self, max_age: Optional[float] = None) -> Optional[dict]:
+        max_age = self.position_ttl if max_age is None else max_age
+        streamed = self.streamed
+        with self._lock:
+            if self._position is not None and (
+                streamed or time.time() - self._position_ts <= max_age
+            ):
+                return self._position
+        return None
+
+    def get_open_position(self, max_age: float = 0.0) -> Optional[dict]:
+        if max_age:
+            cached = self.cached_position(max_age)
+            if cached is not None:
+                return cached
+        query = urlencode({"filter": json.dumps({"symbol": self.symbol})})
+        data = self._request("GET", "/api/v1/position?" + query)
         for pos in data:
             if pos.get("symbol") == self.symbol:
+                self.update_position(pos)
                 return pos
+        self.update_position({"symbol": self.symbol, "currentQty": 0})
         return None
 
     def close_position(self) -> Optional[dict]:
-        pos = self.get_open_position()
-        if not pos or not pos.get("currentQty"):
+        """Close the whole position; the cache only follows the reported fill.
+
+        A flat cache is trusted only while the private stream is live, since
+        a fill that arrived without one would be missing from it.
+        """
+        pos = self.cached_position()
+        if pos is not None and not pos.get("currentQty") and not self.streamed:
+            pos = self.get_open_position() or {"currentQty": 0}
+        if pos is not None and not pos.get("currentQty"):
             return None
-        side = "Sell" if pos["currentQty"] > 0 else "Buy"
-        return self.place_order(side, abs(pos["currentQty"]), reduce_only=True)
+        side = None
+        if pos is not None:
+            side = "Sell" if pos["currentQty"] > 0 else "Buy"
+        return self._submit_order(side, None, close=True)
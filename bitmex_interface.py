@@ -7,11 +7,24 @@ import logging
 from typing import Optional
 
 from bitmex_client import BitmexClient
+from bitmex_state import BitmexPrivateWebSocket, BitmexState
+from order_scheduler import OrderScheduler
+from protective_orders import ProtectiveOrders
 
 logger = logging.getLogger(__name__)
 
 # Instantiate a single client using credentials from environment variables
 client = BitmexClient()
+# Rate-limit-aware executor for order calls; also coalesces position queries
+scheduler = OrderScheduler(client)
+# Position/order/execution cache fed by the private WebSocket
+state = BitmexState()
+state.attach(client)
+# Exchange-resident SL/TP; follows fills and position size from the stream
+protection = ProtectiveOrders(client, state, executor=scheduler)
+state.subscribe("order", protection.on_order)
+state.subscribe("position", protection.on_position)
+_private_ws: BitmexPrivateWebSocket | None = None
 
 
 def place_order(side: str, quantity: float, reduce_only: bool = False) -> Optional[dict]:
@@ -23,6 +36,15 @@ def place_order(side: str, quantity: float, reduce_only: bool = False) -> Option
         return None
 
 
+def place_orders(legs: list[tuple[str, float]], reduce_only: bool = False) -> Optional[list]:
+    """Place several market orders with one bulk request."""
+    try:
+        return client.place_orders(legs, reduce_only=reduce_only)
+    except Exception as exc:
+        logger.error("❌ BitMEX-Bulk-Order fehlgeschlagen: %s", exc)
+        return None
+
+
 def close_position() -> Optional[dict]:
     """Close any open position using a market order."""
     try:
@@ -32,15 +54,111 @@ def close_position() -> Optional[dict]:
         return None
 
 
-def get_open_position() -> Optional[dict]:
-    """Return current open position for XBTUSD if any."""
+def protect_position(side: str, quantity: float, sl: float | None, tp: float | None) -> bool:
+    """Rest stop-market SL and limit TP on BitMEX for the position just opened."""
+    try:
+        result = protection.place(side, quantity, sl, tp)
+        return result is not None and (sl is None or result.sl_live)
+    except Exception as exc:
+        logger.error("❌ SL/TP-Orders fehlgeschlagen: %s", exc)
+        return False
+
+
+def amend_protection(sl: float | None = None, tp: float | None = None) -> bool:
+    try:
+        return protection.amend(sl, tp)
+    except Exception as exc:
+        logger.error("❌ SL/TP-Änderung fehlgeschlagen: %s", exc)
+        return False
+
+
+def sync_protection(quantity: float | None = None) -> None:
+    """Resize resting SL/TP to *quantity* (default: the cached position)."""
+    try:
+        if quantity is None:
+            pos = client.cached_position()
+            if pos is None:
+                return
+            quantity = pos.get("currentQty") or 0
+        protection.sync(quantity)
+    except Exception as exc:
+        logger.error("❌ SL/TP-Anpassung fehlgeschlagen: %s", exc)
+
+
+def cancel_protection() -> int:
+    try:
+        return protection.cancel()
+    except Exception as exc:
+        logger.error("❌ SL/TP-Storno fehlgeschlagen: %s", exc)
+        return 0
+
+
+def reconcile_protection() -> str:
+    """Adopt or clean up SL/TP orders left from an earlier run; see ProtectiveOrders.reconcile."""
+    try:
+        return protection.reconcile()
+    except Exception as exc:
+        logger.error("❌ SL/TP-Abgleich fehlgeschlagen: %s", exc)
+        return "error"
+
+
+def get_open_position(max_age: float = 0.0) -> Optional[dict]:
+    """Return current open position for XBTUSD if any.
+
+    A cached position younger than *max_age* seconds is returned without
+    a request.
+    """
     try:
-        return client.get_open_position()
+        return scheduler.get_position(max_age)
     except Exception as exc:
         logger.error("get_open_position failed: %s", exc)
         return None
 
 
+def presign_close(quantity: float | None = None, entry_side: str | None = None) -> None:
+    """Sign the closing order for the current position ahead of time.
+
+    Uses the cached position, or *entry_side* of the fill that just
+    opened it, and never asks the exchange.
+    """
+    try:
+        pos = client.cached_position()
+        if pos is not None and pos.get("currentQty"):
+            side = "Sell" if pos["currentQty"] > 0 else "Buy"
+        elif pos is None and entry_side:
+            side = "Sell" if entry_side.upper() == "BUY" else "Buy"
+        else:
+            return
+        if quantity is None:
+            client.presign_order(side, close=True)
+        else:
+            client.presign_order(side, quantity, reduce_only=True)
+    except Exception as exc:
+        logger.warning("presign_close failed: %s", exc)
+
+
+def warm_up(keepalive: bool = True) -> bool:
+    """Open the pooled connection and keep it alive for fast order entry."""
+    ok = client.warm_up()
+    if keepalive:
+        client.start_keepalive()
+    return ok
+
+
+def start_private_stream(timeout: float = 5.0) -> bool:
+    """Subscribe to position/order/execution updates; True once the cache is live."""
+    global _private_ws
+    if not client.api_key or not client.api_secret:
+        return False
+    if _private_ws is None:
+        _private_ws = BitmexPrivateWebSocket(state, client)
+        _private_ws.start()
+    if not state.wait_ready(timeout):
+        logger.warning("⚠️ BitMEX Private-WebSocket nicht bereit – Positionen per REST")
+        return False
+    return True
+
+
 def set_credentials(key: str, secret: str) -> None:
     """Set API credentials for subsequent requests."""
     client.api_key = key
@@ -49,6 +167,9 @@ def set_credentials(key: str, secret: str) -> None:
 
 def check_credentials() -> bool:
     """Verify that the current credentials are valid."""
+    if state.live:
+        # the private stream only delivers data after a successful auth
+        return True
     try:
         client.get_open_position()
         return True
@@ -0,0 +1,595 @@
+# bitmex_simulator.py
+"""Localhost stand-in for the BitMEX order and position REST endpoints."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse, urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+
+logger = logging.getLogger(__name__)
+
+_OPEN_STATES = ("New", "PartiallyFilled")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload: Any, headers: Dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        status, payload, headers = self.server.sim.handle(
+            self.command, self.path, dict(self.headers.items()), body
+        )
+        self._reply(status, payload, headers)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    sim: "BitmexSimulator"
+
+
+class BitmexSimulator:
+    """Serve ``/api/v1/order`` and ``/api/v1/position`` on localhost.
+
+    Requests must carry a valid ``api-signature`` for a key in *secrets*.
+    Market orders fill at :attr:`price`; with ``fill_ratio < 1`` only part
+    of an order fills immediately and the rest after ``fill_delay``.
+    ``Stop`` and ``Limit`` orders rest until :meth:`move_price` crosses
+    their ``stopPx``/``price``; ``PUT`` amends and ``DELETE`` cancels them.
+    ``latency`` (seconds, or a ``(low, high)`` range) delays every reply,
+    ``error_429``/``error_503`` are failure probabilities, and
+    ``rate_limit`` requests per minute are granted before HTTP 429.
+    """
+
+    def __init__(
+        self,
+        secrets: Optional[Dict[str, str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        symbol: str = "XBTUSD",
+        price: float = 30000.0,
+        latency: float | Tuple[float, float] = 0.0,
+        error_429: float = 0.0,
+        error_503: float = 0.0,
+        rate_limit: int = 120,
+        fill_ratio: float = 1.0,
+        fill_delay: float = 0.05,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.secrets = secrets or {"sim-key": "sim-secret"}
+        self.symbol = symbol
+        self.price = price
+        self.latency = latency
+        self.error_429 = error_429
+        self.error_503 = error_503
+        self.rate_limit = rate_limit
+        self.fill_ratio = fill_ratio
+        self.fill_delay = fill_delay
+        self.random = random.Random(seed)
+        self.position: Dict[str, Any] = {
+            "symbol": symbol,
+            "currentQty": 0,
+            "avgEntryPrice": None,
+            "isOpen": False,
+        }
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.request_log: List[Tuple[str, str, int]] = []
+        self._tokens = float(rate_limit)
+        self._refill_ts = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.sim = self
+        self._thread: Optional[threading.Thread] = None
+        self._timers: List[threading.Timer] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._outbox: List[Dict[str, Any]] = []
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("🧪 BitMEX-Simulator läuft auf %s", self.base_url)
+        return self.base_url
+
+    def stop(self) -> None:
+        for timer in self._timers:
+            timer.cancel()
+        if self._thread:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "BitmexSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Stream ``position``/``order``/``execution`` messages like BitMEX ``/realtime``.
+
+        *callback* first receives a ``partial`` per table, then every change.
+        """
+        with self._lock:
+            partials = [
+                {"table": "position", "action": "partial", "keys": ["symbol"], "data": [dict(self.position)]},
+                {"table": "order", "action": "partial", "keys": ["orderID"],
+                 "data": [dict(o) for o in self.orders.values() if o["leavesQty"]]},
+                {"table": "execution", "action": "partial", "keys": ["execID"], "data": []},
+            ]
+            self._listeners.append(callback)
+        for message in partials:
+            callback(message)
+
+    def _emit(self, table: str, action: str, row: Dict[str, Any]) -> None:
+        # called with the lock held; delivered by _flush once it is released
+        if self._listeners:
+            self._outbox.append({"table": table, "action": action, "data": [row]})
+
+    def _flush(self) -> None:
+        with self._lock:
+            messages, self._outbox = self._outbox, []
+            listeners = list(self._listeners)
+        for message in messages:
+            for callback in listeners:
+                try:
+                    callback(message)
+                except Exception as exc:
+                    logger.error("Simulator-Listener Fehler: %s", exc)
+
+    def _rate_headers(self) -> Tuple[bool, Dict[str, str]]:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit,
+                self._tokens + (now - self._refill_ts) * self.rate_limit / 60.0,
+            )
+            self._refill_ts = now
+            allowed = self._tokens >= 1
+            if allowed:
+                self._tokens -= 1
+            missing = max(0.0, self.rate_limit - self._tokens)
+            reset = int(time.time() + missing * 60.0 / self.rate_limit)
+            headers = {
+                "x-ratelimit-limit": str(self.rate_limit),
+                "x-ratelimit-remaining": str(int(self._tokens)),
+                "x-ratelimit-reset": str(reset),
+            }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, int(60.0 / self.rate_limit + 0.999)))
+        return allowed, headers
+
+    def _verify(self, verb: str, path: str, headers: Dict[str, str], body: str) -> Optional[str]:
+        lower = {k.lower(): v for k, v in headers.items()}
+        secret = self.secrets.get(lower.get("api-key", ""))
+        if secret is None:
+            return "Invalid API Key."
+        expires = lower.get("api-expires", "")
+        if not expires.isdigit() or int(expires) < time.time():
+            return "This request has expired."
+        expected = hmac.new(
+            secret.encode(), (verb + path + expires + body).encode(), hashlib.sha256
+        ).hexdigest()
+        if not hmac.compare_digest(expected, lower.get("api-signature", "")):
+            return "Signature not valid."
+        return None
+
+    def handle(
+        self, verb: str, path: str, headers: Dict[str, str], body: str
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+        allowed, rate_headers = self._rate_headers()
+        status, payload = self._route(verb, path, headers, body, allowed)
+        with self._lock:
+            self.request_log.append((verb, urlparse(path).path, status))
+        self._flush()
+        return status, payload, rate_headers
+
+    def _route(
+        self, verb: str, path: str, headers: Dict[str, str], body: str, allowed: bool
+    ) -> Tuple[int, Any]:
+        if not allowed:
+            return 429, {"error": {"message": "Rate limit exceeded", "name": "RateLimitError"}}
+        roll = self.random.random()
+        if roll < self.error_429:
+            return 429, {"error": {"message": "Rate limit exceeded", "name": "RateLimitError"}}
+        if roll < self.error_429 + self.error_503:
+            return 503, {
+                "error": {
+                    "message": "The system is currently overloaded. Please try again later.",
+                    "name": "HTTPError",
+                }
+            }
+        problem = self._verify(verb, path, headers, body)
+        if problem:
+            return 401, {"error": {"message": problem, "name": "HTTPError"}}
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"error": {"message": "Invalid JSON", "name": "HTTPError"}}
+        route = urlparse(path).path
+        if route == "/api/v1/position" and verb == "GET":
+            with self._lock:
+                return 200, [dict(self.position)]
+        if route == "/api/v1/order/bulk" and verb == "POST":
+            return 200, [self._bulk_leg(order) for order in data.get("orders", [])]
+        if route == "/api/v1/order":
+            if verb == "POST":
+                return self._new_order(data)
+            if verb == "PUT":
+                return self._amend_order(data)
+            if verb == "DELETE":
+                return self._cancel_orders(data)
+            if verb == "GET":
+                query = parse_qs(urlparse(path).query)
+                with self._lock:
+                    orders = [dict(o) for o in self.orders.values()]
+                if "orderID" in query:
+                    orders = [o for o in orders if o["orderID"] in query["orderID"]]
+                if "filter" in query and json.loads(query["filter"][0]).get("open"):
+                    orders = [o for o in orders if o["leavesQty"] and o["ordStatus"] in _OPEN_STATES]
+                return 200, orders
+        return 404, {"error": {"message": "Not Found", "name": "HTTPError"}}
+
+    def _new_order(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        if data.get("symbol", self.symbol) != self.symbol:
+            return 400, {"error": {"message": "Invalid symbol", "name": "HTTPError"}}
+        exec_inst = data.get("execInst", "")
+        with self._lock:
+            current = self.position["currentQty"]
+            side = data.get("side")
+            qty = data.get("orderQty")
+            if "Close" in exec_inst:
+                if not current:
+                    return 400, {"error": {"message": "No position to close", "name": "HTTPError"}}
+                side = side or ("Sell" if current > 0 else "Buy")
+                qty = abs(current) if qty is None else qty
+            if side not in ("Buy", "Sell") or not qty or qty <= 0:
+                return 400, {"error": {"message": "Invalid orderQty or side", "name": "HTTPError"}}
+            reduce = "ReduceOnly" in exec_inst or "Close" in exec_inst
+            if reduce:
+                closing = current < 0 if side == "Buy" else current > 0
+                if not closing:
+                    return 400, {
+                        "error": {"message": "ReduceOnly order would increase position", "name": "HTTPError"}
+                    }
+                qty = min(qty, abs(current))
+            ord_type = data.get("ordType", "Market")
+            if ord_type not in ("Market", "Limit", "Stop"):
+                return 400, {"error": {"message": f"Unsupported ordType {ord_type}", "name": "HTTPError"}}
+            if ord_type == "Limit" and not data.get("price"):
+                return 400, {"error": {"message": "Limit order needs price", "name": "HTTPError"}}
+            if ord_type == "Stop" and not data.get("stopPx"):
+                return 400, {"error": {"message": "Stop order needs stopPx", "name": "HTTPError"}}
+            order = {
+                "orderID": str(uuid.uuid4()),
+                "clOrdID": data.get("clOrdID", ""),
+                "symbol": self.symbol,
+                "side": side,
+                "orderQty": qty,
+                "ordType": ord_type,
+                "execInst": exec_inst,
+                "price": data.get("price", self.price),
+                "stopPx": data.get("stopPx"),
+                "cumQty": 0,
+                "leavesQty": qty,
+                "avgPx": None,
+                "ordStatus": "New",
+                "timestamp": time.time(),
+            }
+            self._emit("order", "insert", dict(order))
+            if ord_type != "Market":
+                self.orders[order["orderID"]] = order
+                return 200, dict(order)
+            now_qty = qty if self.fill_ratio >= 1 else int(qty * self.fill_ratio)
+            self._fill(order, now_qty)
+            self.orders[order["orderID"]] = order
+            result = dict(order)
+        if order["leavesQty"]:
+            timer = threading.Timer(self.fill_delay, self._fill_rest, (order["orderID"],))
+            timer.daemon = True
+            self._timers.append(timer)
+            timer.start()
+        return 200, result
+
+    def _find(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if data.get("orderID"):
+            return self.orders.get(data["orderID"])
+        cl_ord_id = data.get("origClOrdID") or data.get("clOrdID")
+        for order in self.orders.values():
+            if cl_ord_id and order["clOrdID"] == cl_ord_id:
+                return order
+        return None
+
+    def _amend_order(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            order = self._find(data)
+            if order is None:
+                return 404, {"error": {"message": "Invalid orderID", "name": "HTTPError"}}
+            if order["ordStatus"] not in _OPEN_STATES:
+                return 400, {"error": {"message": "Invalid ordStatus", "name": "HTTPError"}}
+            if "orderQty" in data:
+                if data["orderQty"] <= order["cumQty"]:
+                    return 400, {"error": {"message": "Invalid orderQty", "name": "HTTPError"}}
+                order["orderQty"] = data["orderQty"]
+                order["leavesQty"] = data["orderQty"] - order["cumQty"]
+            for key in ("price", "stopPx"):
+                if key in data:
+                    order[key] = data[key]
+            order["timestamp"] = time.time()
+            self._emit("order", "update", {
+                k: order[k] for k in ("orderID", "clOrdID", "symbol", "ordStatus", "orderQty",
+                                      "leavesQty", "price", "stopPx")
+            })
+            result = dict(order)
+        self._trigger_resting()
+        return 200, result
+
+    def _cancel_orders(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        ids = data.get("orderID") or []
+        cl_ids = data.get("clOrdID") or []
+        ids = [ids] if isinstance(ids, str) else ids
+        cl_ids = [cl_ids] if isinstance(cl_ids, str) else cl_ids
+        result = []
+        with self._lock:
+            for order in self.orders.values():
+                if order["orderID"] not in ids and order["clOrdID"] not in cl_ids:
+                    continue
+                if order["ordStatus"] in _OPEN_STATES:
+                    self._cancel(order, data.get("text", "Canceled: Cancel from www.bitmex.com"))
+                    result.append(dict(order))
+                else:
+                    result.append({**order, "error": "Unable to cancel order"})
+        return 200, result
+
+    def _cancel(self, order: Dict[str, Any], text: str) -> None:
+        order["ordStatus"] = "Canceled"
+        order["leavesQty"] = 0
+        order["text"] = text
+        self._emit("order", "update", {
+            k: order[k] for k in ("orderID", "clOrdID", "symbol", "ordStatus", "leavesQty", "text")
+        })
+
+    def move_price(self, price: float) -> int:
+        """Set the mark price and fill every resting order it crosses; returns fills."""
+        with self._lock:
+            self.price = price
+        return self._trigger_resting()
+
+    def _trigger_resting(self) -> int:
+        fills = 0
+        with self._lock:
+            price = self.price
+            for order in list(self.orders.values()):
+                if order["ordStatus"] not in _OPEN_STATES or order["ordType"] == "Market":
+                    continue
+                buy = order["side"] == "Buy"
+                if order["ordType"] == "Stop":
+                    hit = price >= order["stopPx"] if buy else price <= order["stopPx"]
+                else:
+                    hit = price <= order["price"] if buy else price >= order["price"]
+                if not hit:
+                    continue
+                current = self.position["currentQty"]
+                reduce = "ReduceOnly" in order["execInst"] or "Close" in order["execInst"]
+                if reduce:
+                    closing = current < 0 if buy else current > 0
+                    if not closing:
+                        self._cancel(order, "Canceled: Order had execInst of ReduceOnly and position is flat")
+                        continue
+                    order["leavesQty"] = min(order["leavesQty"], abs(current))
+                fill_px = price if order["ordType"] == "Stop" else order["price"]
+                market, self.price = self.price, fill_px
+                self._fill(order, order["leavesQty"])
+                self.price = market
+                fills += 1
+        self._flush()
+        return fills
+
+    def _bulk_leg(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        status, result = self._new_order(data)
+        if status == 200:
+            return result
+        return {"ordStatus": "Rejected", "text": result["error"]["message"], **data}
+
+    def _fill(self, order: Dict[str, Any], qty: float) -> None:
+        if qty <= 0:
+            return
+        signed = qty if order["side"] == "Buy" else -qty
+        current = self.position["currentQty"]
+        new = current + signed
+        if current == 0 or (current > 0) == (signed > 0):
+            avg = self.position["avgEntryPrice"] or self.price
+            total = abs(current) + qty
+            self.position["avgEntryPrice"] = (avg * abs(current) + self.price * qty) / total
+        elif new == 0:
+            self.position["avgEntryPrice"] = None
+        elif (new > 0) != (current > 0):
+            self.position["avgEntryPrice"] = self.price
+        self.position["currentQty"] = new
+        self.position["isOpen"] = new != 0
+        order["cumQty"] += qty
+        order["leavesQty"] -= qty
+        order["avgPx"] = self.price
+        order["ordStatus"] = "Filled" if not order["leavesQty"] else "PartiallyFilled"
+        self._emit("execution", "insert", {
+            "execID": str(uuid.uuid4()),
+            "orderID": order["orderID"],
+            "symbol": self.symbol,
+            "side": order["side"],
+            "lastQty": qty,
+            "lastPx": self.price,
+            "cumQty": order["cumQty"],
+            "leavesQty": order["leavesQty"],
+            "ordStatus": order["ordStatus"],
+            "execType": "Trade",
+            "timestamp": time.time(),
+        })
+        self._emit("order", "update", {
+            k: order[k] for k in ("orderID", "symbol", "ordStatus", "cumQty", "leavesQty", "avgPx")
+        })
+        self._emit("position", "update", {
+            k: self.position[k] for k in ("symbol", "currentQty", "avgEntryPrice", "isOpen")
+        })
+
+    def _fill_rest(self, order_id: str) -> None:
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order and order["leavesQty"] and order["ordStatus"] != "Canceled":
+                self._fill(order, order["leavesQty"])
+        self._flush()
+
+
+class SimulatorAdapter(BaseAdapter):
+    """requests transport that hands prepared requests straight to a simulator."""
+
+    def __init__(self, sim: BitmexSimulator) -> None:
+        super().__init__()
+        self.sim = sim
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        url = urlsplit(request.url)
+        path = url.path + (f"?{url.query}" if url.query else "")
+        body = request.body or ""
+        if isinstance(body, bytes):
+            body = body.decode()
+        status, payload, headers = self.sim.handle(
+            request.method, path, dict(request.headers), body
+        )
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers.update(headers)
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def attach(client: Any, sim: BitmexSimulator) -> None:
+    """Route all requests of a :class:`BitmexClient` to *sim* without sockets."""
+    client.session.mount(client.base_url, SimulatorAdapter(sim))
+
+
+def load_test(
+    orders: int = 2000, workers: int = 8, in_process: bool = False, **sim_kwargs: Any
+) -> Dict[str, Any]:
+    """Fire *orders* market orders through BitmexClient against a simulator."""
+    import latency_metrics
+    from bitmex_client import BitmexClient
+
+    sim_kwargs.setdefault("rate_limit", 10 ** 9)
+    with BitmexSimulator(**sim_kwargs) as sim:
+        key, secret = next(iter(sim.secrets.items()))
+        client = BitmexClient(key, secret, base_url=sim.base_url, pool_size=workers)
+        if in_process:
+            attach(client, sim)
+        client.warm_up()
+
+        def one(i: int) -> bool:
+            with latency_metrics.order_trace("load"):
+                try:
+                    client.place_order("Buy" if i % 2 else "Sell", 1)
+                    return True
+                except Exception:
+                    return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = orders - sum(pool.map(one, range(orders)))
+        elapsed = time.perf_counter() - start
+        client.session.close()
+    stats = latency_metrics.histogram("load.sent->response").summary()
+    return {
+        "orders": orders,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "orders_per_sec": round(orders / elapsed, 1),
+        "p50_ms": stats["p50_us"] / 1000,
+        "p99_ms": stats["p99_us"] / 1000,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Lokaler BitMEX-Simulator")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--key", default="sim-key")
+    parser.add_argument("--secret", default="sim-secret")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-429", type=float, default=0.0)
+    parser.add_argument("--error-503", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=120)
+    parser.add_argument("--fill-ratio", type=float, default=1.0)
+    parser.add_argument("--load", type=int, default=0, help="Lasttest mit N Orders statt Serverbetrieb")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--in-process", action="store_true", help="Lasttest ohne TCP")
+    args = parser.parse_args(argv)
+
+    options = dict(
+        secrets={args.key: args.secret},
+        latency=args.latency_ms / 1000,
+        error_429=args.error_429,
+        error_503=args.error_503,
+        fill_ratio=args.fill_ratio,
+    )
+    if args.load:
+        result = load_test(args.load, args.workers, args.in_process, **options)
+        print(json.dumps(result, indent=2))
+        return
+    sim = BitmexSimulator(port=args.port, rate_limit=args.rate_limit, **options)
+    print(f"✅ BitMEX-Simulator auf {sim.start()} (Strg+C beendet)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
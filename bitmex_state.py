@@ -0,0 +1,238 @@
+# bitmex_state.py
+"""Local position/order/execution state kept current by BitMEX's private WebSocket."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from websocket import WebSocketApp
+
+from binance_ws import BaseWebSocket
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("position", "order", "execution")
+_DEFAULT_KEYS = {"position": ("symbol",), "order": ("orderID",)}
+
+
+class BitmexState:
+    """In-memory copy of the ``position``, ``order`` and ``execution`` tables.
+
+    Messages use BitMEX's realtime format (``partial``/``insert``/``update``/
+    ``delete``); updates only carry changed fields and are merged into the
+    stored row. The state is :attr:`live` once the position table has been
+    received and until the connection drops, and while live an attached
+    :class:`BitmexClient` trusts its cached position regardless of age.
+    """
+
+    def __init__(self, max_executions: int = 1000) -> None:
+        self.positions: Dict[Tuple, dict] = {}
+        self.orders: Dict[Tuple, dict] = {}
+        self.executions: Deque[dict] = deque(maxlen=max_executions)
+        self.keys: Dict[str, Tuple[str, ...]] = dict(_DEFAULT_KEYS)
+        self.last_update = 0.0
+        self._partial: set[str] = set()
+        self._connected = False
+        self._listeners: Dict[str, List[Callable[[str, List[dict]], None]]] = {}
+        self._clients: List[Any] = []
+        self._record = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def live(self) -> bool:
+        return self._connected and "position" in self._partial
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def subscribe(self, table: str, callback: Callable[[str, List[dict]], None]) -> None:
+        """Call ``callback(action, rows)`` after every change to *table*."""
+        self._listeners.setdefault(table, []).append(callback)
+
+    def attach(self, client: Any) -> None:
+        """Push position updates into *client*'s cache and mark it as streamed."""
+        self._clients.append(client)
+        client.position_stream = self
+        current = self.position(client.symbol)
+        if self.live:
+            client.update_position(current or {"symbol": client.symbol, "currentQty": 0})
+
+    def record(self, path: Optional[str]) -> None:
+        """Append every applied message to *path* as JSON lines for :func:`replay`."""
+        if self._record:
+            self._record.close()
+        self._record = open(path, "a", encoding="utf-8") if path else None
+
+    # -- connection ----------------------------------------------------------
+    def connected(self) -> None:
+        self._connected = True
+        self._partial.clear()
+
+    def disconnected(self) -> None:
+        self._connected = False
+        self._ready.clear()
+
+    # -- messages ------------------------------------------------------------
+    def apply(self, message: Any) -> None:
+        """Apply one realtime message (``dict`` or JSON text)."""
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        table = message.get("table")
+        action = message.get("action")
+        rows = message.get("data") or []
+        if table not in TOPICS or not action:
+            return
+        if self._record:
+            self._record.write(json.dumps(message) + "\n")
+            self._record.flush()
+        with self._lock:
+            if table == "execution":
+                if action in ("partial", "insert"):
+                    self.executions.extend(rows)
+            else:
+                self._apply_rows(table, action, rows, message.get("keys"))
+            if action == "partial":
+                self._partial.add(table)
+                self._connected = True
+            self.last_update = time.time()
+        if table == "position":
+            self._sync_clients()
+            if self.live:
+                self._ready.set()
+        for callback in self._listeners.get(table, ()):
+            try:
+                callback(action, rows)
+            except Exception as exc:
+                logger.error("BitMEX-State Listener Fehler (%s): %s", table, exc)
+
+    def _apply_rows(self, table: str, action: str, rows: List[dict], keys: Optional[List[str]]) -> None:
+        store = self.positions if table == "position" else self.orders
+        if action == "partial":
+            store.clear()
+            if keys:
+                self.keys[table] = tuple(keys)
+        names = self.keys[table]
+        for row in rows:
+            key = tuple(row.get(name) for name in names)
+            if action == "delete":
+                store.pop(key, None)
+            elif action == "update" and key in store:
+                store[key] = {**store[key], **row}
+            else:
+                store[key] = dict(row)
+
+    def _sync_clients(self) -> None:
+        for client in self._clients:
+            position = self.position(client.symbol)
+            client.update_position(position or {"symbol": client.symbol, "currentQty": 0})
+
+    # -- reads ---------------------------------------------------------------
+    def position(self, symbol: str = "XBTUSD") -> Optional[dict]:
+        with self._lock:
+            for row in self.positions.values():
+                if row.get("symbol") == symbol:
+                    return dict(row)
+        return None
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            return [
+                dict(o)
+                for o in self.orders.values()
+                if o.get("leavesQty") and o.get("ordStatus") not in ("Filled", "Canceled", "Rejected")
+                and (symbol is None or o.get("symbol") == symbol)
+            ]
+
+    def order(self, order_id: str) -> Optional[dict]:
+        with self._lock:
+            for row in self.orders.values():
+                if row.get("orderID") == order_id:
+                    return dict(row)
+        return None
+
+
+def auth_message(api_key: str, api_secret: str, ttl: int = 30) -> dict:
+    expires = int(time.time()) + ttl
+    signature = hmac.new(
+        api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return {"op": "authKeyExpires", "args": [api_key, expires, signature]}
+
+
+def realtime_url(base_url: str) -> str:
+    return base_url.rstrip("/").replace("https://", "wss://").replace("http://", "ws://") + "/realtime"
+
+
+class BitmexPrivateWebSocket(BaseWebSocket):
+    """Authenticated ``/realtime`` connection feeding a :class:`BitmexState`."""
+
+    def __init__(self, state: BitmexState, client: Any, topics: Iterable[str] = TOPICS) -> None:
+        super().__init__(realtime_url(client.base_url), self._on_message)
+        self.state = state
+        self.client = client
+        self.topics = list(topics)
+        self.backoff = [1, 5, 10, 30]
+        self._retry_count = 0
+
+    def _run(self) -> None:
+        while self._running:
+            self.ws = WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            try:
+                self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                logger.error("BitMEX-WS Fehler: %s", e)
+            self.state.disconnected()
+            if not self._running:
+                break
+            self._retry_count += 1
+            time.sleep(self.backoff[min(self._retry_count, len(self.backoff)) - 1])
+
+    def _on_open(self, ws) -> None:
+        ws.send(json.dumps(auth_message(self.client.api_key, self.client.api_secret)))
+        ws.send(json.dumps({"op": "subscribe", "args": self.topics}))
+        self.state.connected()
+        self._retry_count = 0
+        logger.info("🔐 BitMEX Private-WebSocket verbunden")
+
+    def _on_message(self, ws, message) -> None:
+        try:
+            data = json.loads(message)
+            if "error" in data:
+                logger.error("BitMEX-WS: %s", data["error"])
+                return
+            self.state.apply(data)
+        except Exception as exc:
+            logger.warning("BitMEX-WS Nachricht fehlerhaft: %s", exc)
+
+    def _on_error(self, ws, error) -> None:
+        logger.error("BitMEX-WS Fehler: %s", error)
+
+    def _on_close(self, ws, status_code, msg) -> None:
+        self.state.disconnected()
+        logger.info("BitMEX-WS geschlossen: %s %s", status_code, msg)
+
+
+def replay(state: BitmexState, source: Any) -> int:
+    """Feed recorded messages (JSON-lines path or iterable) into *state*."""
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            messages = [line for line in f if line.strip()]
+    else:
+        messages = list(source)
+    for message in messages:
+        state.apply(message)
+    return len(messages)
@@ -0,0 +1,180 @@
+# candle_archive.py
+"""Fixed-width binary candle archive with memory-mapped reads."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+MAGIC = b"EMCANDLE"
+VERSION = 1
+HEADER = struct.Struct("<8sII16s8s24x")
+HEADER_SIZE = HEADER.size
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+RECORD = struct.Struct("<q5d")
+
+
+def _read_header(f) -> tuple[str, str]:
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError("Candle-Archiv ohne Header")
+    magic, version, record_size, symbol, interval = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError("Unbekanntes Candle-Archiv-Format")
+    return symbol.rstrip(b"\0").decode(), interval.rstrip(b"\0").decode()
+
+
+class CandleArchiveWriter:
+    """Append candles to an archive file, creating the header if needed.
+
+    A trailing partial record left by an interrupted write is cut off
+    when the file is opened.
+    """
+
+    def __init__(self, path: str, symbol: str = "", interval: str = "") -> None:
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            self.symbol, self.interval = _read_header(self._file)
+            size = os.path.getsize(path) - HEADER_SIZE
+            self._file.truncate(HEADER_SIZE + size - size % RECORD.size)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self.symbol, self.interval = symbol, interval
+            self._file.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    RECORD_DTYPE.itemsize,
+                    symbol.encode()[:16],
+                    interval.encode()[:8],
+                )
+            )
+        self.count = (self._file.tell() - HEADER_SIZE) // RECORD.size
+
+    def append(self, candle: Dict[str, float], flush: bool = True) -> None:
+        self._file.write(
+            RECORD.pack(
+                int(candle["timestamp"]),
+                float(candle.get("open", candle["close"])),
+                float(candle.get("high", candle["close"])),
+                float(candle.get("low", candle["close"])),
+                float(candle["close"]),
+                float(candle.get("volume", 0.0)),
+            )
+        )
+        self.count += 1
+        if flush:
+            self._file.flush()
+
+    def extend(self, candles: Iterable[Dict[str, float]]) -> None:
+        for candle in candles:
+            self.append(candle, flush=False)
+        self._file.flush()
+
+    def write_records(self, records: np.ndarray) -> None:
+        """Append a structured array with :data:`RECORD_DTYPE` in one write."""
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self._file.flush()
+        self.count += len(records)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CandleArchiveWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CandleArchive:
+    """Memory-mapped read access to an archive file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.symbol, self.interval = _read_header(f)
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(
+                path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)
+            )
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return zero-copy views for every column."""
+        return {name: self.records[name] for name in RECORD_DTYPE.names}
+
+    def tail(self, limit: int) -> List[Dict[str, float]]:
+        rows = self.records[-limit:] if limit > 0 else self.records[:0]
+        return [
+            {
+                "timestamp": int(ts),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for ts, o, h, l, c, v in rows.tolist()
+        ]
+
+    def __iter__(self) -> Iterator[Dict[str, float]]:
+        step = 65536
+        for start in range(0, len(self.records), step):
+            for ts, o, h, l, c, v in self.records[start:start + step].tolist():
+                yield {
+                    "timestamp": ts,
+                    "open": o,
+                    "high": h,
+                    "low": l,
+                    "close": c,
+                    "volume": v,
+                }
+
+
+def convert(source: str, target: str, symbol: str = "", interval: str = "") -> int:
+    """Convert a CSV or JSON-lines candle file into an archive."""
+    from feed_simulator import FeedSimulator
+
+    cols = FeedSimulator(source).columns()
+    records = np.empty(len(cols["close"]), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        records[name] = cols[name]
+    with CandleArchiveWriter(target, symbol, interval) as writer:
+        writer.write_records(records)
+    return len(records)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="CSV/JSON-Candles in Binärarchiv umwandeln")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--symbol", default="")
+    parser.add_argument("--interval", default="")
+    args = parser.parse_args(argv)
+    count = convert(args.source, args.target, args.symbol, args.interval)
+    print(f"✅ {count} Candles nach {args.target} geschrieben")
+
+
+if __name__ == "__main__":
+    main()
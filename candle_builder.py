@@ -0,0 +1,225 @@
+# candle_builder.py
+"""Build closed candles from aggTrade ticks on the local clock, ahead of the kline close."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import latency_metrics
+from tick_stream import Tick
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("open", "high", "low", "close", "volume")
+# without any tick (trade or book) for this long the stream counts as interrupted
+STALE_AFTER = 5.0
+
+
+class CandleBuilder:
+    """Aggregate one symbol's trades into OHLCV bars and close them ourselves.
+
+    Binance pushes the final kline (``x == true``) some time after the
+    bar boundary. The builder closes a bar as soon as the first trade of
+    the next bar arrives, or at ``boundary + close_delay`` on the local
+    clock, whichever comes first, and hands it to *on_candle*. A bar with
+    no trades is closed flat at the previous close with zero volume, like
+    Binance does.
+
+    Bars the builder cannot vouch for are left to the official kline: the
+    first bar after start and any bar during which the tick stream went
+    quiet for :data:`STALE_AFTER` seconds. When the kline arrives,
+    :meth:`reconcile` compares it with the built bar, records how much
+    earlier the built bar was out (``candle.builder_lead`` histogram) and
+    reports differences through *on_mismatch*, e.g. trades that arrived
+    after the bar was closed.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        interval_sec: int,
+        on_candle: Callable[[dict], None],
+        close_delay: float = 0.05,
+        on_mismatch: Optional[Callable[[dict, Dict[str, Tuple[float, float]]], None]] = None,
+        tolerance: float = 1e-6,
+        history: int = 16,
+    ) -> None:
+        self.symbol = symbol.upper()
+        self.interval_sec = int(interval_sec)
+        self.on_candle = on_candle
+        self.close_delay = close_delay
+        self.on_mismatch = on_mismatch
+        self.tolerance = tolerance
+        self.history = history
+        self.stats = {
+            "built": 0, "matched": 0, "corrected": 0, "skipped": 0,
+            "missed": 0, "kline_first": 0, "late_trades": 0,
+        }
+        self._bar: Optional[dict] = None
+        self._complete = False
+        self._gap = True  # nothing seen yet: the bar in progress lacks its first trades
+        self._seen = 0.0  # time.monotonic() of the newest tick
+        self._closed_ts: Optional[int] = None
+        self._last_close: Optional[float] = None
+        self._official_ts: Optional[int] = None
+        # timestamp -> (built candle, perf_counter at close), until the kline arrives
+        self._built: "OrderedDict[int, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    # -- building ------------------------------------------------------------
+    def on_tick(self, tick: Tick) -> Optional[dict]:
+        """Add one tick; returns the bar it closed, if any."""
+        if tick.symbol.upper() != self.symbol:
+            return None
+        closed = None
+        with self._lock:
+            now = time.monotonic()
+            if now - self._seen > STALE_AFTER:
+                self._complete = False
+                self._gap = True
+            self._seen = now
+            if tick.kind != "trade":
+                return None
+            start = int(tick.time // self.interval_sec) * self.interval_sec
+            if self._closed_ts is not None and start <= self._closed_ts:
+                self.stats["late_trades"] += 1
+                return None
+            bar = self._bar
+            if bar is not None and start > bar["timestamp"]:
+                closed = self._close_locked(True)
+                bar = None
+            if bar is None:
+                self._bar = {
+                    "timestamp": start, "open": tick.price, "high": tick.price,
+                    "low": tick.price, "close": tick.price, "volume": tick.qty,
+                }
+                self._complete = not self._gap
+            else:
+                if tick.price > bar["high"]:
+                    bar["high"] = tick.price
+                elif tick.price < bar["low"]:
+                    bar["low"] = tick.price
+                bar["close"] = tick.price
+                bar["volume"] += tick.qty
+            self._gap = False
+        return self._emit(closed)
+
+    def close_due(self, now: Optional[float] = None) -> Optional[dict]:
+        """Close the bar whose end (plus ``close_delay``) has passed by *now*."""
+        now = time.time() if now is None else now
+        current = int((now - self.close_delay) // self.interval_sec) * self.interval_sec
+        closed = None
+        with self._lock:
+            alive = time.monotonic() - self._seen <= STALE_AFTER
+            if self._bar is not None and self._bar["timestamp"] < current:
+                closed = self._close_locked(alive)
+            elif (
+                self._bar is None
+                and alive
+                and self._closed_ts is not None
+                and self._closed_ts + self.interval_sec < current
+            ):
+                price = self._last_close
+                self._bar = {
+                    "timestamp": self._closed_ts + self.interval_sec, "open": price,
+                    "high": price, "low": price, "close": price, "volume": 0.0,
+                }
+                self._complete = True
+                closed = self._close_locked(True)
+        return self._emit(closed)
+
+    def _close_locked(self, alive: bool) -> Optional[Tuple[dict, float]]:
+        bar, self._bar = self._bar, None
+        ts = bar["timestamp"]
+        self._closed_ts = ts
+        self._last_close = bar["close"]
+        if not (self._complete and alive):
+            self.stats["skipped"] += 1
+            return None
+        if self._official_ts is not None and ts <= self._official_ts:
+            self.stats["kline_first"] += 1
+            return None
+        closed_at = time.perf_counter()
+        self._built[ts] = (dict(bar), closed_at)
+        while len(self._built) > self.history:
+            self._built.popitem(last=False)
+        self.stats["built"] += 1
+        return bar, closed_at
+
+    def _emit(self, closed: Optional[Tuple[dict, float]]) -> Optional[dict]:
+        if closed is None:
+            return None
+        candle, closed_at = closed
+        candle["source"] = "trades"
+        latency_metrics.stamp_candle(candle, "ws_recv", closed_at)
+        latency_metrics.stamp_candle(candle, "decoded")
+        try:
+            self.on_candle(candle)
+        except Exception as exc:
+            logger.error("Eigene Candle konnte nicht weitergegeben werden: %s", exc)
+        return candle
+
+    # -- official kline ------------------------------------------------------
+    def reconcile(self, kline: dict, recv: Optional[float] = None) -> bool:
+        """Check the official *kline* against the built bar.
+
+        Returns ``True`` if the bar was already delivered, so the kline
+        must not be fed again.
+        """
+        if recv is None:
+            recv = (kline.get("_trace") or {}).get("ws_recv") or time.perf_counter()
+        ts = kline["timestamp"]
+        with self._lock:
+            entry = self._built.pop(ts, None)
+            if entry is None:
+                if self._official_ts is None or ts > self._official_ts:
+                    self._official_ts = ts
+                self.stats["missed"] += 1
+                return False
+        built, closed_at = entry
+        lead = recv - closed_at
+        latency_metrics.histogram("candle.builder_lead").record_seconds(max(lead, 0.0))
+        diffs = {
+            key: (built[key], float(kline[key]))
+            for key in FIELDS
+            if key in kline and not math.isclose(built[key], float(kline[key]), rel_tol=self.tolerance)
+        }
+        if diffs:
+            self.stats["corrected"] += 1
+            logger.warning("⚠️ Eigene Candle %s weicht von der Binance-Kline ab: %s", ts, diffs)
+            if self.on_mismatch is not None:
+                self.on_mismatch(kline, diffs)
+        else:
+            self.stats["matched"] += 1
+        logger.info("⏱️ Candle %s aus Trades %.0f ms vor der Binance-Kline", ts, lead * 1000)
+        return True
+
+    # -- clock ---------------------------------------------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            due = (now - self.close_delay) // self.interval_sec * self.interval_sec
+            wake = due + self.interval_sec + self.close_delay
+            if self._stop.wait(max(0.0, wake - now)):
+                break
+            self.close_due()
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="candle-builder", daemon=True)
+        self.thread.start()
+        logger.info("🕯️ Candle-Builder %s aktiv (%ss aus aggTrade)", self.symbol, self.interval_sec)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)
@@ -0,0 +1,124 @@
+# candle_store.py
+"""Fixed-capacity columnar candle ring buffer with lock-free readers."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class CandleSnapshot:
+    """Read-only column views of the newest candles at capture time."""
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    count: int
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def copy(self) -> "CandleSnapshot":
+        return CandleSnapshot(
+            *(getattr(self, name).copy() for name in COLUMNS), count=self.count
+        )
+
+    def to_dicts(self) -> List[Dict[str, float]]:
+        rows = zip(*(getattr(self, name).tolist() for name in COLUMNS))
+        return [
+            {
+                "timestamp": int(ts),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for ts, o, h, l, c, v in rows
+        ]
+
+
+class CandleRingBuffer:
+    """Single-writer, many-reader candle history.
+
+    Every row is written twice into a mirrored block so the newest
+    ``capacity`` rows are always contiguous and can be handed out as
+    zero-copy views. The writer publishes a row by bumping :attr:`count`
+    after both copies are stored, so readers never take a lock. The ring
+    holds twice ``capacity`` rows, which keeps a snapshot intact for at
+    least ``capacity`` further appends; use :meth:`CandleSnapshot.copy`
+    to keep data longer.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = max(1, int(capacity))
+        self._size = self.capacity * 2
+        self._data = np.zeros((len(COLUMNS), self._size * 2), dtype=np.float64)
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        """Total number of candles appended so far."""
+        return self._count
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @staticmethod
+    def _row(candle: Dict[str, float]) -> tuple:
+        return (
+            candle["timestamp"],
+            candle.get("open", candle["close"]),
+            candle.get("high", candle["close"]),
+            candle.get("low", candle["close"]),
+            candle["close"],
+            candle.get("volume", 0.0),
+        )
+
+    def append(self, candle: Dict[str, float]) -> None:
+        row = self._row(candle)
+        pos = self._count % self._size
+        self._data[:, pos] = row
+        self._data[:, pos + self._size] = row
+        self._count += 1
+
+    def replace_last(self, candle: Dict[str, float]) -> None:
+        """Overwrite the newest row in place; snapshots already handed out see the change."""
+        if not self._count:
+            raise IndexError("replace_last on an empty buffer")
+        row = self._row(candle)
+        pos = (self._count - 1) % self._size
+        self._data[:, pos] = row
+        self._data[:, pos + self._size] = row
+
+    def extend(self, candles: Iterable[Dict[str, float]]) -> None:
+        for candle in candles:
+            self.append(candle)
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def snapshot(self, limit: Optional[int] = None) -> CandleSnapshot:
+        count = self._count
+        size = min(count, self.capacity)
+        if limit is not None:
+            size = max(0, min(size, int(limit)))
+        start = (count - size) % self._size
+        block = self._data[:, start:start + size]
+        block.setflags(write=False)
+        return CandleSnapshot(*block, count=count)
+
+    def to_dicts(self, limit: Optional[int] = None) -> List[Dict[str, float]]:
+        return self.snapshot(limit).to_dicts()
+
+    def last(self) -> Optional[Dict[str, float]]:
+        rows = self.to_dicts(1)
+        return rows[0] if rows else None
@@ -14,4 +14,10 @@ SETTINGS = {
     "version": "V10.4_Pro",
     "paper_mode": True,
     "data_source_mode": "websocket",
+    "async_runtime": False,
+    "bitmex_private_ws": True,
+    "intrabar_exits": False,
+    "exchange_sl_tp": False,
+    "candle_builder": False,
+    "early_signals": False,
 }
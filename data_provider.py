@@ -3,12 +3,18 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Optional, TypedDict
+import os
+from typing import Callable, List, Optional, TypedDict
 import time
 import threading
 import queue
 
 import binance_ws
+import latency_metrics
+from candle_archive import CandleArchive, CandleArchiveWriter
+from candle_store import CandleRingBuffer, CandleSnapshot
+from kline_decoder import Kline
+from spsc_ring import SpscRing
 from tkinter import Tk, StringVar
 from config import BINANCE_SYMBOL, BINANCE_INTERVAL
 import requests
@@ -18,11 +24,12 @@ from config_manager import config
 logger = logging.getLogger(__name__)
 
 _CANDLE_WS_CLIENT: binance_ws.BinanceCandleWebSocket | None = None
-_WS_CANDLES: list[Candle] = []
-_CANDLE_LOCK = threading.Lock()
-_CANDLE_QUEUE: queue.Queue[Candle] = queue.Queue(maxsize=100)
-_PRELOAD_QUEUE_LIMIT = 2
 _MAX_CANDLES = 1000
+_CANDLE_STORE = CandleRingBuffer(_MAX_CANDLES)
+_CANDLE_LOCK = threading.Lock()
+# the feed thread is the only producer and the SignalWorker the only consumer
+_CANDLE_QUEUE: SpscRing[Candle] = SpscRing(maxsize=100)
+_WARMUP_CANDLES = 100
 _CANDLE_WS_STARTED: bool = False
 _FEED_MONITOR_THREAD: threading.Thread | None = None
 _FEED_MONITOR_STARTED: bool = False
@@ -31,6 +38,15 @@ _TK_ROOT: Tk | None = None
 price_var: StringVar | None = None
 _DEFAULT_INTERVAL = BINANCE_INTERVAL
 _LAST_CANDLE_TS: int | None = None
+_ARCHIVE_WRITER: CandleArchiveWriter | None = None
+_REST_PAGE_LIMIT = 1000
+_BACKFILL_LOCK = threading.Lock()
+_CANDLE_SINK: Callable[[Candle], None] | None = None
+_STREAM_SINK: Callable[[str, str, Candle], None] | None = None
+_CANDLE_BUILDER = None
+_KLINE_UPDATE_SINK: Callable[[Kline, float], None] | None = None
+# the kline reader and the candle builder both feed; the queue takes one producer at a time
+_FEED_LOCK = threading.RLock()
 
 
 def _interval_to_seconds(interval: str) -> int:
@@ -64,16 +80,30 @@ def init_price_var(master: Tk) -> None:
         price_var = StringVar(master=master, value="--")
 
 
-def _fetch_rest_candles(interval: str, limit: int = 14) -> list["Candle"]:
+def _fetch_rest_candles(
+    interval: str,
+    limit: int = 14,
+    start: int | None = None,
+    end: int | None = None,
+    symbol: str = BINANCE_SYMBOL,
+) -> list["Candle"]:
+    base = config.get("binance_rest_url", "https://api.binance.com").rstrip("/")
     url = (
-        f"https://api.binance.com/api/v3/klines?symbol={BINANCE_SYMBOL}"
+        f"{base}/api/v3/klines?symbol={symbol}"
         f"&interval={interval}&limit={limit}"
     )
+    if start is not None:
+        url += f"&startTime={start * 1000}"
+    if end is not None:
+        url += f"&endTime={end * 1000}"
     resp = requests.get(url, timeout=10)
     resp.raise_for_status()
     data = resp.json()
+    now_ms = int(time.time() * 1000)
     candles: list[Candle] = []
     for row in data:
+        if int(row[6]) >= now_ms:
+            continue
         candles.append(
             {
                 "timestamp": int(row[0] // 1000),
@@ -87,29 +117,131 @@ def _fetch_rest_candles(interval: str, limit: int = 14) -> list["Candle"]:
     return candles
 
 
-def _load_initial_candles(interval: str, limit: int = 14, queue_limit: int = _PRELOAD_QUEUE_LIMIT) -> bool:
-    StatusDispatcher.dispatch("feed", False, "REST-API-Call-14")
+def fetch_candle_range(
+    interval: str, start: int, end: int, symbol: str = BINANCE_SYMBOL
+) -> list["Candle"]:
+    """Fetch all closed candles with ``start <= timestamp <= end`` in pages."""
+    interval_sec = _interval_to_seconds(interval)
+    candles: list[Candle] = []
+    while start <= end:
+        page = _fetch_rest_candles(interval, _REST_PAGE_LIMIT, start, end, symbol)
+        page = [c for c in page if start <= c["timestamp"] <= end]
+        if not page:
+            break
+        candles.extend(page)
+        start = page[-1]["timestamp"] + interval_sec
+    return candles
+
+
+def _journal_path(interval: str) -> Optional[str]:
+    path = config.get("candle_archive")
+    if path:
+        return path
+    if config.get("candle_journal", False):
+        return f"candles_{BINANCE_SYMBOL}_{interval}.emc"
+    return None
+
+
+def _read_journal(interval: str, limit: int) -> list["Candle"]:
+    path = _journal_path(interval)
+    if not path or not os.path.exists(path):
+        return []
     try:
-        candles = _fetch_rest_candles(interval, limit)
+        archive = CandleArchive(path)
     except Exception as exc:
-        logger.error("REST Candle Fetch failed: %s", exc)
-        return False
+        logger.warning("Candle-Journal %s unlesbar: %s", path, exc)
+        return []
+    if archive.interval and archive.interval != interval:
+        logger.warning(
+            "Candle-Journal %s gehört zu %s, nicht %s – ignoriert",
+            path,
+            archive.interval,
+            interval,
+        )
+        return []
+    return archive.tail(limit)
+
+
+def find_gaps(candles: list["Candle"], interval_sec: int) -> list[tuple[int, int]]:
+    """Return (last_ts, next_ts) pairs where consecutive candles are missing."""
+    return [
+        (prev["timestamp"], cur["timestamp"])
+        for prev, cur in zip(candles, candles[1:])
+        if cur["timestamp"] - prev["timestamp"] > interval_sec
+    ]
+
+
+def _load_initial_candles(interval: str, limit: int = _WARMUP_CANDLES) -> bool:
+    interval_sec = _interval_to_seconds(interval)
+    history = _read_journal(interval, _MAX_CANDLES)
+    newest = history[-1]["timestamp"] if history else None
+    last_closed = int(time.time()) // interval_sec * interval_sec - interval_sec
+    fresh: list[Candle] = []
+    if newest is None or newest < last_closed:
+        missing = limit if newest is None else (last_closed - newest) // interval_sec
+        missing = min(_MAX_CANDLES, missing + 1)
+        StatusDispatcher.dispatch("feed", False, f"REST-API-Call-{missing}")
+        try:
+            fresh = [
+                c
+                for c in _fetch_rest_candles(interval, missing)
+                if newest is None or c["timestamp"] > newest
+            ]
+        except Exception as exc:
+            logger.error("REST Candle Fetch failed: %s", exc)
+            if not history:
+                return False
+    else:
+        logger.info("Candle-Journal aktuell – kein REST-Preload nötig")
+
+    candles = history + fresh
+    gaps = find_gaps(candles, interval_sec)
+    if gaps:
+        logger.warning(
+            "⚠️ %s Lücke(n) in der Candle-Historie, letzte nach %s",
+            len(gaps),
+            gaps[-1][0],
+        )
     global _LAST_CANDLE_TS
     with _CANDLE_LOCK:
-        _WS_CANDLES.extend(candles)
-        if len(_WS_CANDLES) > _MAX_CANDLES:
-            del _WS_CANDLES[:-_MAX_CANDLES]
+        if _LAST_CANDLE_TS is not None:
+            candles = [c for c in candles if c["timestamp"] > _LAST_CANDLE_TS]
+            fresh = [c for c in fresh if c["timestamp"] > _LAST_CANDLE_TS]
+        _CANDLE_STORE.extend(candles)
+        for candle in fresh:
+            _archive_candle(candle)
         if candles:
             _LAST_CANDLE_TS = candles[-1]["timestamp"]
-    for candle in candles[-queue_limit:]:
-        candle["source"] = "preload"
-        try:
-            _CANDLE_QUEUE.put_nowait(candle)
-        except queue.Full:
-            pass
+    logger.info(
+        "📦 %s Candles aus Journal, %s per REST geladen", len(history), len(fresh)
+    )
     return True
 
-def start_candle_websocket(interval: str | None = None) -> None:
+
+def _wait_for_first_candle(timeout: float = 10) -> None:
+    start_time = time.time()
+    error_logged = False
+    while time.time() - start_time < timeout:
+        if len(_CANDLE_STORE):
+            logger.info("Erste Candle(s) empfangen – WebSocket läuft stabil")
+            return
+        if not error_logged and time.time() - start_time >= 5:
+            logger.warning("FEED ERROR: Keine Candle-Daten empfangen nach 5s")
+            error_logged = True
+        time.sleep(0.5)
+    logger.warning(
+        "Kein Candle-Update nach 10s – prüfen, ob Binance-Daten verfügbar sind"
+    )
+
+
+def start_candle_websocket(
+    interval: str | None = None, stream: bool = True, monitor: bool = True
+) -> None:
+    """Preload candle history and start the kline stream and feed monitor.
+
+    With ``stream=False`` only the history is loaded; candles are then
+    expected via :func:`update_candle_feed` from another reader.
+    """
     global _CANDLE_WS_STARTED, _CANDLE_WS_CLIENT, _DEFAULT_INTERVAL
 
     if interval:
@@ -129,35 +261,33 @@ def start_candle_websocket(interval: str | None = None) -> None:
         stop_candle_websocket()
         logger.info("Candle-WebSocket neu gestartet")
 
-    if not _load_initial_candles(interval, 14, _PRELOAD_QUEUE_LIMIT):
+    if not _load_initial_candles(interval):
         raise RuntimeError("Initial candle download failed")
 
+    if not stream:
+        _CANDLE_WS_STARTED = True
+        if monitor and not _FEED_MONITOR_STARTED:
+            monitor_feed()
+        return
+
     logger.info("WebSocket Candle-Stream gestartet")
     _CANDLE_WS_CLIENT = binance_ws.BinanceCandleWebSocket(
         update_candle_feed,
         interval=interval,
+        on_reconnect=backfill_gap,
+        on_update=_KLINE_UPDATE_SINK,
     )
     _CANDLE_WS_CLIENT.start()
     _CANDLE_WS_STARTED = True
 
-    start_time = time.time()
-    error_logged = False
-    while time.time() - start_time < 10:
-        with _CANDLE_LOCK:
-            has_candles = bool(_WS_CANDLES)
-        if has_candles:
-            logger.info("Erste Candle(s) empfangen – WebSocket läuft stabil")
-            break
-        if not error_logged and time.time() - start_time >= 5:
-            logger.warning("FEED ERROR: Keine Candle-Daten empfangen nach 5s")
-            error_logged = True
-        time.sleep(0.5)
-    else:
-        logger.warning(
-            "Kein Candle-Update nach 10s – prüfen, ob Binance-Daten verfügbar sind"
+    if len(_CANDLE_STORE):
+        logger.info(
+            "✅ %s Candles vorgeladen – Indikatoren sofort bereit", len(_CANDLE_STORE)
         )
+    else:
+        _wait_for_first_candle()
 
-    if not _FEED_MONITOR_STARTED:
+    if monitor and not _FEED_MONITOR_STARTED:
         monitor_feed()
 
 def stop_candle_websocket() -> None:
@@ -178,47 +308,53 @@ _LAST_LEN_CHANGE_TS: float | None = None
 _MONITOR_START_TS: float | None = None
 
 
-def _monitor_loop() -> None:
-    global _FEED_MONITOR_STARTED, _FEED_STUCK_COUNT, _FEED_LAST_LEN, _LAST_LEN_CHANGE_TS
+def check_feed_health(restart: bool = True, monitor: bool = True) -> bool:
+    """Return ``True`` if a candle arrived within two intervals.
 
+    After two failed checks in a row the candle WebSocket is restarted
+    when *restart* is set; *monitor* is passed on to
+    :func:`start_candle_websocket`.
+    """
+    global _FEED_STUCK_COUNT, _FEED_LAST_LEN, _MONITOR_START_TS
+
+    if _MONITOR_START_TS is None:
+        _MONITOR_START_TS = time.time()
     timeframe_sec = _interval_to_seconds(_DEFAULT_INTERVAL)
-    start_ts = _MONITOR_START_TS or time.time()
+    last_candle_time = get_last_candle_time()
+    current_len = _CANDLE_STORE.count
+
+    if current_len != _FEED_LAST_LEN:
+        _FEED_LAST_LEN = current_len
+
+    last_update = _LAST_LEN_CHANGE_TS or _MONITOR_START_TS
+    if last_candle_time:
+        last_update = max(last_update, last_candle_time)
 
+    diff = time.time() - last_update
+
+    if diff > timeframe_sec * 2:
+        logger.warning(
+            "❌ Keine neue Candle seit %.0fs bei %s-Intervall – FEED ERROR",
+            diff,
+            _DEFAULT_INTERVAL,
+        )
+        _FEED_STUCK_COUNT += 1
+        if _FEED_STUCK_COUNT >= 2:
+            if restart:
+                stop_candle_websocket()
+                if not _CANDLE_WS_STARTED:
+                    start_candle_websocket(monitor=monitor)
+            _FEED_STUCK_COUNT = 0
+        return False
+    logger.info("🕒 Letzte Candle vor %.0fs – alles OK", diff)
+    _FEED_STUCK_COUNT = 0
+    return True
+
+def _monitor_loop() -> None:
     while _FEED_MONITOR_STARTED:
         time.sleep(_FEED_CHECK_INTERVAL)
         try:
-            import global_state
-
-            last_ts = global_state.last_feed_time
-            last_candle_time = get_last_candle_time()
-
-            with _CANDLE_LOCK:
-                current_len = len(_WS_CANDLES)
-
-            if current_len != _FEED_LAST_LEN:
-                _FEED_LAST_LEN = current_len
-
-            last_update = _LAST_LEN_CHANGE_TS or start_ts
-            if last_candle_time:
-                last_update = max(last_update, last_candle_time)
-
-            diff = time.time() - last_update
-
-            if diff > timeframe_sec * 2:
-                logger.warning(
-                    "❌ Keine neue Candle seit %.0fs bei %s-Intervall – FEED ERROR",
-                    diff,
-                    _DEFAULT_INTERVAL,
-                )
-                _FEED_STUCK_COUNT += 1
-                if _FEED_STUCK_COUNT >= 2:
-                    stop_candle_websocket()
-                    if not _CANDLE_WS_STARTED:
-                        start_candle_websocket()
-                    _FEED_STUCK_COUNT = 0
-            else:
-                logger.info("🕒 Letzte Candle vor %.0fs – alles OK", diff)
-                _FEED_STUCK_COUNT = 0
+            check_feed_health()
         except Exception as exc:
             logger.error("Feed-Monitor Fehler: %s", exc)
 
@@ -230,8 +366,7 @@ def monitor_feed() -> None:
     logger.info("Candle-Feed Monitor gestartet")
     _FEED_MONITOR_STARTED = True
     _MONITOR_START_TS = time.time()
-    with _CANDLE_LOCK:
-        _FEED_LAST_LEN = len(_WS_CANDLES)
+    _FEED_LAST_LEN = _CANDLE_STORE.count
     _LAST_LEN_CHANGE_TS = None
     _FEED_MONITOR_THREAD = threading.Thread(
         target=_monitor_loop, daemon=True
@@ -259,33 +394,151 @@ class Candle(TypedDict):
     close: float
     volume: float
 
+def _archive_candle(candle: Candle) -> None:
+    global _ARCHIVE_WRITER
+    path = _journal_path(_DEFAULT_INTERVAL)
+    if not path:
+        return
+    try:
+        if _ARCHIVE_WRITER is None or _ARCHIVE_WRITER.path != path:
+            if _ARCHIVE_WRITER is not None:
+                _ARCHIVE_WRITER.close()
+            _ARCHIVE_WRITER = CandleArchiveWriter(path, BINANCE_SYMBOL, _DEFAULT_INTERVAL)
+        if _ARCHIVE_WRITER.interval and _ARCHIVE_WRITER.interval != _DEFAULT_INTERVAL:
+            raise ValueError(
+                f"{path} gehört zu Intervall {_ARCHIVE_WRITER.interval}"
+            )
+        _ARCHIVE_WRITER.append(candle)
+    except Exception as exc:
+        logger.error("Candle-Archiv Fehler: %s", exc)
+
 def is_candle_valid(candle: dict) -> bool:
     required = ("timestamp", "close")
     return all(key in candle and candle[key] not in (None, "") for key in required)
 
-def update_candle_feed(candle: Candle) -> None:
-    logger.debug("update_candle_feed called: %s", candle)
-    if not is_candle_valid(candle):
-        logger.warning("Ungültige Candle empfangen: %s", candle)
-        return
-
+def _feed_candle(candle: Candle, block: bool = False) -> bool:
     global _LAST_LEN_CHANGE_TS, _FEED_LAST_LEN, _LAST_CANDLE_TS
     if _LAST_CANDLE_TS is not None and candle["timestamp"] <= _LAST_CANDLE_TS:
         logger.debug("Doppelte Candle ignoriert: %s", candle)
-        return
+        return False
     _LAST_CANDLE_TS = candle["timestamp"]
-    candle["source"] = "ws"
 
     with _CANDLE_LOCK:
-        _WS_CANDLES.append(candle)
-        if len(_WS_CANDLES) > _MAX_CANDLES:
-            _WS_CANDLES.pop(0)
-        _FEED_LAST_LEN = len(_WS_CANDLES)
+        _CANDLE_STORE.append(candle)
+        _archive_candle(candle)
+        _FEED_LAST_LEN = _CANDLE_STORE.count
         _LAST_LEN_CHANGE_TS = time.time()
+    latency_metrics.stamp_candle(candle, "stored")
+    if _CANDLE_SINK is not None:
+        latency_metrics.stamp_candle(candle, "queued")
+        _CANDLE_SINK(candle)
+        return True
+    latency_metrics.stamp_candle(candle, "queued")
     try:
-        _CANDLE_QUEUE.put_nowait(candle)
+        _CANDLE_QUEUE.put(candle, block=block, timeout=5 if block else None)
     except queue.Full:
         logger.warning("⚠️ Feed überlastet – Candles könnten verloren gehen")
+    return True
+
+def set_candle_sink(sink: Callable[[Candle], None] | None) -> None:
+    """Deliver new candles to *sink* instead of the candle queue."""
+    global _CANDLE_SINK
+    _CANDLE_SINK = sink
+
+def _fetch_gap(
+    symbol: str, interval: str, last_ts: int | None, until: int | None
+) -> list[Candle]:
+    interval_sec = _interval_to_seconds(interval)
+    if until is None:
+        until = int(time.time()) // interval_sec * interval_sec - interval_sec
+    if last_ts is None or until - last_ts < interval_sec:
+        return []
+    start = last_ts + interval_sec
+    missing = (until - start) // interval_sec + 1
+    StatusDispatcher.dispatch("feed", False, f"Backfill {missing} Candles")
+    try:
+        candles = fetch_candle_range(interval, start, until, symbol)
+    except Exception as exc:
+        logger.error("Backfill %s %s ab %s fehlgeschlagen: %s", symbol, interval, start, exc)
+        return []
+    if len(candles) < missing:
+        logger.warning(
+            "⚠️ Backfill %s %s unvollständig: %s von %s Candles",
+            symbol,
+            interval,
+            len(candles),
+            missing,
+        )
+    else:
+        logger.info(
+            "🔁 Backfill %s %s: %s fehlende Candles nachgeladen",
+            symbol,
+            interval,
+            len(candles),
+        )
+    for candle in candles:
+        candle["source"] = "backfill"
+    return candles
+
+def backfill_gap(until: int | None = None) -> int:
+    """Feed closed candles missing between the newest stored one and *until*."""
+    with _FEED_LOCK, _BACKFILL_LOCK:
+        candles = _fetch_gap(BINANCE_SYMBOL, _DEFAULT_INTERVAL, _LAST_CANDLE_TS, until)
+        for candle in candles:
+            _feed_candle(candle, block=True)
+    return len(candles)
+
+def set_kline_update_sink(sink: Callable[[Kline, float], None] | None) -> None:
+    """Pass klines of the unfinished candle to *sink* as ``sink(kline, recv)``."""
+    global _KLINE_UPDATE_SINK
+    _KLINE_UPDATE_SINK = sink
+    if _CANDLE_WS_CLIENT is not None:
+        _CANDLE_WS_CLIENT.on_update = sink
+
+def set_candle_builder(builder) -> None:
+    """Feed closed candles from *builder* first; klines then only reconcile or fill in."""
+    global _CANDLE_BUILDER
+    _CANDLE_BUILDER = builder
+
+def correct_candle(candle: Candle, diffs=None) -> bool:
+    """Overwrite the stored candle of the same timestamp, e.g. with the official kline.
+
+    Only the candle store changes. The indicator engine and any signal
+    already taken on the built bar keep its values until the bar leaves
+    the lookback window, so the difference is logged as drift.
+    """
+    ts = candle["timestamp"]
+    with _CANDLE_LOCK:
+        last = _CANDLE_STORE.last()
+        if not last or last["timestamp"] != ts:
+            logger.warning("⚠️ Candle %s nicht mehr die letzte – Abweichung nur protokolliert", ts)
+            return False
+        _CANDLE_STORE.replace_last(candle)
+    logger.warning("⚠️ Candle %s im Speicher ersetzt – Indikatoren behalten die eigenen Werte", ts)
+    return True
+
+def update_candle_feed(candle: Candle) -> None:
+    logger.debug("update_candle_feed called: %s", candle)
+    if not is_candle_valid(candle):
+        logger.warning("Ungültige Candle empfangen: %s", candle)
+        return
+
+    candle.setdefault("source", "ws")
+    with _FEED_LOCK:
+        if (
+            _CANDLE_BUILDER is not None
+            and candle["source"] == "ws"
+            and _CANDLE_BUILDER.reconcile(candle)
+        ):
+            return
+        interval_sec = _interval_to_seconds(_DEFAULT_INTERVAL)
+        if (
+            _LAST_CANDLE_TS is not None
+            and candle["timestamp"] - _LAST_CANDLE_TS > interval_sec
+        ):
+            backfill_gap(candle["timestamp"] - interval_sec)
+        if not _feed_candle(candle):
+            return
 
     if price_var and _TK_ROOT:
         try:
@@ -295,7 +548,7 @@ def update_candle_feed(candle: Candle) -> None:
 
     WebSocketStatus.set_running(True)
 
-def get_candle_queue() -> queue.Queue[Candle]:
+def get_candle_queue() -> SpscRing[Candle]:
     """Return the queue containing live candles."""
     return _CANDLE_QUEUE
 
@@ -311,13 +564,138 @@ def get_latest_candle_batch(limit: int = 100) -> List[Candle]:
 def get_live_candles(limit: int) -> List[Candle]:
     if not _CANDLE_WS_STARTED:
         start_candle_websocket()
-    with _CANDLE_LOCK:
-        return list(_WS_CANDLES[-limit:])
+    return _CANDLE_STORE.to_dicts(limit)
+
+def get_candle_snapshot(limit: int | None = None) -> CandleSnapshot:
+    """Return zero-copy column views of the newest candles without locking."""
+    if not _CANDLE_WS_STARTED:
+        start_candle_websocket()
+    return _CANDLE_STORE.snapshot(limit)
 
 def fetch_latest_candle() -> Optional[Candle]:
-    candles = get_latest_candle_batch(1)
-    candle = candles[-1] if candles else None
+    if not _CANDLE_WS_STARTED:
+        start_candle_websocket()
+    candle = _CANDLE_STORE.last()
     if candle and not is_candle_valid(candle):
         logger.warning("fetch_latest_candle: incomplete data %s", candle)
         return None
     return candle
+
+
+class CandleFeed:
+    """Candle history and signal queue of one (symbol, interval) stream."""
+
+    def __init__(self, symbol: str, interval: str, capacity: int = _MAX_CANDLES) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_sec = _interval_to_seconds(interval)
+        self.store = CandleRingBuffer(capacity)
+        self.queue: SpscRing[Candle] = SpscRing(maxsize=100)
+        self.last_ts: int | None = None
+        self.lock = threading.Lock()
+
+    def append(self, candle: Candle, block: bool = False) -> bool:
+        with self.lock:
+            if self.last_ts is not None and candle["timestamp"] <= self.last_ts:
+                return False
+            self.last_ts = candle["timestamp"]
+            self.store.append(candle)
+        latency_metrics.stamp_candle(candle, "queued")
+        if _STREAM_SINK is not None:
+            _STREAM_SINK(self.symbol, self.interval, candle)
+            return True
+        try:
+            self.queue.put(candle, block=block, timeout=5 if block else None)
+        except queue.Full:
+            logger.warning(
+                "⚠️ Feed %s %s überlastet – Candles könnten verloren gehen",
+                self.symbol,
+                self.interval,
+            )
+        return True
+
+    def preload(self, candles: List[Candle]) -> None:
+        with self.lock:
+            if self.last_ts is not None:
+                candles = [c for c in candles if c["timestamp"] > self.last_ts]
+            self.store.extend(candles)
+            if candles:
+                self.last_ts = candles[-1]["timestamp"]
+
+    def backfill(self, until: int | None = None) -> int:
+        candles = _fetch_gap(self.symbol, self.interval, self.last_ts, until)
+        for candle in candles:
+            self.append(candle, block=True)
+        return len(candles)
+
+    def candles(self, limit: int | None = None) -> List[Candle]:
+        return self.store.to_dicts(limit)
+
+    def snapshot(self, limit: int | None = None) -> CandleSnapshot:
+        return self.store.snapshot(limit)
+
+
+_FEEDS: dict[tuple[str, str], CandleFeed] = {}
+_MULTI_WS_CLIENT: binance_ws.BinanceCombinedWebSocket | None = None
+
+
+def get_feed(symbol: str, interval: str) -> CandleFeed:
+    key = (symbol.upper(), interval)
+    feed = _FEEDS.get(key)
+    if feed is None:
+        feed = _FEEDS.setdefault(key, CandleFeed(*key))
+    return feed
+
+
+def set_stream_sink(sink: Callable[[str, str, Candle], None] | None) -> None:
+    """Deliver candles of all multi-stream feeds to *sink* instead of their queues."""
+    global _STREAM_SINK
+    _STREAM_SINK = sink
+
+
+def _on_stream_candle(symbol: str, interval: str, candle: Candle) -> None:
+    feed = _FEEDS.get((symbol, interval))
+    if feed is None or not is_candle_valid(candle):
+        return
+    if feed.last_ts is not None and candle["timestamp"] - feed.last_ts > feed.interval_sec:
+        feed.backfill(candle["timestamp"] - feed.interval_sec)
+    feed.append(candle)
+
+
+def _backfill_feeds() -> None:
+    for feed in list(_FEEDS.values()):
+        feed.backfill()
+
+
+def start_multi_stream(
+    pairs: List[tuple[str, str]], warmup: int = _WARMUP_CANDLES
+) -> dict[tuple[str, str], CandleFeed]:
+    """Stream closed klines for all *pairs* over one combined WebSocket."""
+    global _MULTI_WS_CLIENT
+    feeds = {}
+    for symbol, interval in pairs:
+        feed = get_feed(symbol, interval)
+        feeds[(feed.symbol, feed.interval)] = feed
+        if warmup and not len(feed.store):
+            try:
+                feed.preload(_fetch_rest_candles(interval, warmup, symbol=feed.symbol))
+            except Exception as exc:
+                logger.error("REST Preload %s %s fehlgeschlagen: %s", symbol, interval, exc)
+
+    if _MULTI_WS_CLIENT is None:
+        _MULTI_WS_CLIENT = binance_ws.BinanceCombinedWebSocket(
+            _on_stream_candle, list(feeds), on_reconnect=_backfill_feeds
+        )
+        _MULTI_WS_CLIENT.start()
+        logger.info("Kombinierter Candle-Stream gestartet (%s Streams)", len(feeds))
+    else:
+        for symbol, interval in feeds:
+            _MULTI_WS_CLIENT.subscribe(symbol, interval)
+    return feeds
+
+
+def stop_multi_stream() -> None:
+    global _MULTI_WS_CLIENT
+    if _MULTI_WS_CLIENT:
+        _MULTI_WS_CLIENT.stop()
+        _MULTI_WS_CLIENT = None
@@ -0,0 +1,149 @@
+# early_signal.py
+"""Andac entry conditions on unfinished klines, ahead of the candle close."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import latency_metrics
+from entry_logic import should_enter
+from indicator_engine import IndicatorEngine, IndicatorPeek
+from kline_decoder import Kline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BarWatch:
+    """Thresholds of one running candle, fixed when the previous one closed.
+
+    A kline update can only produce a signal if its high is above
+    ``long_above`` or its low below ``short_below`` (and, with
+    ``opt_volumen_strong``, its volume above ``volume_min``); everything
+    else is rejected with these comparisons alone.
+    """
+
+    timestamp: int
+    long_above: float
+    short_below: float
+    volume_min: float
+    peek: IndicatorPeek
+    prev_bull_signal: bool
+    prev_baer_signal: bool
+    updates: int = 0
+    fired: Dict[str, tuple] = field(default_factory=dict)
+
+
+def bar_watch(timestamp: int, peek: IndicatorPeek, config: Dict[str, Any], previous_signal: Optional[str]) -> BarWatch:
+    """Derive the per-bar thresholds that ``should_enter`` needs to pass."""
+    puffer = config.get("puffer", 10.0)
+    prev_bull = previous_signal == "long"
+    prev_baer = previous_signal == "short"
+    if peek.count == 0 or peek.high_lookback is None:
+        long_above, short_below = math.inf, -math.inf
+    elif config.get("opt_confirm_delay", False):
+        # the confirmation candle needs the previous signal, not a new breakout
+        long_above = -math.inf if prev_bull else math.inf
+        short_below = math.inf if prev_baer else -math.inf
+    else:
+        long_above = peek.high_lookback + puffer
+        short_below = peek.low_lookback - puffer
+    volume_min = -math.inf
+    if config.get("opt_volumen_strong", False) and peek.avg_volume is not None:
+        volume_min = peek.avg_volume * config.get("volumen_factor", 1.0)
+    return BarWatch(timestamp, long_above, short_below, volume_min, peek, prev_bull, prev_baer)
+
+
+class EarlySignalMonitor:
+    """Evaluate the Andac entry on every unfinished kline of the running candle.
+
+    :meth:`arm` runs after each closed candle and fixes the thresholds
+    for the next one from a :meth:`IndicatorEngine.peek` snapshot, so an
+    update (``x == false``) costs a few comparisons; only a candidate
+    breakout runs ``should_enter`` on the peeked indicator values. Each
+    direction fires *on_signal(direction, kline, watch)* at most once per
+    candle. :meth:`on_close` compares with the signal of the closed
+    candle and records how much earlier the early signal came
+    (``signal.early_lead`` histogram), or counts it as unconfirmed.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        on_signal: Optional[Callable[[str, Kline, BarWatch], Any]] = None,
+    ) -> None:
+        self.config = config
+        self.on_signal = on_signal
+        self.watch: Optional[BarWatch] = None
+        self.stats = {"updates": 0, "early": 0, "confirmed": 0, "unconfirmed": 0, "close_only": 0}
+        self._lock = threading.Lock()
+
+    def arm(self, timestamp: int, engine: IndicatorEngine, previous_signal: Optional[str]) -> BarWatch:
+        """Watch the candle opening at *timestamp*; call after ``engine.update``."""
+        watch = bar_watch(timestamp, engine.peek(), self.config, previous_signal)
+        self.watch = watch
+        return watch
+
+    def on_kline(self, kline: Kline, recv: Optional[float] = None) -> Optional[str]:
+        """Check one kline update; returns the direction that fired, if any."""
+        watch = self.watch
+        if watch is None or kline.open_time != watch.timestamp:
+            return None
+        watch.updates += 1
+        if kline.volume <= watch.volume_min:
+            return None
+        if kline.high > watch.long_above and "long" not in watch.fired:
+            direction = "long"
+        elif kline.low < watch.short_below and "short" not in watch.fired:
+            direction = "short"
+        else:
+            return None
+        candle = kline.to_candle()
+        indicator = watch.peek.values(candle)
+        indicator["mtf_ok"] = True
+        indicator["prev_bull_signal"] = watch.prev_bull_signal
+        indicator["prev_baer_signal"] = watch.prev_baer_signal
+        signal = should_enter(candle, indicator, self.config).signal
+        if signal is None:
+            return None
+        with self._lock:
+            if signal in watch.fired:
+                return None
+            watch.fired[signal] = (time.time(), kline.close)
+            self.stats["early"] += 1
+        if recv is not None:
+            latency_metrics.histogram("signal.early_eval").record_seconds(time.perf_counter() - recv)
+        logger.info(
+            "⚡ Frühsignal %s @ %.2f – Candle %s läuft noch (%s Updates)",
+            signal.upper(), kline.close, watch.timestamp, watch.updates,
+        )
+        if self.on_signal is not None:
+            self.on_signal(signal, kline, watch)
+        return signal
+
+    def on_close(self, timestamp: int, signal: Optional[str], signal_time: Optional[float] = None) -> Optional[float]:
+        """Match the close-only *signal* of a finished candle; returns the lead in seconds."""
+        with self._lock:
+            watch = self.watch
+            self.stats["updates"] += watch.updates if watch is not None and watch.timestamp == timestamp else 0
+            fired = dict(watch.fired) if watch is not None and watch.timestamp == timestamp else {}
+        signal_time = time.time() if signal_time is None else signal_time
+        for direction in fired:
+            if direction != signal:
+                self.stats["unconfirmed"] += 1
+                logger.info("↩️ Frühsignal %s nicht bestätigt (Candle %s)", direction.upper(), timestamp)
+        if signal is None:
+            return None
+        if signal not in fired:
+            self.stats["close_only"] += 1
+            return None
+        lead = signal_time - fired[signal][0]
+        self.stats["confirmed"] += 1
+        latency_metrics.histogram("signal.early_lead").record_seconds(max(lead, 0.0))
+        logger.info("⏱️ Frühsignal %s bestätigt – %.1f s vor dem Candle-Close", signal.upper(), lead)
+        return lead
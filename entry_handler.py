@@ -4,22 +4,58 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import bitmex_interface as bm
+import latency_metrics
 
 logger = logging.getLogger(__name__)
 
 
-def open_position(side: str, quantity: float, reduce_only: bool = False) -> Optional[dict]:
-    """Open a position on BitMEX."""
+def _after_fill(side: str, quantity: float, reduce_only: bool,
+                sl: Optional[float], tp: Optional[float]) -> None:
+    if reduce_only:
+        bm.sync_protection()
+        return
+    bm.presign_close(entry_side=side)
+    if sl is not None or tp is not None:
+        bm.protect_position(side, quantity, sl, tp)
+
+
+def open_position(side: str, quantity: float, reduce_only: bool = False,
+                  sl: Optional[float] = None, tp: Optional[float] = None) -> Optional[dict]:
+    """Open a position on BitMEX.
+
+    With *sl*/*tp* a stop-market and a limit take-profit order are rested
+    on the exchange for the filled quantity.
+    """
     try:
-        result = bm.place_order(side, quantity, reduce_only=reduce_only)
+        with latency_metrics.order_trace("exit" if reduce_only else "entry"):
+            result = bm.place_order(side, quantity, reduce_only=reduce_only)
         if result is None:
             logger.error(
                 "❌ BitMEX-Order fehlgeschlagen | Daten: side=%s qty=%s", side, quantity
             )
+        else:
+            _after_fill(side, result.get("cumQty") or quantity, reduce_only, sl, tp)
         return result
     except Exception as exc:
         logger.error("open_position failed: %s", exc)
         return None
+
+
+def open_positions(legs: List[Tuple[str, float]], reduce_only: bool = False,
+                   sl: Optional[float] = None, tp: Optional[float] = None) -> Optional[list]:
+    """Send several orders, e.g. a split entry or exit legs, as one bulk request."""
+    try:
+        with latency_metrics.order_trace("exit" if reduce_only else "entry"):
+            result = bm.place_orders(legs, reduce_only=reduce_only)
+        if result is None:
+            logger.error("❌ BitMEX-Bulk-Order fehlgeschlagen | Legs: %s", legs)
+        else:
+            filled = sum(leg.get("cumQty") or 0 for leg in result) or sum(qty for _, qty in legs)
+            _after_fill(legs[0][0], filled, reduce_only, sl, tp)
+        return result
+    except Exception as exc:
+        logger.error("open_positions failed: %s", exc)
+        return None
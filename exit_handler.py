@@ -3,10 +3,14 @@
 
 from typing import Optional
 import bitmex_interface as bm
+import latency_metrics
 
 def close_position() -> Optional[dict]:
-    """Close any open BitMEX position."""
-    return bm.close_position()
+    """Close any open BitMEX position and drop its resting SL/TP orders."""
+    with latency_metrics.order_trace("exit"):
+        result = bm.close_position()
+    bm.cancel_protection()
+    return result
 
 def close_partial_position(volume: float) -> Optional[dict]:
     """
@@ -18,10 +22,14 @@ def close_partial_position(volume: float) -> Optional[dict]:
     if volume <= 0:
         return None
 
-    position = bm.get_open_position()
+    position = bm.get_open_position(max_age=bm.client.position_ttl)
     if not position:
         return None
 
     side = "Sell" if position["currentQty"] > 0 else "Buy"
-    return bm.place_order(side, abs(volume), reduce_only=True)
+    with latency_metrics.order_trace("exit"):
+        result = bm.place_order(side, abs(volume), reduce_only=True)
+    if result is not None:
+        bm.sync_protection()
+    return result
 
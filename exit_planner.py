@@ -0,0 +1,101 @@
+# exit_planner.py
+"""Partial-close legs sent as bulk orders from a worker thread instead of the candle handler."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExitLeg:
+    seq: int
+    side: str
+    quantity: float
+    tag: str = "exit"
+    cancelled: bool = False
+
+
+class ExitPlanner:
+    """Queue reduce-only legs and flush everything pending in one call.
+
+    ``send(legs)`` runs on the planner thread, so the caller only pays for
+    appending a leg. Legs queued while a send is in flight, or inside
+    :meth:`hold`, reach ``send`` as one batch and so as one bulk request.
+    Spacing between Auto Partial Close steps is kept by the candle handler
+    (``apc_next``), not here.
+    """
+
+    def __init__(self, send: Callable[[List[ExitLeg]], Any]) -> None:
+        self.send = send
+        self._legs: List[ExitLeg] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._held = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def schedule(self, side: str, quantity: float, tag: str = "exit") -> ExitLeg:
+        leg = ExitLeg(next(self._seq), side, quantity, tag)
+        with self._cond:
+            self._legs.append(leg)
+            self._ensure_thread()
+            self._cond.notify()
+        return leg
+
+    def cancel(self, tag: Optional[str] = None) -> int:
+        """Drop pending legs (all, or those with *tag*); returns how many."""
+        with self._cond:
+            dropped = [leg for leg in self._legs if tag is None or leg.tag == tag]
+            for leg in dropped:
+                leg.cancelled = True
+            self._legs = [leg for leg in self._legs if not leg.cancelled]
+        return len(dropped)
+
+    def pending(self, tag: Optional[str] = None) -> List[ExitLeg]:
+        with self._cond:
+            return [leg for leg in self._legs if tag is None or leg.tag == tag]
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """Collect legs scheduled in the block so they go out together."""
+        with self._cond:
+            self._held += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._held -= 1
+                self._cond.notify()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="exit-planner", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._held or not self._legs:
+                    if self._stopped:
+                        return
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                due, self._legs = self._legs, []
+            try:
+                self.send(due)
+            except Exception as exc:
+                logger.error("Geplanter Teil-Exit fehlgeschlagen: %s", exc)
@@ -8,6 +8,13 @@ import json
 import time
 from typing import Callable, Iterable, Iterator, Dict
 
+import numpy as np
+
+from candle_archive import CandleArchive
+from candle_store import COLUMNS
+
+ARCHIVE_SUFFIX = ".emc"
+
 
 class FeedSimulator:
     """Load candles from file and feed them sequentially."""
@@ -28,11 +35,32 @@ class FeedSimulator:
                 row = {k: float(v) if k != "timestamp" else int(v) for k, v in row.items()}
                 yield row
 
+    def _is_archive(self) -> bool:
+        return self.filename.lower().endswith(ARCHIVE_SUFFIX)
+
     def candles(self) -> Iterable[Dict[str, float]]:
+        if self._is_archive():
+            return iter(CandleArchive(self.filename))
         if self.filename.lower().endswith(".json"):
             return self._read_json()
         return self._read_csv()
 
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Load the whole file into NumPy columns (memory-mapped for archives)."""
+        if self._is_archive():
+            return CandleArchive(self.filename).columns()
+        if self.filename.lower().endswith(".json"):
+            rows = [[row.get(k, 0.0) for k in COLUMNS] for row in self._read_json()]
+            data = np.array(rows, dtype=np.float64).reshape(-1, len(COLUMNS)).T
+        else:
+            with open(self.filename, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f))
+                usecols = [header.index(k) for k in COLUMNS]
+                data = np.loadtxt(
+                    f, delimiter=",", usecols=usecols, dtype=np.float64, ndmin=2
+                ).T
+        return {k: np.ascontiguousarray(data[i]) for i, k in enumerate(COLUMNS)}
+
     def run(self, callback: Callable[[Dict[str, float]], None], delay: float = 0.0) -> None:
         """Send each candle to *callback* with optional delay in seconds."""
         for candle in self.candles():
@@ -0,0 +1,264 @@
+# indicator_engine.py
+"""Streaming indicators with constant cost per candle."""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from rolling_extrema import RollingExtrema
+
+
+class RollingSum:
+    """Sum over the last *length* values, resynchronised once per window."""
+
+    def __init__(self, length: int) -> None:
+        self.length = max(1, int(length))
+        self.values: Deque[float] = deque(maxlen=self.length)
+        self.total = 0.0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.length:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self._updates += 1
+        if self._updates >= self.length:
+            self.total = math.fsum(self.values)
+            self._updates = 0
+
+    def base(self) -> float:
+        """``total`` once the next value is pushed, without that value."""
+        if len(self.values) == self.length:
+            return self.total - self.values[0]
+        return self.total
+
+
+class WindowEMA:
+    """EMA over the last *length* values seeded with the oldest one.
+
+    Matches ``indicator_utils.calculate_ema(values[-length:], length)``.
+    """
+
+    def __init__(self, length: int) -> None:
+        self.length = max(1, int(length))
+        self.k = 2 / (self.length + 1)
+        self.decay = 1 - self.k
+        self._oldest_weight = self.decay ** (self.length - 1)
+        self._seed_weight = self.decay ** self.length
+        self.values: Deque[float] = deque(maxlen=self.length)
+        self._weighted = 0.0
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.length:
+            self._weighted -= self._oldest_weight * self.values[0]
+        self._weighted = self._weighted * self.decay + value
+        self.values.append(value)
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.values) < self.length:
+            return None
+        return self.k * self._weighted + self._seed_weight * self.values[0]
+
+
+def _atr(count: int, length: int, tr_total: float) -> float:
+    if count < length:
+        return 0.0
+    return round(tr_total / length, 2)
+
+
+def _rsi(count: int, length: int, gains: float, losses: float, loss_flags: float) -> float:
+    if count < length + 1:
+        return 50.0
+    avg_gain = gains / length
+    avg_loss = losses / length if loss_flags else 0.000001
+    rs = avg_gain / avg_loss if avg_loss != 0 else 0
+    rsi = 100 - (100 / (1 + rs))
+    return max(0.0, min(100.0, rsi))
+
+
+@dataclass(frozen=True)
+class IndicatorPeek:
+    """Read-only snapshot of an :class:`IndicatorEngine` between two candles.
+
+    :meth:`values` returns what ``update`` would return for a candidate
+    candle (EMA excluded) without committing it, in constant time, so an
+    unfinished kline can be evaluated on every update. The snapshot does
+    not change when the engine moves on.
+    """
+
+    count: int
+    atr_length: int
+    rsi_length: int
+    prev_close: Optional[float]
+    prev_open: Optional[float]
+    high_lookback: Optional[float]
+    low_lookback: Optional[float]
+    avg_volume: Optional[float]
+    tr_base: float
+    gains_base: float
+    losses_base: float
+    flags_base: float
+
+    def values(self, candle: Dict[str, float]) -> Dict[str, Optional[float]]:
+        high = candle["high"]
+        low = candle["low"]
+        close = candle["close"]
+        tr_total = self.tr_base
+        gains = self.gains_base
+        losses = self.losses_base
+        flags = self.flags_base
+        prev_close = self.prev_close
+        if prev_close is not None:
+            tr_total += max(high - low, abs(high - prev_close), abs(low - prev_close))
+            diff = close - prev_close
+            if diff >= 0:
+                gains += diff
+            else:
+                losses -= diff
+                flags += 1.0
+        first = not self.count
+        count = self.count + 1
+        return {
+            "atr": _atr(count, self.atr_length, tr_total),
+            "rsi": _rsi(count, self.rsi_length, gains, losses, flags),
+            "avg_volume": candle.get("volume", 0.0) if first else self.avg_volume,
+            "high_lookback": high if first else self.high_lookback,
+            "low_lookback": low if first else self.low_lookback,
+            "prev_close": prev_close,
+            "prev_open": self.prev_open,
+        }
+
+
+class IndicatorEngine:
+    """Incremental ATR, EMA, RSI, volume SMA and lookback high/low.
+
+    Values are identical to the list based helpers used by the runner
+    (``calculate_atr``, ``calculate_ema``, ``AndacEntryMaster._rsi``), but
+    every :meth:`update` runs in constant time regardless of lookback.
+    """
+
+    def __init__(
+        self,
+        lookback: int = 20,
+        atr_length: int = 14,
+        ema_length: int = 20,
+        rsi_length: int = 14,
+    ) -> None:
+        self.lookback = max(1, int(lookback))
+        self.atr_length = atr_length
+        self.rsi_length = rsi_length
+        self.count = 0
+        self.prev: Optional[Dict[str, float]] = None
+        self._tr = RollingSum(atr_length)
+        self._ema = WindowEMA(ema_length)
+        self._gains = RollingSum(rsi_length)
+        self._losses = RollingSum(rsi_length)
+        self._loss_flags = RollingSum(rsi_length)
+        self._volume = RollingSum(self.lookback)
+        self.extrema = RollingExtrema(self.lookback)
+        self.values: Dict[str, Optional[float]] = {
+            "atr": 0.0,
+            "ema": None,
+            "rsi": 50.0,
+            "avg_volume": None,
+            "high_lookback": None,
+            "low_lookback": None,
+            "prev_close": None,
+            "prev_open": None,
+        }
+
+    @staticmethod
+    def _is_complete(candle: Dict[str, float]) -> bool:
+        return all(candle.get(k) is not None for k in ("high", "low", "close"))
+
+    @property
+    def atr(self) -> float:
+        return _atr(self.count, self.atr_length, self._tr.total)
+
+    @property
+    def ema(self) -> Optional[float]:
+        return self._ema.value
+
+    @property
+    def rsi(self) -> float:
+        return _rsi(
+            self.count, self.rsi_length, self._gains.total, self._losses.total, self._loss_flags.total
+        )
+
+    def peek(self) -> "IndicatorPeek":
+        """Freeze the state needed to evaluate the next, still unfinished candle."""
+        prev = self.prev
+        return IndicatorPeek(
+            count=self.count,
+            atr_length=self.atr_length,
+            rsi_length=self.rsi_length,
+            prev_close=prev["close"] if prev else None,
+            prev_open=prev.get("open") if prev else None,
+            high_lookback=self.extrema.high_lookback,
+            low_lookback=self.extrema.low_lookback,
+            avg_volume=self._volume.total / len(self._volume) if len(self._volume) else None,
+            tr_base=self._tr.base() if prev else self._tr.total,
+            gains_base=self._gains.base(),
+            losses_base=self._losses.base(),
+            flags_base=self._loss_flags.base(),
+        )
+
+    def update(self, candle: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """Add a closed *candle* and return the indicator values for it.
+
+        ``high_lookback``, ``low_lookback`` and ``avg_volume`` cover the
+        previous ``lookback`` candles, as expected by ``should_enter``.
+        """
+        if not self._is_complete(candle):
+            return self.values
+
+        high = candle["high"]
+        low = candle["low"]
+        close = candle["close"]
+        volume = candle.get("volume", 0.0)
+        prev = self.prev
+
+        if self.count:
+            high_lb = self.extrema.high_lookback
+            low_lb = self.extrema.low_lookback
+            avg_volume = self._volume.total / len(self._volume)
+        else:
+            high_lb = high
+            low_lb = low
+            avg_volume = volume
+
+        if prev is not None:
+            prev_close = prev["close"]
+            self._tr.push(
+                max(high - low, abs(high - prev_close), abs(low - prev_close))
+            )
+            diff = close - prev_close
+            self._gains.push(diff if diff >= 0 else 0.0)
+            self._losses.push(-diff if diff < 0 else 0.0)
+            self._loss_flags.push(1.0 if diff < 0 else 0.0)
+
+        self._ema.push(close)
+        self._volume.push(volume)
+        self.extrema.push(self.count, high, low)
+        self.count += 1
+        self.prev = candle
+
+        self.values = {
+            "atr": self.atr,
+            "ema": self.ema,
+            "rsi": self.rsi,
+            "avg_volume": avg_volume,
+            "high_lookback": high_lb,
+            "low_lookback": low_lb,
+            "prev_close": prev["close"] if prev else None,
+            "prev_open": prev.get("open") if prev else None,
+        }
+        return self.values
@@ -0,0 +1,134 @@
+# intrabar_monitor.py
+"""Check SL/TP of open positions on every tick instead of once per closed candle."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import latency_metrics
+from tick_stream import Tick
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Watch:
+    key: Any
+    symbol: str
+    side: str
+    sl: Optional[float]
+    tp: Optional[float]
+    payload: Any = None
+    since: float = field(default_factory=time.time)
+
+
+class IntrabarMonitor:
+    """Fire ``on_trigger(watch, reason, price, tick)`` the moment a tick crosses SL or TP.
+
+    Longs are tested against the bid and shorts against the ask, i.e. the
+    price a market exit would get; aggTrade ticks carry the trade price on
+    both sides. A watch fires at most once: the trigger and :meth:`unwatch`
+    race under one lock, so the candle path and the tick path can both try
+    to close a position and exactly one of them wins. Time from tick
+    receipt to the end of the trigger callback goes to the ``tick.trigger``
+    histogram.
+    """
+
+    def __init__(self, on_trigger: Optional[Callable[[Watch, str, float, Tick], Any]] = None) -> None:
+        self.on_trigger = on_trigger
+        self._watches: Dict[Any, Watch] = {}
+        self._by_symbol: Dict[str, List[Watch]] = {}
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.triggered = 0
+        self.last_tick: Optional[Tick] = None
+
+    def watch(
+        self,
+        key: Any,
+        symbol: str,
+        side: str,
+        sl: Optional[float],
+        tp: Optional[float],
+        payload: Any = None,
+    ) -> Watch:
+        item = Watch(key, symbol.upper(), side, sl, tp, payload)
+        with self._lock:
+            self._watches[key] = item
+            self._reindex()
+        return item
+
+    def update(self, key: Any, sl: Optional[float] = None, tp: Optional[float] = None) -> bool:
+        """Move SL and/or TP of a live watch; ``False`` if it already fired."""
+        with self._lock:
+            item = self._watches.get(key)
+            if item is None:
+                return False
+            if sl is not None:
+                item.sl = sl
+            if tp is not None:
+                item.tp = tp
+        return True
+
+    def unwatch(self, key: Any) -> bool:
+        """Stop watching *key*; ``False`` means the tick path already claimed it."""
+        with self._lock:
+            item = self._watches.pop(key, None)
+            if item is not None:
+                self._reindex()
+        return item is not None
+
+    def watching(self, key: Any) -> bool:
+        return key in self._watches
+
+    def _reindex(self) -> None:
+        index: Dict[str, List[Watch]] = {}
+        for item in self._watches.values():
+            index.setdefault(item.symbol, []).append(item)
+        self._by_symbol = index
+
+    @staticmethod
+    def check(item: Watch, tick: Tick) -> Optional[tuple[str, float]]:
+        price = tick.exit_price(item.side)
+        if item.side == "long":
+            if item.sl is not None and price <= item.sl:
+                return "sl", price
+            if item.tp is not None and price >= item.tp:
+                return "tp", price
+        else:
+            if item.sl is not None and price >= item.sl:
+                return "sl", price
+            if item.tp is not None and price <= item.tp:
+                return "tp", price
+        return None
+
+    def on_tick(self, tick: Tick) -> int:
+        """Evaluate every watch on *tick*'s symbol; returns how many fired."""
+        self.ticks += 1
+        self.last_tick = tick
+        watches = self._by_symbol.get(tick.symbol.upper())
+        if not watches:
+            return 0
+        fired = 0
+        for item in watches:
+            hit = self.check(item, tick)
+            if hit is None or not self.unwatch(item.key):
+                continue
+            reason, price = hit
+            fired += 1
+            self.triggered += 1
+            logger.info(
+                "⚡ Intrabar-%s %s %s @ %.2f (SL %s | TP %s)",
+                reason.upper(), item.symbol, item.side, price, item.sl, item.tp,
+            )
+            if self.on_trigger is not None:
+                try:
+                    self.on_trigger(item, reason, price, tick)
+                except Exception as exc:
+                    logger.error("Intrabar-Exit fehlgeschlagen: %s", exc)
+            latency_metrics.histogram("tick.trigger").record_seconds(time.perf_counter() - tick.recv)
+        return fired
@@ -0,0 +1,166 @@
+# kline_decoder.py
+"""Decode Binance kline frames, rejecting unfinished candles before parsing."""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("msgspec", "orjson", "json")
+_OPEN_MARKERS = ('"x":false', '"x": false')
+_OPEN_MARKERS_BYTES = tuple(m.encode() for m in _OPEN_MARKERS)
+
+Message = Union[str, bytes]
+
+
+class Kline(NamedTuple):
+    symbol: str
+    interval: str
+    open_time: int
+    close_time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    closed: bool
+
+    def to_candle(self) -> Dict[str, float]:
+        return {
+            "timestamp": self.open_time,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+
+def is_open_frame(message: Message) -> bool:
+    """Return ``True`` if *message* is a kline update for an unfinished candle."""
+    markers = _OPEN_MARKERS_BYTES if isinstance(message, (bytes, bytearray)) else _OPEN_MARKERS
+    return markers[0] in message or markers[1] in message
+
+
+def _from_mapping(data: Dict[str, Any]) -> Optional[Kline]:
+    if "data" in data:
+        data = data["data"]
+    k = data.get("k")
+    if not k:
+        return None
+    return Kline(
+        k.get("s", ""),
+        k.get("i", ""),
+        k["t"] // 1000,
+        k.get("T", 0) // 1000,
+        float(k["o"]),
+        float(k["h"]),
+        float(k["l"]),
+        float(k["c"]),
+        float(k["v"]),
+        bool(k.get("x")),
+    )
+
+
+if msgspec is not None:
+
+    class _RawKline(msgspec.Struct):
+        t: int
+        o: str
+        h: str
+        l: str
+        c: str
+        v: str
+        x: bool = False
+        T: int = 0
+        s: str = ""
+        i: str = ""
+
+    class _RawEvent(msgspec.Struct):
+        k: Optional[_RawKline] = None
+
+    class _RawFrame(msgspec.Struct):
+        k: Optional[_RawKline] = None
+        data: Optional[_RawEvent] = None
+
+    _MSGSPEC_DECODER = msgspec.json.Decoder(_RawFrame)
+
+    def _decode_msgspec(message: Message) -> Optional[Kline]:
+        frame = _MSGSPEC_DECODER.decode(message)
+        k = frame.data.k if frame.data is not None else frame.k
+        if k is None:
+            return None
+        return Kline(
+            k.s,
+            k.i,
+            k.t // 1000,
+            k.T // 1000,
+            float(k.o),
+            float(k.h),
+            float(k.l),
+            float(k.c),
+            float(k.v),
+            k.x,
+        )
+
+
+def available_backends() -> Tuple[str, ...]:
+    found = {"json"}
+    if orjson is not None:
+        found.add("orjson")
+    if msgspec is not None:
+        found.add("msgspec")
+    return tuple(name for name in BACKENDS if name in found)
+
+
+def _resolve(backend: str) -> str:
+    if backend == "auto":
+        return available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unbekannter Kline-Decoder: {backend}")
+    if backend not in available_backends():
+        logger.warning("Kline-Decoder %s nicht installiert – nutze json", backend)
+        return "json"
+    return backend
+
+
+class KlineDecoder:
+    """Turn raw WebSocket messages into closed :class:`Kline` values.
+
+    ``backend`` is ``"auto"`` (fastest installed), ``"msgspec"``,
+    ``"orjson"`` or ``"json"``.
+    """
+
+    def __init__(self, backend: str = "auto") -> None:
+        self.backend = _resolve(backend)
+        if self.backend == "msgspec":
+            self._decode: Callable[[Message], Optional[Kline]] = _decode_msgspec
+        else:
+            loads = orjson.loads if self.backend == "orjson" else json.loads
+            self._decode = lambda message: _from_mapping(loads(message))
+
+    def decode(self, message: Message) -> Optional[Kline]:
+        """Return the closed kline in *message* or ``None``."""
+        if is_open_frame(message):
+            return None
+        kline = self._decode(message)
+        if kline is None or not kline.closed:
+            return None
+        return kline
+
+    def decode_update(self, message: Message) -> Optional[Kline]:
+        """Return the kline in *message* whether its candle is closed or not."""
+        return self._decode(message)
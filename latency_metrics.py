@@ -0,0 +1,380 @@
+# latency_metrics.py
+"""Per-order and per-candle stage timestamps and HDR-style latency histograms."""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SUB_BITS = 7
+_HALF = 1 << (SUB_BITS - 1)
+MAX_VALUE_US = 3_600_000_000
+STAGES = ("candle_close", "signal", "signed", "sent", "response")
+CANDLE_STAGES = (
+    "ws_recv",
+    "decoded",
+    "stored",
+    "queued",
+    "dequeued",
+    "indicators",
+    "signal",
+    "sl_tp",
+    "gui",
+    "done",
+)
+CANDLE_TRACING = True
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BITS)
+    return (shift * _HALF) + (value >> shift)
+
+
+def _highest(index: int) -> int:
+    if index < 2 * _HALF:
+        return index
+    shift = index // _HALF - 1
+    sub = index - shift * _HALF
+    return ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of microsecond values with < 1 % bucket error.
+
+    Values are counted in buckets of ``2**SUB_BITS`` linear steps per power
+    of two, like HdrHistogram with two significant digits, so recording is
+    O(1) and memory stays fixed regardless of sample count.
+    """
+
+    def __init__(self, max_value_us: int = MAX_VALUE_US) -> None:
+        self.max_value_us = max_value_us
+        self.counts = [0] * (_index(max_value_us) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, value_us: float) -> None:
+        value = min(max(int(value_us), 0), self.max_value_us)
+        with self._lock:
+            self.counts[_index(value)] += 1
+            if not self.count or value < self.min:
+                self.min = value
+            self.max = max(self.max, value)
+            self.count += 1
+            self.total += value
+
+    def record_seconds(self, seconds: float) -> None:
+        self.record(seconds * 1_000_000)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> int:
+        with self._lock:
+            if not self.count:
+                return 0
+            target = max(1, math.ceil(pct / 100.0 * self.count))
+            seen = 0
+            for index, hits in enumerate(self.counts):
+                seen += hits
+                if seen >= target:
+                    return min(_highest(index), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        with self._lock:
+            for index, hits in enumerate(other.counts[: len(self.counts)]):
+                self.counts[index] += hits
+            if other.count and (not self.count or other.min < self.min):
+                self.min = other.min
+            self.max = max(self.max, other.max)
+            self.count += other.count
+            self.total += other.total
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = self.total = self.min = self.max = 0
+
+    def summary(self) -> Dict[str, float]:
+        result: Dict[str, float] = {
+            "count": self.count,
+            "min_us": self.min,
+            "mean_us": round(self.mean, 1),
+            "max_us": self.max,
+        }
+        for pct in PERCENTILES:
+            result[f"p{pct:g}_us"] = self.percentile(pct)
+        return result
+
+
+@dataclass
+class OrderTrace:
+    kind: str = "order"
+    stamps: Dict[str, float] = field(default_factory=dict)
+    retries: int = 0
+
+    def mark(self, stage: str, ts: Optional[float] = None) -> None:
+        self.stamps[stage] = time.time() if ts is None else ts
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds between consecutive recorded stages and tick-to-trade."""
+        present = [s for s in STAGES if s in self.stamps]
+        result = {
+            f"{a}->{b}": self.stamps[b] - self.stamps[a]
+            for a, b in zip(present, present[1:])
+        }
+        if len(present) > 1:
+            result["total"] = self.stamps[present[-1]] - self.stamps[present[0]]
+        if "candle_close" in self.stamps and "response" in self.stamps:
+            result["tick_to_trade"] = self.stamps["response"] - self.stamps["candle_close"]
+        return result
+
+
+_HISTOGRAMS: Dict[str, LatencyHistogram] = {}
+_HIST_LOCK = threading.Lock()
+_RETRIES = LatencyHistogram(1_000)
+_CURRENT: contextvars.ContextVar[Optional[OrderTrace]] = contextvars.ContextVar(
+    "order_trace", default=None
+)
+_DUMP_THREAD: threading.Thread | None = None
+_DUMP_STOP = threading.Event()
+
+
+def histogram(name: str) -> LatencyHistogram:
+    hist = _HISTOGRAMS.get(name)
+    if hist is None:
+        with _HIST_LOCK:
+            hist = _HISTOGRAMS.setdefault(name, LatencyHistogram())
+    return hist
+
+
+def start_trace(kind: str = "order", candle_close: Optional[float] = None) -> OrderTrace:
+    """Begin a trace for the order decided in the current context."""
+    trace = OrderTrace(kind)
+    if candle_close is not None:
+        trace.mark("candle_close", candle_close)
+    _CURRENT.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[OrderTrace]:
+    return _CURRENT.get()
+
+
+def mark(stage: str) -> None:
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+def mark_retry() -> None:
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.retries += 1
+
+
+def finish_trace(trace: Optional[OrderTrace] = None) -> Optional[Dict[str, float]]:
+    """Record the stage durations of *trace* (default: current) and clear it."""
+    trace = trace or _CURRENT.get()
+    if trace is None:
+        return None
+    if trace is _CURRENT.get():
+        _CURRENT.set(None)
+    durations = trace.durations()
+    for name, seconds in durations.items():
+        histogram(f"{trace.kind}.{name}").record_seconds(seconds)
+    _RETRIES.record(trace.retries)
+    return durations
+
+
+@contextmanager
+def order_trace(kind: str) -> Iterator[OrderTrace]:
+    """Trace an order call, joining a trace already started for this signal."""
+    trace = _CURRENT.get()
+    if trace is None:
+        trace = start_trace(kind)
+    else:
+        trace.kind = kind
+    try:
+        yield trace
+    except Exception:
+        finish_trace(trace)
+        raise
+    except BaseException:
+        # a rescheduled order keeps its trace until the final attempt
+        raise
+    else:
+        finish_trace(trace)
+
+
+@contextmanager
+def signal_trace(
+    kind: str, candle_close: Optional[float] = None, signal_ts: Optional[float] = None
+) -> Iterator[OrderTrace]:
+    """Make a trace current while the order for a signal is dispatched.
+
+    Order calls inside the block (or in contexts copied from it) join the
+    trace via :func:`order_trace`; the previous trace is restored on exit.
+    """
+    trace = OrderTrace(kind)
+    if candle_close is not None:
+        trace.mark("candle_close", candle_close)
+    trace.mark("signal", signal_ts)
+    token = _CURRENT.set(trace)
+    try:
+        yield trace
+    finally:
+        _CURRENT.reset(token)
+
+
+def stamp_candle(candle: dict, stage: str, ts: Optional[float] = None) -> None:
+    """Record when *candle* reached *stage* (``time.perf_counter`` seconds)."""
+    if CANDLE_TRACING:
+        trace = candle.get("_trace")
+        if trace is None:
+            trace = candle["_trace"] = {}
+        trace[stage] = time.perf_counter() if ts is None else ts
+
+
+def finish_candle(candle: dict) -> Optional[Dict[str, float]]:
+    """Close the candle's trace and add its stage gaps to ``candle.*`` histograms."""
+    trace = candle.pop("_trace", None)
+    if not trace:
+        return None
+    trace.setdefault("done", time.perf_counter())
+    present = [s for s in CANDLE_STAGES if s in trace]
+    durations = {
+        f"{a}->{b}": trace[b] - trace[a] for a, b in zip(present, present[1:])
+    }
+    durations["total"] = trace[present[-1]] - trace[present[0]]
+    for name, seconds in durations.items():
+        histogram(f"candle.{name}").record_seconds(seconds)
+    return durations
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    with _HIST_LOCK:
+        items = sorted(_HISTOGRAMS.items())
+    result = {name: hist.summary() for name, hist in items if hist.count}
+    if _RETRIES.count:
+        result["retries"] = {
+            "count": _RETRIES.count,
+            "total": _RETRIES.total,
+            "max": _RETRIES.max,
+        }
+    return result
+
+
+def reset() -> None:
+    with _HIST_LOCK:
+        _HISTOGRAMS.clear()
+    _RETRIES.reset()
+
+
+def dump(path: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    data = snapshot()
+    for name, stats in data.items():
+        if "p50_us" in stats:
+            logger.info(
+                "⏱️ %s: n=%s p50=%.1fms p99=%.1fms max=%.1fms",
+                name,
+                stats["count"],
+                stats["p50_us"] / 1000,
+                stats["p99_us"] / 1000,
+                stats["max_us"] / 1000,
+            )
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.time(), "histograms": data}, f, indent=2)
+    return data
+
+
+def export_prometheus(path: Optional[str] = None, prefix: str = "entrymaster") -> str:
+    """Render all histograms in Prometheus text format, optionally to *path*."""
+    name = f"{prefix}_stage_latency_seconds"
+    lines = [
+        f"# HELP {name} Latency per pipeline stage.",
+        f"# TYPE {name} summary",
+    ]
+    with _HIST_LOCK:
+        items = sorted(_HISTOGRAMS.items())
+    for stage, hist in items:
+        if not hist.count:
+            continue
+        for pct in PERCENTILES:
+            lines.append(
+                f'{name}{{stage="{stage}",quantile="{pct / 100:g}"}} '
+                f"{hist.percentile(pct) / 1e6:.6f}"
+            )
+        lines.append(f'{name}_sum{{stage="{stage}"}} {hist.total / 1e6:.6f}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+    text = "\n".join(lines) + "\n"
+    if path:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    return text
+
+
+def summary_table(prefix: str = "") -> str:
+    """Console table of count and p50/p99/max in milliseconds per histogram."""
+    rows = [
+        (name, stats)
+        for name, stats in snapshot().items()
+        if name.startswith(prefix) and "p50_us" in stats
+    ]
+    if not rows:
+        return "Keine Latenzdaten"
+    width = max(len(name) for name, _ in rows)
+    lines = [f"{'Stufe':<{width}}  {'n':>7}  {'p50':>9}  {'p99':>9}  {'max':>9}"]
+    for name, stats in rows:
+        lines.append(
+            f"{name:<{width}}  {stats['count']:>7}  "
+            f"{stats['p50_us'] / 1000:>7.3f}ms  {stats['p99_us'] / 1000:>7.3f}ms  "
+            f"{stats['max_us'] / 1000:>7.3f}ms"
+        )
+    return "\n".join(lines)
+
+
+def start_periodic_dump(
+    path: str = "latency_metrics.json",
+    interval: float = 60.0,
+    prom_path: Optional[str] = None,
+) -> None:
+    """Write :func:`snapshot` to *path* (and Prometheus text to *prom_path*) every *interval* seconds."""
+    global _DUMP_THREAD
+    if _DUMP_THREAD and _DUMP_THREAD.is_alive():
+        return
+    _DUMP_STOP.clear()
+
+    def run() -> None:
+        while not _DUMP_STOP.wait(interval):
+            try:
+                dump(path)
+                if prom_path:
+                    export_prometheus(prom_path)
+            except Exception as exc:
+                logger.error("Latenz-Dump fehlgeschlagen: %s", exc)
+
+    _DUMP_THREAD = threading.Thread(target=run, daemon=True)
+    _DUMP_THREAD.start()
+
+
+def stop_periodic_dump() -> None:
+    _DUMP_STOP.set()
@@ -23,6 +23,7 @@ from tkinter import messagebox
 from requests.exceptions import RequestException
 from global_state import entry_time_global, ema_trend_global, atr_value_global
 import data_provider
+import latency_metrics
 
 root = tk.Tk()
 data_provider.init_price_var(root)
@@ -127,13 +128,26 @@ def bot_control(gui):
                 print(status + Style.RESET_ALL)
             except Exception as e:
                 print(f"❌ Fehler bei 'status': {e}")
+        elif cmd.startswith("latency"):
+            args = cmd.split()[1:]
+            if args and args[0] == "export":
+                path = SETTINGS.get("latency_dump_path", "latency_metrics.json")
+                prom = SETTINGS.get("latency_prom_path") or "latency_metrics.prom"
+                latency_metrics.dump(path)
+                latency_metrics.export_prometheus(prom)
+                print(f"💾 Latenzen exportiert: {path}, {prom}")
+            elif args and args[0] == "reset":
+                latency_metrics.reset()
+                print("♻️ Latenz-Histogramme zurückgesetzt")
+            else:
+                print(latency_metrics.summary_table(args[0] if args else ""))
         elif cmd == "restart":
             from global_state import reset_global_state
             gui.force_exit = True
             reset_global_state()
             print("♻️ Bot zurückgesetzt")
         else:
-            print("❓ Unbekannter Befehl. Verfügbar: start / stop / status / restart")
+            print("❓ Unbekannter Befehl. Verfügbar: start / stop / status / latency [candle|entry|exit|export|reset] / restart")
 
 def on_gui_start(gui):
     if gui.running:
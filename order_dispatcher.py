@@ -0,0 +1,197 @@
+# order_dispatcher.py
+"""Submit exchange orders off the signal thread and report their state as events."""
+
+from __future__ import annotations
+
+import contextvars
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+ACKED = "acked"
+FILLED = "filled"
+REJECTED = "rejected"
+FINAL_STATES = (FILLED, REJECTED)
+
+_ACK_STATUSES = ("New", "PartiallyFilled")
+
+
+@dataclass
+class OrderTicket:
+    id: int
+    kind: str
+    side: Optional[str] = None
+    quantity: Optional[float] = None
+    state: str = PENDING
+    filled_qty: float = 0.0
+    order_id: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    # strategy context, e.g. the local position an entry opened
+    meta: Dict[str, Any] = field(default_factory=dict, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+def state_from_response(result: Any) -> str:
+    """Map a BitMEX order response (or ``None``) onto a ticket state.
+
+    A bulk response is rejected if any leg is, and filled once all legs are.
+    """
+    if not result:
+        return REJECTED
+    if isinstance(result, list):
+        states = {state_from_response(order) for order in result}
+        for state in (REJECTED, ACKED):
+            if state in states:
+                return state
+        return FILLED
+    if isinstance(result, dict):
+        status = result.get("ordStatus")
+        if status == "Filled":
+            return FILLED
+        if status in _ACK_STATUSES:
+            return ACKED
+        if status in ("Canceled", "Rejected"):
+            return REJECTED
+    return FILLED
+
+
+class OrderDispatcher:
+    """Run order calls on an executor and publish ticket state changes.
+
+    Orders are executed in submission order by default (one worker), so an
+    exit submitted after an entry never overtakes it. Executors with a
+    ``submit_priority(kind, fn, ...)`` method, such as
+    :class:`order_scheduler.OrderScheduler`, also receive the order kind.
+    Every state change is passed to subscribers and put on :attr:`events`
+    for the strategy to drain at its own pace.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, workers: int = 1) -> None:
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="order"
+        )
+        self.events: queue.Queue[OrderTicket] = queue.Queue()
+        self.tickets: Dict[int, OrderTicket] = {}
+        self._by_order_id: Dict[str, OrderTicket] = {}
+        self._subs: List[Callable[[OrderTicket], None]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[OrderTicket], None]) -> None:
+        self._subs.append(callback)
+
+    def _publish(self, ticket: OrderTicket, state: str, **changes: Any) -> None:
+        with self._lock:
+            if ticket.done:
+                return
+            ticket.state = state
+            ticket.updated = time.time()
+            for key, value in changes.items():
+                setattr(ticket, key, value)
+            if ticket.order_id:
+                self._by_order_id[ticket.order_id] = ticket
+        self.events.put(ticket)
+        for callback in self._subs:
+            try:
+                callback(ticket)
+            except Exception as exc:
+                logger.error("Order-Event Handler Fehler: %s", exc)
+
+    def submit(
+        self,
+        kind: str,
+        func: Callable[..., Any],
+        *args: Any,
+        side: Optional[str] = None,
+        quantity: Optional[float] = None,
+        **kwargs: Any,
+    ) -> OrderTicket:
+        """Queue ``func(*args, **kwargs)`` and return its ticket immediately."""
+        ticket = OrderTicket(next(self._ids), kind, side, quantity)
+        with self._lock:
+            self.tickets[ticket.id] = ticket
+        self.events.put(ticket)
+        ctx = contextvars.copy_context()
+        schedule = getattr(self.executor, "submit_priority", None)
+        if schedule is not None:
+            future = schedule(kind, ctx.run, self._run, ticket, func, args, kwargs)
+        else:
+            future = self.executor.submit(ctx.run, self._run, ticket, func, args, kwargs)
+        ticket.future = future
+        future.add_done_callback(lambda f: self._finished(ticket, f))
+        return ticket
+
+    def _finished(self, ticket: OrderTicket, future: Future) -> None:
+        # orders dropped or failed by the executor never reach _run's handlers
+        if ticket.done:
+            return
+        if future.cancelled():
+            self._publish(ticket, REJECTED, error="abgebrochen")
+        elif future.exception() is not None:
+            self._publish(ticket, REJECTED, error=str(future.exception()))
+
+    def _run(self, ticket: OrderTicket, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            logger.error("Order %s (%s) fehlgeschlagen: %s", ticket.id, ticket.kind, exc)
+            self._publish(ticket, REJECTED, error=str(exc))
+            return None
+        state = state_from_response(result)
+        changes: Dict[str, Any] = {"result": result}
+        if isinstance(result, dict):
+            changes["order_id"] = result.get("orderID")
+            changes["filled_qty"] = result.get("cumQty", 0) or 0
+        if state == REJECTED:
+            changes["error"] = "keine Antwort" if not result else result.get("ordStatus")
+        self._publish(ticket, state, **changes)
+        return result
+
+    def update_from_exchange(self, order: Dict[str, Any]) -> Optional[OrderTicket]:
+        """Advance a ticket from an order update pushed by the exchange."""
+        ticket = self._by_order_id.get(order.get("orderID", ""))
+        if ticket is None:
+            return None
+        state = state_from_response(order)
+        filled = order.get("cumQty", ticket.filled_qty) or 0
+        if state != ticket.state or filled != ticket.filled_qty:
+            self._publish(ticket, state, filled_qty=filled, result=order)
+        return ticket
+
+    def drain(self) -> List[OrderTicket]:
+        """Return tickets that changed since the last call."""
+        changed: List[OrderTicket] = []
+        while True:
+            try:
+                changed.append(self.events.get_nowait())
+            except queue.Empty:
+                return changed
+
+    def open_orders(self) -> List[OrderTicket]:
+        with self._lock:
+            return [t for t in self.tickets.values() if not t.done]
+
+    def wait(self, ticket: OrderTicket, timeout: Optional[float] = None) -> OrderTicket:
+        if ticket.future is not None:
+            ticket.future.result(timeout)
+        return ticket
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._own_executor:
+            self.executor.shutdown(wait=wait)
@@ -0,0 +1,345 @@
+# order_scheduler.py
+"""Rate-limit-aware executor for BitMEX calls: token bucket, priorities, retry budget."""
+
+from __future__ import annotations
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, List, Mapping, Optional
+
+import requests
+
+import latency_metrics
+
+logger = logging.getLogger(__name__)
+
+EXIT = 0
+QUERY = 1
+ENTRY = 2
+_PRIORITIES = {"exit": EXIT, "query": QUERY, "entry": ENTRY}
+
+RETRY_STATUSES = (429, 503)
+
+
+class RetryLater(BaseException):
+    """Raised from a response hook to put the running order back in the queue.
+
+    Like :class:`asyncio.CancelledError` it derives from ``BaseException`` so
+    the ``except Exception`` guards of the order wrappers let it through.
+    """
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(delay)
+        self.delay = delay
+
+
+class OrderSuperseded(RuntimeError):
+    """A queued entry was dropped because an exit was submitted after it."""
+
+
+class TokenBucket:
+    """Request allowance mirroring BitMEX's ``x-ratelimit-*`` headers."""
+
+    def __init__(self, capacity: float = 120, per_second: float = 2.0) -> None:
+        self.capacity = float(capacity)
+        self.per_second = per_second
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._ts) * self.per_second)
+        self._ts = now
+
+    def take(self, reserve: float = 0.0) -> float:
+        """Take one token keeping *reserve* back; return 0 or seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self._refill(now)
+            if self.tokens >= reserve + 1:
+                self.tokens -= 1
+                return 0.0
+            return (reserve + 1 - self.tokens) / self.per_second
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Resynchronise with the allowance reported by the exchange."""
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        with self._lock:
+            limit = headers.get("x-ratelimit-limit")
+            if limit:
+                self.capacity = float(limit)
+                self.per_second = self.capacity / 60.0
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, float(remaining))
+
+    def block(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class RetryBudget:
+    """At most *limit* retries per *window* seconds across all orders."""
+
+    def __init__(self, limit: int = 10, window: float = 60.0) -> None:
+        self.limit = limit
+        self.window = window
+        self._spent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def spend(self, reserve: int = 0) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._spent and now - self._spent[0] > self.window:
+                self._spent.popleft()
+            if len(self._spent) + reserve >= self.limit:
+                return False
+            self._spent.append(now)
+            return True
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            return self.limit - sum(1 for ts in self._spent if now - ts <= self.window)
+
+
+@dataclass
+class _Job:
+    priority: int
+    seq: int
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    future: Future = field(default_factory=Future)
+    attempts: int = 0
+    not_before: float = 0.0
+
+
+_ACTIVE: contextvars.ContextVar[Optional[_Job]] = contextvars.ContextVar(
+    "scheduled_order", default=None
+)
+
+
+class OrderScheduler:
+    """Executor in front of :class:`BitmexClient` that never sleeps on retries.
+
+    Jobs run by priority (exits, then position queries, then entries) once
+    the token bucket allows a request; entries keep ``exit_reserve`` tokens
+    and retries back for exits. A 429/503 response puts the job back in the
+    queue with a due time instead of sleeping in a worker, and an exit drops
+    entries still waiting in the queue so the close is never sent ahead of
+    an entry it is meant to close. Position queries are single-flight.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        workers: int = 1,
+        retry_budget: int = 10,
+        budget_window: float = 60.0,
+        exit_reserve: int = 2,
+        max_attempts: int = 5,
+        max_backoff: float = 5.0,
+    ) -> None:
+        self.bucket = TokenBucket()
+        self.budget = RetryBudget(retry_budget, budget_window)
+        self.exit_reserve = exit_reserve
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.workers = workers
+        self.client = None
+        self._jobs: List[_Job] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self._position_lock = threading.Lock()
+        self._position_query: Optional[Future] = None
+        if client is not None:
+            self.attach(client)
+
+    def attach(self, client: Any) -> None:
+        """Feed the bucket from *client*'s responses and route retries here."""
+        self.client = client
+        client.on_response = self.observe
+
+    # -- executor interface -------------------------------------------------
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self.submit_priority("entry", fn, *args, **kwargs)
+
+    def submit_priority(self, kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        priority = _PRIORITIES.get(kind, ENTRY)
+        job = _Job(priority, next(self._seq), fn, args, kwargs)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("OrderScheduler gestoppt")
+            if priority == EXIT:
+                self._supersede_entries()
+            self._jobs.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job.future
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    @property
+    def backlog(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    # -- worker -------------------------------------------------------------
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name="order-scheduler", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _supersede_entries(self) -> None:
+        kept = []
+        for job in self._jobs:
+            if job.priority != ENTRY:
+                kept.append(job)
+                continue
+            logger.warning("⚠️ Wartende Entry-Order verworfen – Exit hat Vorrang")
+            if job.attempts == 0:
+                job.future.cancel()
+            else:
+                job.future.set_exception(OrderSuperseded("Entry durch Exit ersetzt"))
+        self._jobs = kept
+
+    def _next_job(self) -> tuple[Optional[_Job], Optional[float]]:
+        now = time.monotonic()
+        wait: Optional[float] = None
+        for job in sorted(self._jobs, key=lambda j: (j.priority, j.seq)):
+            if job.future.cancelled():
+                self._jobs.remove(job)
+                continue
+            if job.not_before > now:
+                delay = job.not_before - now
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            reserve = self.exit_reserve if job.priority == ENTRY else 0
+            delay = self.bucket.take(reserve)
+            if delay:
+                wait = delay if wait is None else min(wait, delay)
+                if job.priority == EXIT:
+                    break
+                continue
+            self._jobs.remove(job)
+            return job, None
+        return None, wait
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped and not self._jobs:
+                        return
+                    job, wait = self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait(wait)
+            if job.attempts == 0 and not job.future.set_running_or_notify_cancel():
+                continue
+            job.attempts += 1
+            token = _ACTIVE.set(job)
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except RetryLater as retry:
+                self._requeue(job, retry.delay)
+            except BaseException as exc:
+                job.future.set_exception(exc)
+            else:
+                job.future.set_result(result)
+            finally:
+                _ACTIVE.reset(token)
+
+    def _requeue(self, job: _Job, delay: float) -> None:
+        job.not_before = time.monotonic() + delay
+        with self._cond:
+            self._jobs.append(job)
+            self._cond.notify()
+
+    # -- response hook ------------------------------------------------------
+    def observe(
+        self,
+        response: Optional[requests.Response],
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Called by the client after every request of its session.
+
+        Updates the bucket and, inside a scheduled job, turns a retryable
+        failure into :class:`RetryLater` while the retry budget allows it.
+        """
+        retry_after = None
+        if response is not None:
+            self.bucket.update(response.headers)
+            if response.status_code not in RETRY_STATUSES:
+                return
+            header = response.headers.get("Retry-After")
+            if header and header.isdigit():
+                retry_after = float(header)
+            if response.status_code == 429:
+                self.bucket.block(retry_after or 1.0)
+        elif not isinstance(error, requests.ConnectTimeout):
+            # only retry when the order cannot have reached the exchange
+            return
+        job = _ACTIVE.get()
+        if job is None or job.attempts >= self.max_attempts:
+            return
+        reserve = self.exit_reserve if job.priority == ENTRY else 0
+        if not self.budget.spend(reserve):
+            logger.warning("⚠️ Retry-Budget erschöpft – Order wird nicht wiederholt")
+            return
+        latency_metrics.mark_retry()
+        delay = retry_after or min(self.max_backoff, 0.25 * 2 ** (job.attempts - 1))
+        logger.info("🔁 BitMEX %s – Order erneut in %.2fs", getattr(response, "status_code", error), delay)
+        raise RetryLater(delay)
+
+    # -- position queries ---------------------------------------------------
+    def get_position(self, max_age: float = 0.0, timeout: float = 15.0) -> Optional[dict]:
+        """Return the open position, sharing one request between concurrent callers."""
+        if max_age:
+            cached = self.client.cached_position(max_age)
+            if cached is not None:
+                return cached
+        with self._position_lock:
+            future = self._position_query
+            leader = future is None
+            if leader:
+                future = self._position_query = Future()
+        if not leader:
+            return future.result(timeout)
+        try:
+            position = self.client.get_open_position()
+        except RetryLater:
+            future.set_exception(requests.HTTPError("BitMEX Rate-Limit"))
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(position)
+            return position
+        finally:
+            with self._position_lock:
+                self._position_query = None
@@ -0,0 +1,188 @@
+# param_sweep.py
+"""Parallel parameter sweep over the Andac options using the backtester."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from backtester import DEFAULT_CONFIG, run_backtest
+from candle_store import COLUMNS
+from feed_simulator import FeedSimulator
+
+logger = logging.getLogger(__name__)
+
+PARAM_SPACE: Dict[str, Sequence[Any]] = {
+    "lookback": (10, 20, 30, 50),
+    "puffer": (0.0, 5.0, 10.0, 20.0),
+    "volumen_factor": (1.0, 1.2, 1.5),
+    "opt_rsi_ema": (False, True),
+    "opt_safe_mode": (False, True),
+    "opt_engulf": (False, True),
+    "opt_engulf_bruch": (False, True),
+    "opt_engulf_big": (False, True),
+    "opt_confirm_delay": (False,),
+    "opt_mtf_confirm": (False,),
+    "opt_volumen_strong": (False, True),
+    "take_profit_atr_multiplier": (1.5, 2.0, 3.0),
+}
+
+RESULT_FIELDS = ("rank", "pnl", "max_drawdown", "trades", "win_rate", "final_capital")
+
+TUNING_KEYS = {
+    "lookback": "andac_lookback",
+    "puffer": "andac_puffer",
+    "volumen_factor": "andac_vol_mult",
+    "opt_rsi_ema": "andac_opt_rsi_ema",
+    "opt_safe_mode": "andac_opt_safe_mode",
+    "opt_engulf": "andac_opt_engulf",
+    "opt_engulf_bruch": "andac_opt_engulf_bruch",
+    "opt_engulf_big": "andac_opt_engulf_big",
+    "opt_confirm_delay": "andac_opt_confirm_delay",
+    "opt_mtf_confirm": "andac_opt_mtf_confirm",
+    "opt_volumen_strong": "andac_opt_volumen_strong",
+    "take_profit_atr_multiplier": "take_profit_atr_multiplier",
+}
+
+_SHARED: shared_memory.SharedMemory | None = None
+_COLUMNS: Dict[str, np.ndarray] = {}
+
+
+def grid(space: Dict[str, Sequence[Any]] = PARAM_SPACE) -> Iterator[Dict[str, Any]]:
+    keys = list(space)
+    for values in itertools.product(*(space[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def random_search(
+    count: int, space: Dict[str, Sequence[Any]] = PARAM_SPACE, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    total = 1
+    for values in space.values():
+        total *= len(values)
+    seen = set()
+    configs = []
+    while len(configs) < min(count, total):
+        cfg = {k: rnd.choice(v) for k, v in space.items()}
+        key = tuple(cfg.values())
+        if key not in seen:
+            seen.add(key)
+            configs.append(cfg)
+    return configs
+
+
+def _attach(name: str, length: int) -> None:
+    global _SHARED, _COLUMNS
+    _SHARED = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(COLUMNS), length), dtype=np.float64, buffer=_SHARED.buf)
+    block.setflags(write=False)
+    _COLUMNS = dict(zip(COLUMNS, block))
+
+
+def _evaluate(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {**params, **run_backtest(_COLUMNS, params).summary()}
+
+
+def run_sweep(
+    cols: Dict[str, np.ndarray],
+    configs: Sequence[Dict[str, Any]],
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Backtest every config on *cols* in a process pool, best PnL first."""
+    length = len(cols["close"])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(COLUMNS) * length * 8))
+    try:
+        block = np.ndarray((len(COLUMNS), length), dtype=np.float64, buffer=shm.buf)
+        for i, name in enumerate(COLUMNS):
+            block[i] = cols[name]
+        del block
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach, initargs=(shm.name, length)
+        ) as pool:
+            rows = list(pool.map(_evaluate, configs, chunksize=max(1, len(configs) // 64)))
+    finally:
+        shm.close()
+        shm.unlink()
+    rows.sort(key=lambda r: (r["pnl"], -r["max_drawdown"]), reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def write_results(rows: Sequence[Dict[str, Any]], path: str) -> None:
+    fields = list(RESULT_FIELDS) + [k for k in TUNING_KEYS if rows and k in rows[0]]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            parsed: Dict[str, Any] = {}
+            for key, value in row.items():
+                default = DEFAULT_CONFIG.get(key)
+                if isinstance(default, bool):
+                    parsed[key] = value == "True"
+                elif key in ("rank", "trades", "lookback"):
+                    parsed[key] = int(value)
+                else:
+                    parsed[key] = float(value)
+            rows.append(parsed)
+    return rows
+
+
+def apply_to_tuning_config(row: Dict[str, Any], path: str = "tuning_config.json") -> None:
+    """Write the parameters of a result *row* into the GUI tuning file."""
+    state: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    for key, target in TUNING_KEYS.items():
+        if key not in row:
+            continue
+        value = row[key]
+        if target.startswith("andac_") and not isinstance(value, bool):
+            value = str(value)
+        state[target] = value
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    logger.info("💾 Sweep-Ergebnis Rang %s in %s übernommen", row.get("rank"), path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Andac Parameter-Sweep")
+    parser.add_argument("file")
+    parser.add_argument("--random", type=int, default=200, help="Anzahl Zufallskombinationen")
+    parser.add_argument("--grid", action="store_true", help="Komplettes Grid statt Zufallssuche")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="sweep_results.csv")
+    parser.add_argument("--apply", type=int, default=0, help="Rang in tuning_config.json übernehmen")
+    args = parser.parse_args(argv)
+
+    configs = list(grid()) if args.grid else random_search(args.random, seed=args.seed)
+    cols = FeedSimulator(args.file).columns()
+    rows = run_sweep(cols, configs, args.workers)
+    write_results(rows, args.out)
+    for row in rows[:10]:
+        print(" | ".join(f"{k}: {row[k]}" for k in RESULT_FIELDS))
+    if args.apply:
+        apply_to_tuning_config(rows[args.apply - 1])
+
+
+if __name__ == "__main__":
+    main()
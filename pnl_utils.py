@@ -10,6 +10,16 @@ def calculate_futures_pnl(entry_price: float, exit_price: float, leverage: int,
     return change * leverage * amount * direction
 
 
+def simulated_trade_result(entry: float, exit_price: float, qty: float, side: str,
+                           leverage: float, capital: float, fee_rate: float) -> float:
+    """Return the net result of a paper trade as booked by the runner."""
+    max_qty = (capital * leverage) / entry if entry else qty
+    qty = min(qty, max_qty)
+    pnl = (exit_price - entry) if side == "long" else (entry - exit_price)
+    fees = (entry + exit_price) * qty * fee_rate
+    return max(-capital, pnl * qty * leverage - fees)
+
+
 def check_plausibility(pnl: float, old_balance: float, new_balance: float, amount: float) -> None:
     """Warn if PnL or balance jumps unrealistically."""
     if abs(pnl) > 2 * amount or new_balance > 2 * old_balance or new_balance < 0:
@@ -0,0 +1,284 @@
+# protective_orders.py
+"""Stop-loss and take-profit orders resting on BitMEX for the open position."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "em"
+
+
+@dataclass
+class Protection:
+    link: str
+    side: str  # position side, "Buy" (long) or "Sell" (short)
+    quantity: float
+    sl: Optional[float]
+    tp: Optional[float]
+    sl_id: str = ""
+    tp_id: str = ""
+    sl_live: bool = False
+    tp_live: bool = False
+    filled: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.sl_id = self.sl_id or f"{self.link}-sl"
+        self.tp_id = self.tp_id or f"{self.link}-tp"
+
+    def ids(self) -> List[str]:
+        return [cid for cid, live in ((self.sl_id, self.sl_live), (self.tp_id, self.tp_live)) if live]
+
+
+def _new_link() -> str:
+    return f"{PREFIX}-{uuid.uuid4().hex[:12]}"
+
+
+def _leg(cl_ord_id: str) -> Optional[str]:
+    """``"sl"``/``"tp"`` for our order ids (``em-<link>[-<rev>]-sl``), else ``None``."""
+    if not cl_ord_id.startswith(PREFIX + "-") or not cl_ord_id.endswith(("-sl", "-tp")):
+        return None
+    return cl_ord_id[-2:]
+
+
+def _link(cl_ord_id: str) -> str:
+    return "-".join(cl_ord_id.split("-")[:2])
+
+
+class ProtectiveOrders:
+    """Keep one stop-market SL and one reduce-only limit TP in sync with the position.
+
+    The orders live on the exchange, so a stop fires with exchange latency
+    even if this process is stalled or gone. BitMEX has no OCO any more:
+    when one leg fills, :meth:`on_order` cancels the other and reports the
+    exit through ``on_exit(reason, price)``. :meth:`sync` resizes both legs
+    after partial closes, and :meth:`reconcile` adopts, repairs or removes
+    orders left over from an earlier run by their ``clOrdID`` prefix.
+
+    The stream callbacks only update local state. Their REST calls go to
+    *executor* (e.g. :class:`order_scheduler.OrderScheduler`) as ``exit``
+    jobs, so a resize in flight never holds up the next stream message.
+    Without an executor they run in the caller's thread.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        state: Any = None,
+        on_exit: Optional[Callable[[str, float], None]] = None,
+        executor: Any = None,
+    ) -> None:
+        self.client = client
+        self.state = state
+        self.on_exit = on_exit
+        self.executor = executor
+        self.active: Optional[Protection] = None
+        # kept after a flat position cancelled it, so a late fill report still matches
+        self.last: Optional[Protection] = None
+        self._lock = threading.RLock()
+
+    # -- placing -------------------------------------------------------------
+    def place(self, side: str, quantity: float, sl: Optional[float], tp: Optional[float]) -> Optional[Protection]:
+        """Rest SL/TP for a new position; replaces any earlier protection."""
+        side = "Buy" if side.lower() in ("buy", "long") else "Sell"
+        with self._lock:
+            if self.active is not None:
+                self.cancel()
+            protection = Protection(_new_link(), side, abs(quantity), sl, tp)
+            result = self.client.place_protection(side, protection.quantity, sl, tp, protection.link)
+            self._mark_legs(protection, result)
+            self.active = protection
+        if sl is not None and not protection.sl_live:
+            logger.error("❌ Stop-Loss-Order auf BitMEX abgelehnt – Position ohne Exchange-SL!")
+        logger.info("🛡️ SL/TP auf BitMEX: SL %s | TP %s | Menge %s", sl, tp, protection.quantity)
+        return protection
+
+    def _mark_legs(self, protection: Protection, orders: List[dict]) -> None:
+        for order in orders or []:
+            leg = _leg(order.get("clOrdID", ""))
+            if leg is None:
+                continue
+            live = order.get("ordStatus") in ("New", "PartiallyFilled")
+            if not live:
+                logger.error("❌ %s-Order abgelehnt: %s", leg.upper(), order.get("text"))
+            setattr(protection, f"{leg}_id", order["clOrdID"])
+            setattr(protection, f"{leg}_live", live)
+
+    def amend(self, sl: Optional[float] = None, tp: Optional[float] = None) -> bool:
+        """Move the resting SL and/or TP, e.g. after a manual change."""
+        with self._lock:
+            protection = self.active
+            if protection is None:
+                return False
+            if sl is not None and sl != protection.sl:
+                if protection.sl_live:
+                    self.client.amend_order(protection.sl_id, stopPx=sl)
+                    protection.sl = sl
+                else:
+                    protection.sl = sl
+                    self._replace_leg(protection, "sl")
+            if tp is not None and tp != protection.tp:
+                if protection.tp_live:
+                    self.client.amend_order(protection.tp_id, price=tp)
+                    protection.tp = tp
+                else:
+                    protection.tp = tp
+                    self._replace_leg(protection, "tp")
+        return True
+
+    def _replace_leg(self, protection: Protection, leg: str) -> None:
+        # a fresh clOrdID per attempt, the exchange does not accept reused ones
+        result = self.client.place_protection(
+            protection.side,
+            protection.quantity,
+            protection.sl if leg == "sl" else None,
+            protection.tp if leg == "tp" else None,
+            f"{protection.link}-{uuid.uuid4().hex[:4]}",
+        )
+        self._mark_legs(protection, result)
+
+    def sync(self, position_qty: float) -> None:
+        """Follow the position size: resize legs, or drop them once flat."""
+        quantity = abs(position_qty or 0)
+        with self._lock:
+            protection = self.active
+            if protection is None:
+                return
+            if not quantity:
+                ids = self._release()
+            elif quantity == protection.quantity:
+                return
+            else:
+                protection.quantity = quantity
+                ids = protection.ids()
+        # REST outside the lock, so fill reports from the stream are not held up
+        if not quantity:
+            if ids:
+                self.client.cancel_orders(ids)
+            return
+        for cl_ord_id in ids:
+            self.client.amend_order(cl_ord_id, orderQty=quantity)
+        logger.info("🛡️ SL/TP-Menge angepasst: %s", quantity)
+
+    def cancel(self) -> int:
+        with self._lock:
+            ids = self._release()
+        if not ids:
+            return 0
+        result = self.client.cancel_orders(ids)
+        return len(result or [])
+
+    def _release(self) -> List[str]:
+        """Drop the active protection locally; returns the ids still resting."""
+        protection, self.active = self.active, None
+        if protection is None:
+            return []
+        self.last = protection
+        ids = protection.ids()
+        protection.sl_live = protection.tp_live = False
+        return ids
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> None:
+        if self.executor is None:
+            func(*args)
+            return
+        future = self.executor.submit_priority("exit", func, *args)
+        future.add_done_callback(self._submitted)
+
+    @staticmethod
+    def _submitted(future: Any) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("❌ SL/TP-Anpassung fehlgeschlagen: %s", future.exception())
+
+    # -- exchange updates ----------------------------------------------------
+    def on_order(self, action: str, rows: List[Dict[str, Any]]) -> None:
+        """``BitmexState`` order-table callback: one leg filled → cancel the other."""
+        for row in rows:
+            if self.state is not None and row.get("orderID"):
+                # updates only carry changed fields; the state holds the full order
+                row = {**(self.state.order(row["orderID"]) or {}), **row}
+            cl_ord_id = row.get("clOrdID") or ""
+            leg = _leg(cl_ord_id)
+            if leg is None:
+                continue
+            with self._lock:
+                protection = next(
+                    (p for p in (self.active, self.last) if p is not None and p.link == _link(cl_ord_id)),
+                    None,
+                )
+                if protection is None:
+                    continue
+                status = row.get("ordStatus")
+                if status in ("Canceled", "Rejected") and cl_ord_id == getattr(protection, f"{leg}_id"):
+                    setattr(protection, f"{leg}_live", False)
+                if status != "Filled" or protection.filled:
+                    continue
+                protection.filled = leg
+                setattr(protection, f"{leg}_live", False)
+                ids = self._release() if protection is self.active else []
+            if ids:
+                self._submit(self.client.cancel_orders, ids)
+            price = row.get("avgPx") or (protection.sl if leg == "sl" else protection.tp)
+            logger.info("🛡️ %s auf BitMEX ausgeführt @ %s", leg.upper(), price)
+            if self.on_exit is not None:
+                self.on_exit(leg, price)
+
+    def on_position(self, action: str, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if "currentQty" in row and row.get("symbol", self.client.symbol) == self.client.symbol:
+                self._submit(self.sync, row["currentQty"])
+
+    # -- restart -------------------------------------------------------------
+    def reconcile(self) -> str:
+        """Match resting orders from an earlier run against the live position.
+
+        Returns ``"none"`` (flat, nothing resting), ``"flat"`` (leftovers
+        cancelled), ``"adopted"`` (protection found and resized to the
+        position) or ``"unprotected"`` (position open without a stop).
+        """
+        orders = [o for o in self.client.get_open_orders() if _leg(o.get("clOrdID") or "")]
+        position = self.client.get_open_position() or {}
+        quantity = position.get("currentQty") or 0
+        with self._lock:
+            if not quantity:
+                if orders:
+                    self.client.cancel_orders([o["clOrdID"] for o in orders])
+                    logger.info("🛡️ %s verwaiste SL/TP-Orders storniert", len(orders))
+                self.active = None
+                return "flat" if orders else "none"
+
+            links: Dict[str, List[dict]] = {}
+            for order in orders:
+                links.setdefault(_link(order["clOrdID"]), []).append(order)
+            known = self.active
+            if links:
+                newest = max(links, key=lambda link: max(o.get("timestamp") or 0 for o in links[link]))
+                stale = [o["clOrdID"] for link, group in links.items() if link != newest for o in group]
+                if stale:
+                    self.client.cancel_orders(stale)
+                protection = Protection(newest, "Buy" if quantity > 0 else "Sell", abs(quantity), None, None)
+                for order in links[newest]:
+                    if _leg(order["clOrdID"]) == "sl":
+                        protection.sl, protection.sl_id, protection.sl_live = order.get("stopPx"), order["clOrdID"], True
+                    else:
+                        protection.tp, protection.tp_id, protection.tp_live = order.get("price"), order["clOrdID"], True
+                    if order.get("orderQty") != abs(quantity):
+                        self.client.amend_order(order["clOrdID"], orderQty=abs(quantity))
+            else:
+                protection = Protection(_new_link(), "Buy" if quantity > 0 else "Sell", abs(quantity), None, None)
+            if known is not None and known.side == protection.side:
+                for leg in ("sl", "tp"):
+                    if not getattr(protection, f"{leg}_live") and getattr(known, leg) is not None:
+                        setattr(protection, leg, getattr(known, leg))
+                        self._replace_leg(protection, leg)
+            self.active = protection
+        if not protection.sl_live:
+            logger.warning("⚠️ Offene Position ohne Stop-Loss auf BitMEX!")
+            return "unprotected"
+        logger.info("🛡️ SL/TP übernommen: SL %s | TP %s | Menge %s", protection.sl, protection.tp, protection.quantity)
+        return "adopted"
@@ -1,12 +1,12 @@
 # realtime_runner.py
 # -*- coding: utf-8 -*-
 
+import asyncio
 import os
 import time
 import traceback
 from datetime import datetime
 import logging
-import queue
 import random
 import data_provider
 from requests.exceptions import RequestException
@@ -22,16 +22,32 @@ def now_time() -> str:
     return datetime.now().strftime("%H:%M:%S")
 
 from data_provider import (
+    backfill_gap,
+    check_feed_health,
     fetch_latest_candle,
     fetch_last_price,
     get_last_candle_time,
     get_live_candles,
+    set_candle_sink,
+    set_kline_update_sink,
     start_candle_websocket,
     get_candle_queue,
+    update_candle_feed,
 )
+import async_runtime
+from async_runtime import AsyncRuntime, kline_reader
+from binance_ws import kline_stream_url
 from config import BINANCE_INTERVAL, BINANCE_SYMBOL
-from entry_handler import open_position
+import bitmex_interface
+import latency_metrics
+from entry_handler import open_position, open_positions
+from exit_planner import ExitPlanner
+from intrabar_monitor import IntrabarMonitor
+from candle_builder import CandleBuilder
+from early_signal import EarlySignalMonitor
+from tick_stream import BinanceTickWebSocket, TickReplay
 from exit_handler import close_position, close_partial_position
+from order_dispatcher import FILLED, REJECTED, OrderDispatcher, OrderTicket
 from cooldown_manager import CooldownManager
 from status_block import print_entry_status
 from gui_bridge import GUIBridge
@@ -47,9 +63,10 @@ from global_state import (
 )
 import global_state
 
-from indicator_utils import calculate_ema, calculate_atr
+from indicator_utils import calculate_atr
+from indicator_engine import IndicatorEngine
 
-from andac_entry_master import AndacEntryMaster, AndacSignal
+from andac_entry_master import AndacSignal
 from signal_worker import SignalWorker
 from entry_logic import should_enter
 from adaptive_sl_manager import AdaptiveSLManager
@@ -72,20 +89,15 @@ def is_within_active_timeframe(gui) -> bool:
     return False
 
 
-def update_indicators(candles):
-    atr = calculate_atr(candles, 14)
-    closes = [c["close"] for c in candles if "close" in c]
-    ema = calculate_ema(closes[-20:], 20)
-    rsi = AndacEntryMaster._rsi(closes, 14)
-    return atr, ema, rsi
-
-
 def handle_existing_position(position, candle, app, capital, live_trading,
                              cooldown, risk_manager, last_printed_pnl,
                              last_printed_price, settings, now,
                              signal=None, current_index=None):
     current = candle["close"]
     entry = position["entry"]
+    tick_exit = position.get("tick_exit")
+    if not tick_exit and gui_bridge is not None and gui_bridge.manual_active:
+        _follow_manual_stops(position)
     pnl_live = calculate_futures_pnl(
         entry,
         current,
@@ -134,6 +146,7 @@ def handle_existing_position(position, candle, app, capital, live_trading,
         settings.get("auto_partial_close", False)
         and tp_price is not None
         and not position.get("partial_closed", False)
+        and not tick_exit
     ):
         hit_tp = (
             current >= tp_price
@@ -142,33 +155,31 @@ def handle_existing_position(position, candle, app, capital, live_trading,
         )
         if hit_tp:
             partial_volume = position.get("amount", 0) * 0.5
-            result = close_partial_position(partial_volume) if live_trading else True
-            if result:
-                _, realized = _basic_simulate_trade(
-                    entry,
-                    position["side"],
-                    tp_price,
-                    partial_volume,
-                    position["leverage"],
-                    FEE_MODEL,
-                )
-                old_cap = capital
-                capital += realized
-                check_plausibility(realized, old_cap, capital, partial_volume)
-                position["amount"] -= partial_volume
+            result = (
+                _dispatch("exit", close_partial_position, partial_volume)
+                if live_trading
+                else True
+            )
+            if isinstance(result, OrderTicket):
+                # booked once the fill event arrives; no second attempt meanwhile
                 position["partial_closed"] = True
-                app.log_event(
-                    f"⚡ Auto Partial Close bei TP ausgelöst! ➖ {partial_volume} Kontrakte glattgestellt."
-                )
+                result.meta["partial"] = (position, partial_volume, tp_price)
+                app.log_event(f"⏳ Auto Partial Close bei TP gesendet: {partial_volume} Kontrakte")
+            elif result:
+                capital = _book_partial_close(position, capital, partial_volume, tp_price, app)
             else:
                 app.log_event("⚠️ Fehler beim Partial Close!")
 
-    if hasattr(app, "apc_enabled") and app.apc_enabled.get():
+    if hasattr(app, "apc_enabled") and app.apc_enabled.get() and not tick_exit:
         try:
             apc_rate = float(app.apc_rate.get())
             apc_interval = int(app.apc_interval.get())
             apc_min_profit = float(app.apc_min_profit.get())
-            if pnl_live > apc_min_profit and position["amount"] > 1:
+            if (
+                pnl_live > apc_min_profit
+                and position["amount"] > 1
+                and now >= position.get("apc_next", 0)
+            ):
                 to_close = position["amount"] * (apc_rate / 100)
                 if to_close < 1:
                     to_close = 1
@@ -188,7 +199,7 @@ def handle_existing_position(position, candle, app, capital, live_trading,
 
                 log_msg = (
                     f"⚡️ Teilverkauf {to_close:.2f} | Entry {entry:.2f} -> "
-                    f"Exit {exit_price:.2f} | PnL {realized:.2f}$ | "
+                    f"Exit {current:.2f} | PnL {realized:.2f}$ | "
                     f"Balance {old_cap:.2f}->{capital:.2f} | Rest {position['amount']:.2f}"
                 )
                 app.log_event(log_msg)
@@ -201,7 +212,8 @@ def handle_existing_position(position, candle, app, capital, live_trading,
                     entry_time_global = None
                     app.log_event("✅ Position durch APC komplett geschlossen")
                     return position, capital, last_printed_pnl, last_printed_price, True
-                time.sleep(apc_interval)
+                # next APC step no earlier than apc_interval, without blocking the handler
+                position["apc_next"] = now + apc_interval
         except Exception as e:
             logging.error("Fehler bei Auto Partial Close: %s", e)
 
@@ -226,7 +238,12 @@ def handle_existing_position(position, candle, app, capital, live_trading,
         if hold_duration >= MAX_HOLD_CANDLES:
             timed_exit = True
 
-    if tp_price is None or sl_price is None:
+    if tick_exit:
+        hit_sl = tick_exit["reason"] == "sl"
+        hit_tp = tick_exit["reason"] == "tp"
+        exit_price = tick_exit["price"]
+        timed_exit = False
+    elif tp_price is None or sl_price is None:
         if timed_exit:
             logging.warning(
                 "⚠️ SL/TP fehlen – Timed Exit nach %d Kerzen", MAX_HOLD_CANDLES
@@ -273,6 +290,10 @@ def handle_existing_position(position, candle, app, capital, live_trading,
 
     should_close = hit_tp or hit_sl or timed_exit or opp_exit
 
+    if should_close and not tick_exit and not _claim_exit(position):
+        # a tick crossed SL/TP meanwhile; that exit is booked on the next candle
+        return position, capital, last_printed_pnl, last_printed_price, False
+
     if should_close:
         new_capital = simulate_trade(
             position,
@@ -307,6 +328,8 @@ def handle_existing_position(position, candle, app, capital, live_trading,
             )
         else:
             reason = "Gegensignal"
+        if tick_exit:
+            reason += " (Intrabar)"
 
         if timed_exit:
             stamp = now_time()
@@ -324,8 +347,9 @@ def handle_existing_position(position, candle, app, capital, live_trading,
             )
         logging.info(log_msg)
         app.log_event(log_msg)
-        if live_trading:
-            close_position()
+        if live_trading and not tick_exit:
+            exit_planner.cancel()
+            _dispatch("exit", close_position)
 
         app.update_live_trade_pnl(0.0)
         app.live_pnl = 0.0
@@ -347,7 +371,7 @@ from console_status import (
     print_warning,
     print_info,
 )
-from pnl_utils import calculate_futures_pnl, check_plausibility
+from pnl_utils import calculate_futures_pnl, check_plausibility, simulated_trade_result
 from simulator import FeeModel, simulate_trade as _basic_simulate_trade
 
 # Maximum number of candles to keep a simulated trade open
@@ -356,14 +380,256 @@ FEE_MODEL = FeeModel(taker_fee=0.0004)
 POSITION_SIZE = 1.0
 
 gui_bridge = None
+order_dispatcher: OrderDispatcher | None = None
+intrabar_monitor: IntrabarMonitor | None = None
+intrabar_live = False
+candle_builder: CandleBuilder | None = None
+_tick_source = None
+_tick_listeners: list = []
+exchange_stops = False
+_stop_position = None
+
+def _dispatch(kind, func, *args, **kwargs):
+    """Hand an order call to the dispatcher, or run it inline without one."""
+    if order_dispatcher is None:
+        return func(*args, **kwargs)
+    return order_dispatcher.submit(kind, func, *args, **kwargs)
+
+def _handle_order_events(app) -> list:
+    """Report order results that arrived since the last candle; returns the settled tickets."""
+    if order_dispatcher is None:
+        return []
+    settled = []
+    for ticket in order_dispatcher.drain():
+        # a ticket is queued once per state change, report its final state once
+        if not ticket.done or ticket.meta.get("reported"):
+            continue
+        ticket.meta["reported"] = True
+        if ticket.state == REJECTED:
+            msg = f"❌ Order {ticket.kind} abgelehnt: {ticket.error}"
+            if ticket.kind == "exit":
+                msg += " – Position auf BitMEX prüfen!"
+            logging.error(msg)
+            if hasattr(app, "log_event"):
+                app.log_event(msg)
+            settled.append(ticket)
+        elif ticket.state == FILLED:
+            latency = (ticket.updated - ticket.created) * 1000
+            logging.info("✅ Order %s ausgeführt (%.0fms)", ticket.kind, latency)
+            settled.append(ticket)
+    return settled
+
+def _drop_rejected_entry(position, app) -> None:
+    """Forget a local position whose entry order BitMEX rejected."""
+    global _stop_position
+    _claim_exit(position)
+    if _stop_position is position:
+        _stop_position = None
+    app.position = None
+    if hasattr(app, "current_position"):
+        app.current_position = None
+        if hasattr(app, "update_trade_display"):
+            app.update_trade_display()
+    msg = f"↩️ Entry {position['side'].upper()} abgelehnt – lokale Position verworfen"
+    logging.warning(msg)
+    if hasattr(app, "log_event"):
+        app.log_event(msg)
+
+def _book_partial_close(position, capital, volume, tp_price, app) -> float:
+    """Book a filled auto partial close at the TP price; returns the new capital."""
+    _, realized = _basic_simulate_trade(
+        position["entry"],
+        position["side"],
+        tp_price,
+        volume,
+        position["leverage"],
+        FEE_MODEL,
+    )
+    old_cap = capital
+    capital += realized
+    check_plausibility(realized, old_cap, capital, volume)
+    position["amount"] -= volume
+    position["partial_closed"] = True
+    app.log_event(
+        f"⚡ Auto Partial Close bei TP ausgelöst! ➖ {volume} Kontrakte glattgestellt."
+    )
+    return capital
+
+def _on_exchange_orders(action, rows) -> None:
+    """Advance dispatcher tickets from private-stream order updates."""
+    if order_dispatcher is None:
+        return
+    for row in rows:
+        order = bitmex_interface.state.order(row.get("orderID", ""))
+        if order is not None:
+            order_dispatcher.update_from_exchange(order)
+
+def _send_exit_legs(legs) -> None:
+    """Send due planner legs: one reduce-only order, or one bulk request."""
+    if len(legs) == 1:
+        _dispatch("exit", open_position, legs[0].side, legs[0].quantity, reduce_only=True)
+    else:
+        _dispatch(
+            "exit",
+            open_positions,
+            [(leg.side, leg.quantity) for leg in legs],
+            reduce_only=True,
+        )
+
+exit_planner = ExitPlanner(_send_exit_legs)
+
+def _on_intrabar_exit(watch, reason, price, tick) -> None:
+    """Runs on the tick thread: close at once, book the trade on the next candle."""
+    position = watch.payload
+    position["tick_exit"] = {"reason": reason, "price": price, "time": time.time()}
+    if intrabar_live:
+        exit_planner.cancel()
+        _dispatch("exit", close_position)
+    lag = (time.time() - tick.time) * 1000
+    logging.info(
+        "⚡ %s intrabar ausgelöst @ %.2f (Tick-Alter %.0fms)", reason.upper(), price, lag
+    )
+
+def _watch_position(position) -> None:
+    if intrabar_monitor is None:
+        return
+    if position.get("sl") is None and position.get("tp") is None:
+        return
+    position["intrabar_watch"] = True
+    intrabar_monitor.watch(
+        id(position),
+        BINANCE_SYMBOL,
+        position["side"],
+        position.get("sl"),
+        position.get("tp"),
+        position,
+    )
+
+def _claim_exit(position) -> bool:
+    """True if the candle path may close *position*, False if a tick already did."""
+    if position.get("tick_exit"):
+        return False
+    if intrabar_monitor is None or not position.get("intrabar_watch"):
+        return True
+    return intrabar_monitor.unwatch(id(position))
+
+def update_stops(position, sl=None, tp=None) -> None:
+    """Move SL/TP of the open position in the runner, the tick monitor and on BitMEX."""
+    if sl is not None:
+        position["sl"] = sl
+    if tp is not None:
+        position["tp"] = tp
+    if intrabar_monitor is not None and position.get("intrabar_watch"):
+        intrabar_monitor.update(id(position), sl=sl, tp=tp)
+    if exchange_stops and position is _stop_position:
+        _dispatch("exit", bitmex_interface.amend_protection, sl, tp)
+
+def _follow_manual_stops(position) -> None:
+    """Apply manual SL/TP edited in the GUI while the position is open."""
+    current = (gui_bridge.manual_sl, gui_bridge.manual_tp)
+    if current == position.get("manual_stops"):
+        return
+    position["manual_stops"] = current
+    try:
+        sl, tp = (float(v) for v in current)
+    except (TypeError, ValueError):
+        return
+    entry = position["entry"]
+    valid = sl < entry < tp if position["side"] == "long" else tp < entry < sl
+    if valid and (sl, tp) != (position.get("sl"), position.get("tp")):
+        update_stops(position, sl, tp)
+        logging.info("🎯 Manuelles SL/TP übernommen → SL: %.2f | TP: %.2f", sl, tp)
+
+def _track_exchange_stops(position) -> None:
+    global _stop_position
+    _stop_position = position
+
+def _on_exchange_exit(reason, price) -> None:
+    """A resting SL/TP filled on BitMEX; the trade is booked on the next candle."""
+    position = _stop_position
+    if position is None or position.get("tick_exit"):
+        return
+    if intrabar_monitor is not None and position.get("intrabar_watch"):
+        intrabar_monitor.unwatch(id(position))
+    position["tick_exit"] = {
+        "reason": reason, "price": float(price), "time": time.time(), "source": "exchange",
+    }
+    logging.info("🛡️ %s auf BitMEX ausgelöst @ %.2f", reason.upper(), float(price))
+
+def _enable_exchange_stops(app) -> None:
+    """Rest SL/TP on BitMEX for new entries and pick up orders from a previous run."""
+    global exchange_stops
+    exchange_stops = True
+    bitmex_interface.protection.on_exit = _on_exchange_exit
+    status = bitmex_interface.reconcile_protection()
+    if status == "unprotected":
+        msg = "⚠️ Offene BitMEX-Position ohne Stop-Loss – bitte prüfen!"
+    elif status == "adopted":
+        msg = "🛡️ SL/TP-Orders aus vorherigem Lauf übernommen"
+    elif status == "flat":
+        msg = "🛡️ Verwaiste SL/TP-Orders storniert"
+    else:
+        return
+    logging.info(msg)
+    if hasattr(app, "log_event"):
+        app.log_event(msg)
+
+def _on_tick(tick) -> None:
+    for listener in _tick_listeners:
+        listener(tick)
+
+def _start_tick_source(settings) -> None:
+    """One aggTrade/bookTicker stream (or recorded tick file) for all tick listeners."""
+    global _tick_source
+    if _tick_source is not None:
+        return
+    replay_path = settings.get("tick_replay_path")
+    if replay_path:
+        _tick_source = TickReplay(
+            replay_path,
+            _on_tick,
+            speed=settings.get("tick_replay_speed", 1.0),
+            symbol=BINANCE_SYMBOL,
+        )
+    else:
+        _tick_source = BinanceTickWebSocket(BINANCE_SYMBOL, _on_tick)
+    _tick_source.start()
+
+def _start_intrabar_monitor(settings, live: bool) -> None:
+    """Watch SL/TP on aggTrade/bookTicker ticks, or on a recorded tick file."""
+    global intrabar_monitor, intrabar_live
+    intrabar_live = live
+    if intrabar_monitor is None:
+        intrabar_monitor = IntrabarMonitor(_on_intrabar_exit)
+    if intrabar_monitor.on_tick not in _tick_listeners:
+        _tick_listeners.append(intrabar_monitor.on_tick)
+    _start_tick_source(settings)
+
+def _start_candle_builder(settings, interval: str) -> None:
+    """Close candles from the trade stream instead of waiting for the kline close."""
+    global candle_builder
+    if candle_builder is None:
+        candle_builder = CandleBuilder(
+            BINANCE_SYMBOL,
+            data_provider._interval_to_seconds(interval),
+            data_provider.update_candle_feed,
+            close_delay=settings.get("candle_builder_delay", 0.05),
+            on_mismatch=data_provider.correct_candle,
+        )
+        _tick_listeners.append(candle_builder.on_tick)
+    data_provider.set_candle_builder(candle_builder)
+    candle_builder.start()
+    _start_tick_source(settings)
+
+def _split_quantity(amount: float, legs: int) -> list[float]:
+    legs = max(1, int(legs))
+    part = round(amount / legs, 8)
+    return [part] * (legs - 1) + [round(amount - part * (legs - 1), 8)]
 
 def live_partial_close(side: str, qty: float) -> None:
     reduce_side = "SELL" if side == "long" else "BUY"
-    res = open_position(reduce_side, qty, reduce_only=True)
-    if res is not None:
-        print(f"⚡️ LIVE-Teilschließung: {qty} {reduce_side} via Reduce Only Market")
-    else:
-        print("❌ Fehler beim Live-Teilverkauf")
+    exit_planner.schedule(reduce_side, qty, tag="apc")
+    logging.info("⚡️ LIVE-Teilschließung geplant: %s %s via Reduce Only Market", qty, reduce_side)
 
 def set_gui_bridge(gui_instance):
     global gui_bridge
@@ -371,6 +637,7 @@ def set_gui_bridge(gui_instance):
 
 def cancel_trade(position, app):
     print(f"❌ Abbruch der Position: {position['side']} @ {position['entry']:.2f}")
+    _claim_exit(position)
     app.position = None
     if hasattr(app, "current_position"):
         app.current_position = None
@@ -437,7 +704,8 @@ def wait_for_initial_candles(
         time.sleep(1)
 
 def _run_bot_live_inner(settings=None, app=None):
-    global entry_time_global, position_global, ema_trend_global, atr_value_global
+    global entry_time_global, position_global, ema_trend_global, atr_value_global, \
+        order_dispatcher
 
     capital = SETTINGS.get("starting_capital", 1000)
     start_capital = capital
@@ -475,6 +743,23 @@ def _run_bot_live_inner(settings=None, app=None):
     paper_mode = settings.get("paper_mode", True)
     live_trading = live_requested and not paper_mode
     settings["paper_mode"] = not live_trading
+    if live_trading:
+        bitmex_interface.warm_up()
+        order_dispatcher = OrderDispatcher(bitmex_interface.scheduler)
+        if settings.get("bitmex_private_ws", SETTINGS.get("bitmex_private_ws", True)):
+            bitmex_interface.state.subscribe("order", _on_exchange_orders)
+            bitmex_interface.start_private_stream()
+        if settings.get("exchange_sl_tp", SETTINGS.get("exchange_sl_tp", False)):
+            _enable_exchange_stops(app)
+    if settings.get("intrabar_exits", SETTINGS.get("intrabar_exits", False)):
+        _start_intrabar_monitor(settings, live_trading)
+    latency_metrics.CANDLE_TRACING = settings.get("candle_tracing", True)
+    latency_metrics.start_periodic_dump(
+        settings.get("latency_dump_path", "latency_metrics.json"),
+        settings.get("latency_dump_interval", 60),
+        settings.get("latency_prom_path"),
+    )
+    interval_sec = data_provider._interval_to_seconds(interval_setting)
 
     cooldown = CooldownManager(settings.get("cooldown", 3))
     # REMOVED: SessionFilter
@@ -493,8 +778,16 @@ def _run_bot_live_inner(settings=None, app=None):
         "opt_volumen_strong": app.andac_opt_volumen_strong.get(),
     }
     adaptive_sl = AdaptiveSLManager()
+    indicator_engine = IndicatorEngine(lookback=config["lookback"])
+    early_signals = None
+    if settings.get("early_signals", SETTINGS.get("early_signals", False)):
+        early_signals = EarlySignalMonitor(config)
+    set_kline_update_sink(early_signals.on_kline if early_signals else None)
 
     candles = []
+    runtime: AsyncRuntime | None = None
+    candle_index = -1
+    primed_ts = None
     position = None
     position_entry_index = None
     entry_price = None
@@ -519,7 +812,26 @@ def _run_bot_live_inner(settings=None, app=None):
         nonlocal candles, position, capital, last_printed_pnl, last_printed_price, \
                  last_signal, last_signal_time, no_signal_printed, first_feed, \
                  previous_signal, position_entry_index, entry_price, \
-                 position_open, current_position_direction
+                 position_open, current_position_direction, candle_index
+        if primed_ts is not None and candle["timestamp"] <= primed_ts:
+            return
+        for ticket in _handle_order_events(app):
+            if position is None:
+                break
+            partial = ticket.meta.get("partial")
+            if ticket.kind == "entry" and ticket.state == REJECTED and ticket.meta.get("position") is position:
+                capital += ticket.meta.get("fee", 0.0)
+                _drop_rejected_entry(position, app)
+                position = None
+                position_open = False
+                position_global = None
+                entry_time_global = None
+                app.update_capital(capital)
+            elif partial and partial[0] is position:
+                if ticket.state == FILLED:
+                    capital = _book_partial_close(position, capital, partial[1], partial[2], app)
+                else:
+                    position["partial_closed"] = False
         if not first_feed:
             first_feed = True
             if hasattr(app, "log_event"):
@@ -527,8 +839,12 @@ def _run_bot_live_inner(settings=None, app=None):
         candles.append(candle)
         if len(candles) > 100:
             candles.pop(0)
+        candle_index += 1
 
-        atr_value, ema, rsi_val = update_indicators(candles)
+        values = indicator_engine.update(candle)
+        latency_metrics.stamp_candle(candle, "indicators")
+        atr_value = values["atr"]
+        ema = values["ema"]
         atr_value_global = atr_value
         settings["ema_value"] = ema
 
@@ -551,33 +867,27 @@ def _run_bot_live_inner(settings=None, app=None):
             except Exception as e:
                 logging.error("Auto recommendation failed: %s", e)
 
-        lookback = config.get("lookback", 20)
-        recent = candles[-(lookback + 1):]
-        highs = [c["high"] for c in recent[:-1]]
-        lows = [c["low"] for c in recent[:-1]]
-        vols = [c.get("volume", 0.0) for c in recent[:-1]]
-        avg_volume = sum(vols) / len(vols) if vols else candle.get("volume", 0.0)
-        high_lb = max(highs) if highs else candle["high"]
-        low_lb = min(lows) if lows else candle["low"]
-        prev_close = recent[-2]["close"] if len(recent) > 1 else None
-        prev_open = recent[-2]["open"] if len(recent) > 1 else None
-
         indicator = {
-            "rsi": rsi_val,
+            "rsi": values["rsi"],
             "atr": atr_value,
-            "avg_volume": avg_volume,
-            "high_lookback": high_lb,
-            "low_lookback": low_lb,
-            "prev_close": prev_close,
-            "prev_open": prev_open,
+            "avg_volume": values["avg_volume"],
+            "high_lookback": values["high_lookback"],
+            "low_lookback": values["low_lookback"],
+            "prev_close": values["prev_close"],
+            "prev_open": values["prev_open"],
             "mtf_ok": True,
             "prev_bull_signal": previous_signal == "long",
             "prev_baer_signal": previous_signal == "short",
         }
 
         andac_signal: AndacSignal = should_enter(candle, indicator, config)
+        signal_ts = time.time()
+        latency_metrics.stamp_candle(candle, "signal")
         entry_type = andac_signal.signal
         previous_signal = entry_type
+        if early_signals is not None:
+            early_signals.on_close(candle["timestamp"], entry_type, signal_ts)
+            early_signals.arm(candle["timestamp"] + interval_sec, indicator_engine, previous_signal)
         stamp = datetime.now().strftime("%H:%M:%S")
         if entry_type:
             triangle_msg = log_triangle_signal(entry_type, close_price)
@@ -596,14 +906,14 @@ def _run_bot_live_inner(settings=None, app=None):
 
         # Timed Exit Logic for simulation mode
         if not live_trading and position_open:
-            hold_duration = len(candles) - 1 - position_entry_index
-            if hold_duration >= MAX_HOLD_CANDLES:
+            hold_duration = candle_index - position_entry_index
+            if hold_duration >= MAX_HOLD_CANDLES and _claim_exit(position):
                 exit_price = candle["close"]
                 direction = current_position_direction
                 new_capital = simulate_trade(
                     position,
                     exit_price,
-                    len(candles) - 1,
+                    candle_index,
                     settings,
                     capital,
                 )
@@ -644,7 +954,7 @@ def _run_bot_live_inner(settings=None, app=None):
                 settings,
                 now,
                 entry_type,
-                len(candles) - 1,
+                candle_index,
             )
             position, capital, last_printed_pnl, last_printed_price, closed = position_data
             if closed:
@@ -704,12 +1014,13 @@ def _run_bot_live_inner(settings=None, app=None):
                             tp = round(entry * 0.99, 2)
                     if sl is None or tp is None:
                         return
+                latency_metrics.stamp_candle(candle, "sl_tp")
 
                 position = {
                     "side": entry_type,
                     "entry": entry_exec,
                     "entry_time": now,
-                    "entry_index": len(candles) - 1,
+                    "entry_index": candle_index,
                     "sl": sl,
                     "tp": tp,
                     "amount": amount,
@@ -731,7 +1042,7 @@ def _run_bot_live_inner(settings=None, app=None):
                     "entry_time": datetime.now(),
                     "bars_open": 0,
                 }
-                position_entry_index = len(candles) - 1
+                position_entry_index = candle_index
                 entry_price = candle["close"]
                 # === Manuelles SL/TP aus GUI anwenden, falls aktiv
                 if settings.get("sl_tp_manual_active", False):
@@ -752,6 +1063,9 @@ def _run_bot_live_inner(settings=None, app=None):
                     app.log_event(
                         f"🎯 Manuelles TP/SL gesetzt → TP: {position.get('tp', '–')} | SL: {position.get('sl', '–')}"
                     )
+                if gui_bridge.manual_active:
+                    position["manual_stops"] = (gui_bridge.manual_sl, gui_bridge.manual_tp)
+                _watch_position(position)
                 position_open = True
                 current_position_direction = entry_type.upper()
                 last_signal = entry_type
@@ -763,13 +1077,30 @@ def _run_bot_live_inner(settings=None, app=None):
                     app.log_event(msg)
                 if hasattr(app, "update_trade_display"):
                     app.update_trade_display()
+                latency_metrics.stamp_candle(candle, "gui")
 
                 if amount > 0 and live_trading:
                     try:
                         direction = "BUY" if entry_type == "long" else "SELL"
-                        res = open_position(direction, amount)
-                        if res is None:
-                            raise RuntimeError("Order placement failed")
+                        with latency_metrics.signal_trace(
+                            "entry", candle["timestamp"] + interval_sec, signal_ts
+                        ):
+                            entry_legs = int(settings.get("entry_legs", 1))
+                            stops = {}
+                            if exchange_stops:
+                                stops = {"sl": position.get("sl"), "tp": position.get("tp")}
+                                _track_exchange_stops(position)
+                            if entry_legs > 1:
+                                ticket = _dispatch(
+                                    "entry",
+                                    open_positions,
+                                    [(direction, qty) for qty in _split_quantity(amount, entry_legs)],
+                                    **stops,
+                                )
+                            else:
+                                ticket = _dispatch("entry", open_position, direction, amount, **stops)
+                            # a rejection drops the local position when the event arrives
+                            ticket.meta.update(position=position, fee=max(entry_fee, 0.0))
                     except Exception as e:
                         logging.error("Orderplatzierung fehlgeschlagen: %s", e)
             else:
@@ -777,24 +1108,46 @@ def _run_bot_live_inner(settings=None, app=None):
                     logging.info("➖ Ich warte auf ein Indikator Signal")
                     no_signal_printed = True
 
-    candle_queue = get_candle_queue()
-    worker = SignalWorker(process_candle, queue_obj=candle_queue)
-    worker.start()
+    native_ws = False
+    if settings.get("async_runtime", SETTINGS.get("async_runtime", False)):
+        runtime = AsyncRuntime(process_candle)
+        native_ws = async_runtime.websockets is not None
+        set_candle_sink(runtime.feed)
 
     if not data_provider._CANDLE_WS_STARTED:
-        start_candle_websocket(interval_setting)
+        start_candle_websocket(
+            interval_setting, stream=not native_ws, monitor=runtime is None
+        )
     else:
         logging.info("Candle WebSocket already running")
+    if settings.get("candle_builder", SETTINGS.get("candle_builder", False)):
+        _start_candle_builder(settings, interval_setting)
+
+    history = get_live_candles(max(100, config["lookback"] + 1))
+    for past in history:
+        indicator_engine.update(past)
+        candle_index += 1
+    candles = history[-100:]
+    if history:
+        primed_ts = history[-1]["timestamp"]
+        logging.info("📦 Indikatoren mit %s Candles vorgewärmt", len(history))
+
+    if runtime:
+        _run_async(
+            runtime,
+            native_ws,
+            interval_setting,
+            lambda: capital,
+            app,
+            risk_manager,
+        )
+        reason = "Kapital aufgebraucht" if capital <= 0 else "Loop beendet"
+        print_stop_banner(reason)
+        return
 
-    preload = candle_queue.qsize()
-    if preload:
-        flush_limit = min(preload, 2)
-        logging.info("\U0001F504 Clean Flush %s Candles", flush_limit)
-        for _ in range(flush_limit):
-            try:
-                process_candle(candle_queue.get_nowait())
-            except queue.Empty:
-                break
+    candle_queue = get_candle_queue()
+    worker = SignalWorker(process_candle, queue_obj=candle_queue)
+    worker.start()
 
     logging.info(
         "Candle-Worker gestartet (%s Candles im Buffer)", worker.queue.qsize()
@@ -837,9 +1190,63 @@ def _run_bot_live_inner(settings=None, app=None):
             candle_warning_printed = False
         time.sleep(0.1)
 
+    if hasattr(candle_queue, "stats"):
+        logging.info("📊 Candle-Handoff: %s", candle_queue.stats())
     reason = "Kapital aufgebraucht" if capital <= 0 else "Loop beendet"
     print_stop_banner(reason)
 
+def _run_async(runtime, native_ws, interval, get_capital, app, risk_manager):
+    """Drive feed, signals and health checks from one asyncio event loop."""
+    lag_warned = False
+
+    def supervise() -> None:
+        nonlocal lag_warned
+        if get_capital() <= 0 or getattr(app, "force_exit", False):
+            runtime.stop()
+            return
+        if not getattr(app, "running", False):
+            return
+        if not getattr(app, "feed_ok", True):
+            print(
+                f"🧪 Letzter Feed-Eingang vor {time.time() - global_state.last_feed_time:.1f} Sekunden"
+            )
+            return
+        risk_manager.update_capital(get_capital())
+        if risk_manager.check_loss_limit() or risk_manager.check_drawdown_limit():
+            return
+        backlog = runtime.backlog
+        if backlog > 5:
+            if not lag_warned:
+                logging.warning("⚠️ Candle-Backlog > %s – mögliche Latenz!", backlog)
+                StatusDispatcher.dispatch("feed", False, "Candle-Lag")
+                lag_warned = True
+        else:
+            lag_warned = False
+
+    async def feed_health() -> None:
+        # a restart downloads history via REST; the loop has its own monitor
+        await asyncio.to_thread(check_feed_health, restart=not native_ws, monitor=False)
+
+    runtime.add_periodic(supervise, 0.5)
+    runtime.add_periodic(feed_health, data_provider._FEED_CHECK_INTERVAL)
+    if native_ws:
+        runtime.add_reader(
+            kline_reader(
+                kline_stream_url(BINANCE_SYMBOL, interval),
+                update_candle_feed,
+                backfill_gap,
+                on_update=data_provider._KLINE_UPDATE_SINK,
+            )
+        )
+    if app and hasattr(app, "update_status"):
+        app.update_status("✅ Bereit")
+    else:
+        gui_bridge.update_status("✅ Bereit")
+    try:
+        runtime.run()
+    finally:
+        set_candle_sink(None)
+
 def run_bot_live(settings=None, app=None):
     """Wrapper for _run_bot_live_inner with error handling."""
     try:
@@ -876,14 +1283,10 @@ def simulate_trade(position: dict, exit_price: float, candle_index: int,
         logging.warning(
             "⚠️ Kontraktgröße reduziert: %.2f -> %.2f", qty, max_qty
         )
-        qty = max_qty
 
-    pnl = (exit_price - entry) if side == "long" else (entry - exit_price)
-    pnl_value = pnl * qty * leverage
-
-    fees = (entry + exit_price) * qty * fee_rate
-    net_result = pnl_value - fees
-    net_result = max(-capital, net_result)
+    net_result = simulated_trade_result(
+        entry, exit_price, qty, side, leverage, capital, fee_rate
+    )
 
     base = capital
     if base <= 0:
@@ -0,0 +1,44 @@
+# rolling_extrema.py
+"""Rolling lookback high/low via monotonic deques keyed by candle index."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class RollingExtrema:
+    """Track the highest high and lowest low of the last *length* candles.
+
+    Each push and query is amortized O(1), independent of *length*.
+    """
+
+    def __init__(self, length: int) -> None:
+        self.length = max(1, int(length))
+        self.last_index: Optional[int] = None
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+
+    def push(self, index: int, high: float, low: float) -> None:
+        if self.last_index is not None and index <= self.last_index:
+            raise ValueError(f"Candle-Index {index} nicht aufsteigend")
+        self.last_index = index
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((index, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((index, low))
+        oldest = index - self.length
+        while self._max[0][0] <= oldest:
+            self._max.popleft()
+        while self._min[0][0] <= oldest:
+            self._min.popleft()
+
+    @property
+    def high_lookback(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def low_lookback(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
@@ -6,6 +6,8 @@ import queue
 import logging
 import time
 from typing import Callable, Any
+import latency_metrics
+from spsc_ring import SpscRing
 from status_events import StatusDispatcher
 
 
@@ -15,11 +17,13 @@ class SignalWorker:
     def __init__(
         self,
         handler: Callable[[dict], Any],
-        queue_obj: queue.Queue | None = None,
+        queue_obj: SpscRing | queue.Queue | None = None,
         maxsize: int = 100,
     ) -> None:
         self.handler = handler
-        self.queue: queue.Queue[dict] = queue_obj or queue.Queue(maxsize=maxsize)
+        self.queue: SpscRing[dict] | queue.Queue[dict] = (
+            queue_obj if queue_obj is not None else SpscRing(maxsize=maxsize)
+        )
         self._running = False
         self.thread: threading.Thread | None = None
         self.logger = logging.getLogger(__name__)
@@ -57,11 +61,13 @@ class SignalWorker:
                 candle = self.queue.get(timeout=1)
             except queue.Empty:
                 continue
+            latency_metrics.stamp_candle(candle, "dequeued")
             start = time.perf_counter()
             try:
                 self.handler(candle)
             except Exception as exc:
                 self.logger.error("SignalWorker Fehler: %s", exc)
+            latency_metrics.finish_candle(candle)
             duration = (time.perf_counter() - start) * 1000
             self.logger.debug("Candle verarbeitet in %.0fms", duration)
             backlog = self.queue.qsize()
@@ -0,0 +1,130 @@
+# spsc_ring.py
+"""Single-producer/single-consumer ring buffer for the feed → signal worker handoff."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SpscRing(Generic[T]):
+    """Bounded FIFO for exactly one producer thread and one consumer thread.
+
+    The producer only writes ``_tail`` and the consumer only writes
+    ``_head``; each index is a plain int assignment, which CPython performs
+    atomically, so neither :meth:`put` nor :meth:`get` takes a lock. An
+    :class:`threading.Event` is set only while the other side is actually
+    waiting, so an uncontended handoff costs no lock either. The method
+    names follow :class:`queue.Queue` (``put``/``get``/``qsize`` …) so the
+    ring can replace one in place.
+
+    Counters (:meth:`stats`) track throughput, drops, the deepest backlog
+    seen and how long items sat in the ring.
+    """
+
+    def __init__(self, maxsize: int = 100) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize muss > 0 sein")
+        self.maxsize = maxsize
+        self._items: List[Optional[T]] = [None] * maxsize
+        self._stamps: List[float] = [0.0] * maxsize
+        self._head = 0
+        self._tail = 0
+        self._data = threading.Event()
+        self._space = threading.Event()
+        self._consumer_waiting = False
+        self._producer_waiting = False
+        self.puts = 0
+        self.gets = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+
+    # -- depth ---------------------------------------------------------------
+    def qsize(self) -> int:
+        return self._tail - self._head
+
+    depth = property(qsize)
+
+    def empty(self) -> bool:
+        return self._tail == self._head
+
+    def full(self) -> bool:
+        return self._tail - self._head >= self.maxsize
+
+    # -- producer ------------------------------------------------------------
+    def put(self, item: T, block: bool = True, timeout: Optional[float] = None) -> None:
+        if self.full() and not (block and self._wait(self._space, "_producer_waiting", self.full, timeout)):
+            self.dropped += 1
+            raise queue.Full
+        tail = self._tail
+        slot = tail % self.maxsize
+        self._items[slot] = item
+        self._stamps[slot] = time.perf_counter()
+        self._tail = tail + 1
+        self.puts += 1
+        depth = tail + 1 - self._head
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self._consumer_waiting:
+            self._data.set()
+
+    def put_nowait(self, item: T) -> None:
+        self.put(item, block=False)
+
+    # -- consumer ------------------------------------------------------------
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> T:
+        if self.empty() and not (block and self._wait(self._data, "_consumer_waiting", self.empty, timeout)):
+            raise queue.Empty
+        head = self._head
+        slot = head % self.maxsize
+        item = self._items[slot]
+        self._items[slot] = None
+        wait = time.perf_counter() - self._stamps[slot]
+        self._head = head + 1
+        self.gets += 1
+        self.last_wait = wait
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        if self._producer_waiting:
+            self._space.set()
+        return item  # type: ignore[return-value]
+
+    def get_nowait(self) -> T:
+        return self.get(block=False)
+
+    # -- waiting -------------------------------------------------------------
+    def _wait(self, event: threading.Event, flag: str, blocked, timeout: Optional[float]) -> bool:
+        """Sleep until *blocked()* turns false; the flag is raised before re-checking."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                event.clear()
+                setattr(self, flag, True)
+                if not blocked():
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                event.wait(remaining)
+        finally:
+            setattr(self, flag, False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.qsize(),
+            "max_depth": self.max_depth,
+            "puts": self.puts,
+            "gets": self.gets,
+            "dropped": self.dropped,
+            "last_wait_ms": round(self.last_wait * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "mean_wait_ms": round(self.total_wait / self.gets * 1000, 3) if self.gets else 0.0,
+        }
@@ -0,0 +1,546 @@
+# strategy_runtime.py
+"""Per-(symbol, interval) strategy state and a scheduler that shards many of them."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import latency_metrics
+from adaptive_sl_manager import AdaptiveSLManager
+from backtester import DEFAULT_CONFIG
+from config import BINANCE_INTERVAL
+from cooldown_manager import CooldownManager
+from entry_logic import should_enter
+from indicator_engine import IndicatorEngine
+from pnl_utils import simulated_trade_result
+from risk_manager import RiskManager
+from spsc_ring import SpscRing
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+Event = Dict[str, Any]
+
+# Strategies one worker process drives before the scheduler adds another;
+# every stream closes its candle at the same second, so this bounds the burst.
+PAIRS_PER_PROCESS = 200
+_HISTORY = 100
+
+
+def _seconds(timestamp: float) -> float:
+    """Candle timestamps come in ms from Binance and in s from some files."""
+    return timestamp / 1000 if timestamp > 1e11 else timestamp
+
+
+class StrategyRuntime:
+    """Candles, indicators, position and risk of one (symbol, interval).
+
+    This is the state that ``process_candle`` in the GUI runner keeps in
+    closure variables and ``global_state``, held per instance so any number
+    of strategies can share a process. It follows the paper-trading state
+    machine of :func:`backtester.run_backtest` bar for bar: entries fill at
+    the signal candle's close, SL is checked before TP before an opposite
+    signal, and a position still open after ``max_hold_candles`` leaves at
+    the close unless SL or TP is hit on that bar. Unlike the backtest, the SL cooldown runs on candle time
+    through :class:`CooldownManager` and the risk limits of
+    :class:`RiskManager` apply.
+
+    :meth:`on_candle` returns ``entry``/``exit`` events; placing orders for
+    them is up to the caller.
+    """
+
+    def __init__(self, symbol: str, interval: str, config: Optional[Dict[str, Any]] = None) -> None:
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        cfg = self.config
+        self.engine = IndicatorEngine(lookback=int(cfg["lookback"]))
+        self.adaptive_sl = AdaptiveSLManager()
+        self.cooldown = CooldownManager(cfg["cooldown"])
+        self.candles: Deque[Dict[str, Any]] = deque(maxlen=_HISTORY)
+        self.capital = float(cfg["capital"])
+        self.leverage = float(cfg["leverage"])
+        self.fee_rate = float(cfg["fee_percent"]) / 100
+        self.max_hold = int(cfg["max_hold_candles"])
+        self.running = True
+        self.risk = RiskManager(self, self.capital)
+        self.risk.configure(**{k: cfg[k] for k in ("max_loss", "max_drawdown", "max_trades") if k in cfg})
+        self.position: Optional[Dict[str, Any]] = None
+        self.previous_signal: Optional[str] = None
+        self.index = -1
+        self.last_ts: Optional[int] = None
+        self.trades: List[Event] = []
+
+    @property
+    def key(self) -> Key:
+        return self.symbol, self.interval
+
+    def log_event(self, msg: str) -> None:
+        logger.info("%s %s: %s", self.symbol, self.interval, msg)
+
+    def warm_up(self, candles: Iterable[Dict[str, Any]]) -> int:
+        """Prime indicators with history without evaluating signals."""
+        count = 0
+        for candle in candles:
+            if self.last_ts is not None and candle["timestamp"] <= self.last_ts:
+                continue
+            self.engine.update(candle)
+            self.candles.append(candle)
+            self.index += 1
+            self.last_ts = candle["timestamp"]
+            count += 1
+        return count
+
+    def on_candle(self, candle: Dict[str, Any]) -> List[Event]:
+        if self.last_ts is not None and candle["timestamp"] <= self.last_ts:
+            return []
+        self.last_ts = candle["timestamp"]
+        self.candles.append(candle)
+        self.index += 1
+
+        values = self.engine.update(candle)
+        latency_metrics.stamp_candle(candle, "indicators")
+        if values["prev_close"] is None:
+            return []  # the first candle has no range to break out of
+        indicator = {
+            "rsi": values["rsi"],
+            "atr": values["atr"],
+            "avg_volume": values["avg_volume"],
+            "high_lookback": values["high_lookback"],
+            "low_lookback": values["low_lookback"],
+            "prev_close": values["prev_close"],
+            "prev_open": values["prev_open"],
+            "mtf_ok": True,
+            "prev_bull_signal": self.previous_signal == "long",
+            "prev_baer_signal": self.previous_signal == "short",
+        }
+        signal = should_enter(candle, indicator, self.config).signal
+        self.previous_signal = signal
+        latency_metrics.stamp_candle(candle, "signal")
+
+        if self.position is not None:
+            return self._manage_position(candle, signal)
+        if signal and self._may_enter(candle):
+            return [self._open(candle, signal)]
+        return []
+
+    # -- position ------------------------------------------------------------
+    def _may_enter(self, candle: Dict[str, Any]) -> bool:
+        if not self.running or self.capital <= 0:
+            return False
+        if self.cooldown.in_cooldown(_seconds(candle["timestamp"])):
+            return False
+        self.risk.update_capital(self.capital)
+        return not (
+            self.risk.check_loss_limit()
+            or self.risk.check_drawdown_limit()
+            or self.risk.check_trade_limit()
+        )
+
+    def _sl_tp(self, side: str, entry: float) -> Tuple[Optional[float], Optional[float]]:
+        if not self.config["use_adaptive_sl"]:
+            return None, None
+        try:
+            sl, tp = self.adaptive_sl.get_adaptive_sl_tp(
+                side,
+                entry,
+                list(self.candles),
+                tp_multiplier=self.config["take_profit_atr_multiplier"],
+            )
+            valid = sl < entry < tp if side == "long" else tp < entry < sl
+            if not valid:
+                raise ValueError("Ungültige SL/TP-Relation")
+        except ValueError:
+            if side == "long":
+                sl, tp = round(entry * 0.995, 2), round(entry * 1.01, 2)
+            else:
+                sl, tp = round(entry * 1.005, 2), round(entry * 0.99, 2)
+        return sl, tp
+
+    def _open(self, candle: Dict[str, Any], side: str) -> Event:
+        entry = float(candle["close"])
+        amount = self.capital * self.config["position_size"]
+        sl, tp = self._sl_tp(side, entry)
+        latency_metrics.stamp_candle(candle, "sl_tp")
+        self.capital -= amount * self.leverage * self.config["taker_fee"]
+        self.position = {
+            "side": side,
+            "entry": entry,
+            "entry_index": self.index,
+            "entry_time": candle["timestamp"],
+            "sl": sl,
+            "tp": tp,
+            "amount": amount,
+            "leverage": self.leverage,
+        }
+        self.risk.increment_trades()
+        return self._event("entry", candle, side=side, price=entry, amount=amount, sl=sl, tp=tp)
+
+    def _manage_position(self, candle: Dict[str, Any], signal: Optional[str]) -> List[Event]:
+        pos = self.position
+        side = pos["side"]
+        sl, tp = pos["sl"], pos["tp"]
+        held = self.index - pos["entry_index"]
+        reason = None
+        exit_price = float(candle["close"])
+        high, low = candle["high"], candle["low"]
+        if sl is not None and (low <= sl if side == "long" else high >= sl):
+            reason, exit_price = "sl", sl
+        elif tp is not None and (high >= tp if side == "long" else low <= tp):
+            reason, exit_price = "tp", tp
+        elif held >= self.max_hold:
+            reason = "timed"
+        elif signal and signal != side:
+            reason = "signal"
+        if reason is None:
+            return []
+        return [self._close(candle, exit_price, reason)]
+
+    def _close(self, candle: Dict[str, Any], exit_price: float, reason: str) -> Event:
+        pos = self.position
+        pnl = simulated_trade_result(
+            pos["entry"], exit_price, pos["amount"], pos["side"], self.leverage, self.capital, self.fee_rate
+        )
+        self.capital += pnl
+        self.risk.update_loss(pnl)
+        self.risk.update_capital(self.capital)
+        if reason == "sl":
+            self.cooldown.register_sl(_seconds(candle["timestamp"]))
+        self.position = None
+        trade = {
+            "entry_index": pos["entry_index"],
+            "exit_index": self.index,
+            "entry_time": pos["entry_time"],
+            "exit_time": candle["timestamp"],
+            "side": pos["side"],
+            "entry": pos["entry"],
+            "exit": exit_price,
+            "sl": pos["sl"],
+            "tp": pos["tp"],
+            "reason": reason,
+            "pnl": pnl,
+            "capital": self.capital,
+        }
+        self.trades.append(trade)
+        return self._event("exit", candle, side=pos["side"], price=exit_price,
+                           amount=pos["amount"], reason=reason, pnl=pnl)
+
+    def _event(self, kind: str, candle: Dict[str, Any], **fields: Any) -> Event:
+        return {
+            "type": kind,
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "timestamp": candle["timestamp"],
+            "capital": self.capital,
+            **fields,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "capital": self.capital,
+            "position": dict(self.position) if self.position else None,
+            "trades": len(self.trades),
+            "running": self.running,
+            "last_ts": self.last_ts,
+        }
+
+
+def shard_count(pairs: int, per_process: int = PAIRS_PER_PROCESS) -> int:
+    """Worker processes for *pairs* strategies; 0 keeps them in this process."""
+    if pairs <= per_process:
+        return 0
+    return min(os.cpu_count() or 1, math.ceil(pairs / per_process))
+
+
+def shard_of(key: Key, shards: int) -> int:
+    """Stable shard index, identical across processes and restarts."""
+    return zlib.crc32(f"{key[0]}:{key[1]}".encode()) % shards if shards > 1 else 0
+
+
+def _drive(runtimes: Dict[Key, StrategyRuntime], key: Key, candle: Dict[str, Any]) -> List[Event]:
+    runtime = runtimes.get(key)
+    if runtime is None:
+        return []
+    try:
+        return runtime.on_candle(candle)
+    except Exception as exc:
+        logger.error("Strategie %s %s fehlgeschlagen: %s", key[0], key[1], exc)
+        return []
+
+
+class _ThreadShard:
+    """Runtimes driven by one thread of this process, fed through a ring."""
+
+    def __init__(self, runtimes: Dict[Key, StrategyRuntime], on_event: Callable[[Event], None]) -> None:
+        self.runtimes = runtimes
+        self.on_event = on_event
+        # the stream thread is the only producer
+        self.ring: SpscRing[Any] = SpscRing(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, name: str) -> None:
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any) -> None:
+        self.ring.put(item, timeout=5)
+
+    def warm_up(self, key: Key, candles: List[Dict[str, Any]]) -> None:
+        self.put(("warmup", key, candles))
+
+    def _run(self) -> None:
+        while True:
+            item = self.ring.get()
+            if item is None:
+                return
+            op, key, payload = item
+            if op == "warmup":
+                self.runtimes[key].warm_up(payload)
+                continue
+            latency_metrics.stamp_candle(payload, "dequeued")
+            for event in _drive(self.runtimes, key, payload):
+                self.on_event(event)
+            latency_metrics.finish_candle(payload)
+
+    def states(self, timeout: float) -> List[Dict[str, Any]]:
+        return [rt.state() for rt in self.runtimes.values()]
+
+    def stop(self, timeout: float) -> None:
+        if self._thread is not None:
+            self.put(None)
+            self._thread.join(timeout)
+
+
+def _shard_main(specs: List[Tuple[str, str, Dict[str, Any]]], inbox, outbox) -> None:
+    runtimes = {}
+    for symbol, interval, config in specs:
+        runtime = StrategyRuntime(symbol, interval, config)
+        runtimes[runtime.key] = runtime
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+        op, key, payload = msg
+        if op == "candle":
+            for event in _drive(runtimes, key, payload):
+                outbox.put(("event", event))
+        elif op == "warmup":
+            runtimes[key].warm_up(payload)
+        elif op == "state":
+            outbox.put(("state", [rt.state() for rt in runtimes.values()]))
+    outbox.put(("state", [rt.state() for rt in runtimes.values()]))
+    outbox.put(None)
+
+
+class _ProcessShard:
+    """Runtimes living in a worker process; events come back over a queue."""
+
+    def __init__(self, specs, on_event: Callable[[Event], None]) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self.inbox = ctx.Queue()
+        self.outbox = ctx.Queue()
+        self.on_event = on_event
+        self.process = ctx.Process(target=_shard_main, args=(specs, self.inbox, self.outbox), daemon=True)
+        self._states: List[Dict[str, Any]] = []
+        self._state_ready = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self, name: str) -> None:
+        self.process.name = name
+        self.process.start()
+        self._reader = threading.Thread(target=self._read, name=f"{name}-events", daemon=True)
+        self._reader.start()
+
+    def put(self, item: Any) -> None:
+        op, key, candle = item
+        # the trace ends at the process boundary, perf_counter is per process
+        latency_metrics.stamp_candle(candle, "dequeued")
+        latency_metrics.finish_candle(candle)
+        self.inbox.put(item)
+
+    def warm_up(self, key: Key, candles: List[Dict[str, Any]]) -> None:
+        self.inbox.put(("warmup", key, candles))
+
+    def _read(self) -> None:
+        while True:
+            msg = self.outbox.get()
+            if msg is None:
+                return
+            kind, payload = msg
+            if kind == "event":
+                self.on_event(payload)
+            else:
+                self._states = payload
+                self._state_ready.set()
+
+    def states(self, timeout: float) -> List[Dict[str, Any]]:
+        if self.process.is_alive():
+            self._state_ready.clear()
+            self.inbox.put(("state", None, None))
+            self._state_ready.wait(timeout)
+        return list(self._states)
+
+    def stop(self, timeout: float) -> None:
+        if self.process.is_alive():
+            self.inbox.put(None)
+        self.process.join(timeout)
+        if self._reader is not None:
+            self._reader.join(timeout)
+
+
+class RuntimeScheduler:
+    """Drive one :class:`StrategyRuntime` per (symbol, interval) from a shared feed.
+
+    Candles reach :meth:`submit` from the combined stream thread and are
+    routed to the shard owning that pair. Up to ``per_process`` pairs run on
+    a single thread here; beyond that they are spread by a stable hash over
+    ``processes`` spawned workers (one per core at most), so a slow symbol
+    only delays the others on its shard. ``on_event`` receives every
+    entry/exit event in this process, which is where orders belong.
+    """
+
+    def __init__(
+        self,
+        pairs: Iterable[Key],
+        config: Optional[Dict[str, Any]] = None,
+        processes: Optional[int] = None,
+        per_process: int = PAIRS_PER_PROCESS,
+        on_event: Optional[Callable[[Event], None]] = None,
+        configs: Optional[Dict[Key, Dict[str, Any]]] = None,
+    ) -> None:
+        self.pairs: List[Key] = list(dict.fromkeys((s.upper(), i) for s, i in pairs))
+        self.processes = shard_count(len(self.pairs), per_process) if processes is None else processes
+        self.on_event = on_event or self._log_event
+        self.events: Deque[Event] = deque(maxlen=1000)
+        configs = configs or {}
+
+        def config_for(key: Key) -> Dict[str, Any]:
+            return {**(config or {}), **configs.get(key, {})}
+
+        shards = max(1, self.processes)
+        self.assignment = {key: shard_of(key, shards) for key in self.pairs}
+        if self.processes:
+            self.shards = [
+                _ProcessShard(
+                    [(s, i, config_for((s, i))) for (s, i), n in self.assignment.items() if n == idx],
+                    self._emit,
+                )
+                for idx in range(shards)
+            ]
+        else:
+            runtimes = {key: StrategyRuntime(*key, config_for(key)) for key in self.pairs}
+            self.shards = [_ThreadShard(runtimes, self._emit)]
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> "RuntimeScheduler":
+        if not self._started:
+            for idx, shard in enumerate(self.shards):
+                shard.start(f"strategy-shard-{idx}")
+            self._started = True
+            logger.info(
+                "🧩 %s Strategien gestartet (%s)",
+                len(self.pairs),
+                f"{self.processes} Prozesse" if self.processes else "ein Thread",
+            )
+        return self
+
+    def _emit(self, event: Event) -> None:
+        with self._lock:
+            self.events.append(event)
+        try:
+            self.on_event(event)
+        except Exception as exc:
+            logger.error("Event-Handler fehlgeschlagen: %s", exc)
+
+    @staticmethod
+    def _log_event(event: Event) -> None:
+        if event["type"] == "entry":
+            logger.info("📈 %s %s Entry %s @ %.2f", event["symbol"], event["interval"],
+                        event["side"].upper(), event["price"])
+        else:
+            logger.info("💥 %s %s Exit %s @ %.2f (%s) | PnL %.2f", event["symbol"], event["interval"],
+                        event["side"].upper(), event["price"], event["reason"], event["pnl"])
+
+    def warm_up(self, key: Key, candles: List[Dict[str, Any]]) -> None:
+        self.shards[self.assignment[key]].warm_up(key, candles)
+
+    def submit(self, symbol: str, interval: str, candle: Dict[str, Any]) -> bool:
+        key = (symbol.upper(), interval)
+        shard = self.assignment.get(key)
+        if shard is None:
+            return False
+        try:
+            self.shards[shard].put(("candle", key, candle))
+        except queue.Full:
+            logger.warning("⚠️ Strategie-Shard %s überlastet – Candle %s %s verworfen", shard, *key)
+            return False
+        return True
+
+    def attach_stream(self, warmup: Optional[int] = None) -> Dict[Key, Any]:
+        """Start the combined kline stream for all pairs and route it here."""
+        import data_provider
+
+        feeds = data_provider.start_multi_stream(
+            self.pairs, warmup if warmup is not None else data_provider._WARMUP_CANDLES
+        )
+        self.start()
+        for key, feed in feeds.items():
+            self.warm_up(key, feed.candles())
+        data_provider.set_stream_sink(self.submit)
+        return feeds
+
+    def states(self, timeout: float = 2.0) -> List[Dict[str, Any]]:
+        result: List[Dict[str, Any]] = []
+        for shard in self.shards:
+            result.extend(shard.states(timeout))
+        return result
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self._started:
+            return
+        data_provider = sys.modules.get("data_provider")
+        if data_provider is not None and data_provider._STREAM_SINK == self.submit:
+            data_provider.set_stream_sink(None)
+        for shard in self.shards:
+            shard.stop(timeout)
+        self._started = False
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mehrere Symbole im Papiermodus handeln")
+    parser.add_argument("pairs", nargs="+", help="SYMBOL:INTERVAL, z.B. BTCUSDT:1m")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--per-process", type=int, default=PAIRS_PER_PROCESS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    pairs = [tuple(p.split(":", 1)) if ":" in p else (p, BINANCE_INTERVAL) for p in args.pairs]
+    scheduler = RuntimeScheduler(pairs, processes=args.processes, per_process=args.per_process)
+    scheduler.attach_stream()
+    try:
+        while True:
+            time.sleep(60)
+            for state in scheduler.states():
+                logger.info("%s %s | Kapital %.2f | Trades %s", state["symbol"], state["interval"],
+                            state["capital"], state["trades"])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# test_async_runtime.py
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import async_runtime
+import global_state
+from async_runtime import AsyncRuntime, kline_reader
+
+
+class AsyncRuntimeTest(unittest.TestCase):
+    def test_feed_signals_and_stop(self):
+        seen = []
+        runtime = AsyncRuntime(lambda candle: seen.append(candle["timestamp"]), queue_size=2)
+        ticks = []
+        runtime.add_periodic(lambda: ticks.append(1), 0.01)
+
+        def produce():
+            for ts in range(10):
+                runtime.feed({"timestamp": ts})
+            while len(seen) < 10 or not ticks:
+                time.sleep(0.01)
+            runtime.stop()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        runtime.run()
+        producer.join(timeout=5)
+
+        self.assertEqual(seen, list(range(10)))
+        self.assertTrue(ticks)
+        self.assertEqual(runtime.backlog, 0)
+
+    def test_producer_blocks_while_queue_full(self):
+        release = threading.Event()
+        runtime = AsyncRuntime(lambda c: release.wait(2), queue_size=1)
+        fed = []
+
+        def produce():
+            for ts in range(3):
+                runtime.feed({"timestamp": ts}, timeout=5)
+                fed.append(ts)
+
+        def check():
+            time.sleep(0.2)
+            blocked = len(fed) < 3
+            release.set()
+            time.sleep(0.1)
+            results.append(blocked)
+            runtime.stop()
+
+        results = []
+        threading.Thread(target=produce).start()
+        threading.Thread(target=check).start()
+        runtime.run()
+        self.assertEqual(results, [True])
+
+    def test_blocking_handler_leaves_loop_free(self):
+        started, release = threading.Event(), threading.Event()
+        ticks = []
+
+        def handler(candle):
+            started.set()
+            release.wait(2)
+
+        runtime = AsyncRuntime(handler)
+        runtime.add_periodic(lambda: ticks.append(1), 0.01)
+
+        def check():
+            started.wait(2)
+            before = len(ticks)
+            time.sleep(0.2)
+            results.append(len(ticks) - before)
+            release.set()
+            runtime.stop()
+
+        results = []
+        threading.Thread(target=lambda: runtime.feed({"timestamp": 0})).start()
+        threading.Thread(target=check).start()
+        runtime.run()
+        self.assertGreater(results[0], 5)
+
+
+
+class _FakeSocket:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for message in self.messages:
+            yield message
+
+
+class KlineReaderTest(unittest.TestCase):
+    def test_drops_stale_and_repeated_closes(self):
+        now = int(time.time())
+
+        def frame(ts):
+            return json.dumps({"k": {"t": ts * 1000, "x": True, "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "3"}})
+
+        messages = [frame(now - 600), frame(now - 30), frame(now - 30), frame(now)]
+        websockets = mock.Mock()
+        websockets.connect.return_value = _FakeSocket(messages)
+        seen = []
+
+        async def run():
+            task = asyncio.ensure_future(kline_reader("ws://test", lambda c: seen.append(c["timestamp"]))())
+            while len(seen) < 2 and not task.done():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        with mock.patch.object(async_runtime, "websockets", websockets), \
+                mock.patch.object(global_state, "last_candle_ts", None):
+            asyncio.run(asyncio.wait_for(run(), 5))
+            self.assertEqual(global_state.last_candle_ts, now)
+        self.assertEqual(seen, [now - 30, now])
+
+
+if __name__ == "__main__":
+    unittest.main()
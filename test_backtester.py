@@ -0,0 +1,94 @@
+# test_backtester.py
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import backtester
+from backtester import DEFAULT_CONFIG, compute_indicators, compute_signals, run_backtest
+from entry_logic import should_enter
+from indicator_engine import IndicatorEngine
+
+
+def _columns(n, seed=5):
+    rnd = random.Random(seed)
+    price = 30000.0
+    rows = []
+    for i in range(n):
+        open_ = price + rnd.gauss(0, 5)
+        price = open_ + rnd.gauss(0, 25)
+        high = max(open_, price) + abs(rnd.gauss(0, 8))
+        low = min(open_, price) - abs(rnd.gauss(0, 8))
+        volume = rnd.uniform(5, 50) * (4 if rnd.random() < 0.05 else 1)
+        rows.append((i * 60, open_, high, low, price, volume))
+    data = np.array(rows).T
+    keys = ("timestamp", "open", "high", "low", "close", "volume")
+    return {k: data[i].copy() for i, k in enumerate(keys)}
+
+
+class BacktesterTest(unittest.TestCase):
+    def test_signals_match_should_enter(self):
+        cols = _columns(1500)
+        configs = [
+            dict(DEFAULT_CONFIG, puffer=5.0),
+            dict(DEFAULT_CONFIG, puffer=0.0, opt_rsi_ema=True, opt_volumen_strong=True),
+            dict(DEFAULT_CONFIG, puffer=0.0, lookback=3, opt_engulf=True, opt_safe_mode=True),
+        ]
+        for cfg in configs:
+            signals = compute_signals(cols, cfg)
+            engine = IndicatorEngine(lookback=cfg["lookback"])
+            for i in range(1, len(signals)):
+                candle = {k: float(v[i]) for k, v in cols.items()}
+                if i == 1:
+                    engine.update({k: float(v[0]) for k, v in cols.items()})
+                indicator = dict(engine.update(candle), mtf_ok=True)
+                expected = should_enter(candle, indicator, cfg).signal
+                got = {1: "long", -1: "short", 0: None}[int(signals[i])]
+                self.assertEqual(got, expected, f"bar {i}")
+
+    def test_indicators_match_engine(self):
+        cols = _columns(400)
+        ind = compute_indicators(cols, 30)
+        engine = IndicatorEngine(lookback=30)
+        for i in range(400):
+            values = engine.update({k: float(v[i]) for k, v in cols.items()})
+            self.assertAlmostEqual(ind["atr"][i], values["atr"], places=6)
+            self.assertAlmostEqual(ind["rsi"][i], values["rsi"], places=6)
+            self.assertEqual(ind["high_lookback"][i], values["high_lookback"])
+            self.assertEqual(ind["low_lookback"][i], values["low_lookback"])
+            self.assertAlmostEqual(ind["avg_volume"][i], values["avg_volume"], places=6)
+
+    def test_run_backtest_books_trades(self):
+        cols = _columns(5000)
+        result = run_backtest(cols, {"puffer": 0.0})
+        self.assertGreater(result.trade_count, 0)
+        self.assertEqual(len(result.equity), result.trade_count + 1)
+        self.assertAlmostEqual(result.final_capital, result.trades[-1]["capital"])
+        for prev, nxt in zip(result.trades, result.trades[1:]):
+            self.assertGreater(nxt["entry_index"], prev["exit_index"])
+            self.assertLessEqual(prev["exit_index"] - prev["entry_index"], DEFAULT_CONFIG["max_hold_candles"])
+        self.assertGreaterEqual(result.max_drawdown, 0.0)
+
+    def test_stop_on_timed_exit_bar(self):
+        n, entry_bar, max_hold = 30, 5, DEFAULT_CONFIG["max_hold_candles"]
+        cols = {
+            "timestamp": np.arange(n) * 60.0,
+            "open": np.full(n, 100.0),
+            "high": np.full(n, 101.0),
+            "low": np.full(n, 99.0),
+            "close": np.full(n, 100.0),
+            "volume": np.full(n, 10.0),
+        }
+        cols["low"][entry_bar + max_hold] = 94.0
+        signals = np.zeros(n, dtype=np.int8)
+        signals[entry_bar] = 1
+        with mock.patch.object(backtester, "compute_signals", return_value=signals), \
+                mock.patch.object(backtester, "_sl_tp", return_value=(95.0, 110.0)):
+            trade = run_backtest(cols).trades[0]
+        self.assertEqual((trade["reason"], trade["exit"]), ("sl", 95.0))
+        self.assertEqual(trade["exit_index"], entry_bar + max_hold)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# test_bitmex_client.py
+import hashlib
+import hmac
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bitmex_client import BitmexClient
+
+SECRET = "secret"
+
+
+class _BitmexStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    requests = []
+    position = {"symbol": "XBTUSD", "currentQty": 300}
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length).decode()
+        if self.command == "HEAD":
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.connections.add(self.client_address)
+        message = self.command + self.path + self.headers["api-expires"] + data
+        expected = hmac.new(SECRET.encode(), message.encode(), hashlib.sha256).hexdigest()
+        if self.headers["api-signature"] != expected:
+            return self._reply({"error": {"message": "Signature not valid."}}, 401)
+        self.requests.append((self.command, self.path, json.loads(data) if data else None))
+        if self.path.split("?")[0] == "/api/v1/position":
+            return self._reply([self.position])
+        order = json.loads(data)
+        qty = order.get("orderQty", abs(self.position["currentQty"]))
+        side = order.get("side") or ("Sell" if self.position["currentQty"] > 0 else "Buy")
+        self.position["currentQty"] += qty if side == "Buy" else -qty
+        return self._reply({"side": side, "cumQty": qty, "ordStatus": "Filled"})
+
+    do_GET = do_POST = do_HEAD = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class BitmexClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _BitmexStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        _BitmexStub.connections = set()
+        _BitmexStub.requests = []
+        _BitmexStub.position = {"symbol": "XBTUSD", "currentQty": 300}
+        self.client = BitmexClient(
+            "key", SECRET, base_url=f"http://127.0.0.1:{self.server.server_port}"
+        )
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_share_one_connection(self):
+        self.assertTrue(self.client.warm_up())
+        self.client.get_open_position()
+        self.client.place_order("buy", 100)
+        self.client.place_order("sell", 100, reduce_only=True)
+        self.assertEqual(len(_BitmexStub.connections), 1)
+        self.assertEqual(_BitmexStub.requests[1][2]["side"], "Buy")
+        self.assertEqual(_BitmexStub.requests[2][2]["execInst"], "ReduceOnly")
+
+    def test_presigned_order_is_sent_unchanged(self):
+        prepared = self.client.presign_order("Sell", 50, reduce_only=True)
+        self.client.place_order("SELL", 50, reduce_only=True)
+        self.assertEqual(len(_BitmexStub.requests), 1)
+        self.assertEqual(json.loads(prepared.body), _BitmexStub.requests[0][2])
+        self.assertIsNone(self.client._take_presigned(("Sell", 50, True, False)))
+
+    def test_cached_position_makes_close_one_round_trip(self):
+        self.client.get_open_position()
+        self.client.place_order("Buy", 100)
+        self.assertEqual(self.client.cached_position()["currentQty"], 400)
+        _BitmexStub.requests = []
+        self.client.close_position()
+        self.assertEqual(len(_BitmexStub.requests), 1)
+        order = _BitmexStub.requests[0][2]
+        self.assertEqual((order["side"], order["execInst"]), ("Sell", "Close"))
+        self.assertNotIn("orderQty", order)
+        self.assertEqual(self.client.cached_position()["currentQty"], 0)
+        # a flat cache without a live stream is confirmed before skipping the close
+        self.assertIsNone(self.client.close_position())
+        self.assertEqual([r[0] for r in _BitmexStub.requests], ["POST", "GET"])
+
+    def test_unfilled_close_keeps_cached_position(self):
+        self.client.get_open_position()
+        self.client._send = lambda prepared: {"side": "Sell", "cumQty": 0, "ordStatus": "Canceled"}
+        self.client.close_position()
+        self.assertEqual(self.client.cached_position()["currentQty"], 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
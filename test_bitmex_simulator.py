@@ -0,0 +1,84 @@
+# test_bitmex_simulator.py
+import time
+import unittest
+
+import requests
+
+from bitmex_client import BitmexClient
+from bitmex_simulator import BitmexSimulator, attach, load_test
+
+
+class BitmexSimulatorTest(unittest.TestCase):
+    def _sim(self, **kwargs):
+        sim = BitmexSimulator(**kwargs)
+        self.addCleanup(sim.stop)
+        return sim
+
+    def _client(self, sim, secret="sim-secret"):
+        client = BitmexClient("sim-key", secret, base_url=sim.base_url)
+        self.addCleanup(client.session.close)
+        return client
+
+    def test_http_round_trip_and_position(self):
+        with BitmexSimulator() as sim:
+            client = self._client(sim)
+            order = client.place_order("Buy", 100)
+            self.assertEqual((order["ordStatus"], order["cumQty"]), ("Filled", 100))
+            client.place_order("Sell", 40, reduce_only=True)
+            self.assertEqual(client.get_open_position()["currentQty"], 60)
+            client.close_position()
+            self.assertEqual(sim.position["currentQty"], 0)
+
+    def test_rejects_bad_signature_and_reduce_only_increase(self):
+        sim = self._sim()
+        bad = self._client(sim, "wrong")
+        attach(bad, sim)
+        with self.assertRaises(requests.HTTPError) as ctx:
+            bad.place_order("Buy", 1)
+        self.assertEqual(ctx.exception.response.status_code, 401)
+        good = self._client(sim)
+        attach(good, sim)
+        with self.assertRaises(requests.HTTPError):
+            good.place_order("Sell", 1, reduce_only=True)
+
+    def test_partial_fill_completes_later(self):
+        sim = self._sim(fill_ratio=0.25, fill_delay=0.01)
+        client = self._client(sim)
+        attach(client, sim)
+        order = client.place_order("Buy", 100)
+        self.assertEqual((order["ordStatus"], order["cumQty"], order["leavesQty"]), ("PartiallyFilled", 25, 75))
+        time.sleep(0.1)
+        self.assertEqual(sim.position["currentQty"], 100)
+        self.assertEqual(sim.orders[order["orderID"]]["ordStatus"], "Filled")
+
+    def test_rate_limit_and_injected_errors(self):
+        sim = self._sim(rate_limit=3)
+        client = self._client(sim)
+        attach(client, sim)
+        statuses = []
+        for _ in range(4):
+            try:
+                client.place_order("Buy", 1)
+                statuses.append(200)
+            except requests.HTTPError as exc:
+                statuses.append(exc.response.status_code)
+                headers = exc.response.headers
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(headers["x-ratelimit-remaining"], "0")
+        self.assertIn("Retry-After", headers)
+
+        flaky = self._sim(error_503=1.0)
+        client = self._client(flaky)
+        attach(client, flaky)
+        with self.assertRaises(requests.HTTPError) as ctx:
+            client.place_order("Buy", 1)
+        self.assertEqual(ctx.exception.response.status_code, 503)
+
+    def test_load_test_in_process(self):
+        result = load_test(500, workers=2, in_process=True)
+        self.assertEqual(result["errors"], 0)
+        self.assertGreater(result["orders_per_sec"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# test_bitmex_state.py
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+import unittest
+
+from bitmex_client import BitmexClient
+from bitmex_simulator import BitmexSimulator, attach
+from bitmex_state import BitmexState, auth_message, realtime_url, replay
+
+
+class BitmexStateTest(unittest.TestCase):
+    def _sim_client(self, **kwargs):
+        sim = BitmexSimulator(**kwargs)
+        self.addCleanup(sim.stop)
+        client = BitmexClient("sim-key", "sim-secret", base_url=sim.base_url)
+        self.addCleanup(client.session.close)
+        attach(client, sim)
+        state = BitmexState()
+        state.attach(client)
+        sim.add_listener(state.apply)
+        return sim, client, state
+
+    def test_tables_merge_partial_updates(self):
+        state = BitmexState()
+        seen = []
+        state.subscribe("order", lambda action, rows: seen.append(action))
+        keys = ["account", "symbol", "currency"]
+        state.apply({"table": "position", "action": "partial", "keys": keys,
+                     "data": [{"account": 1, "symbol": "XBTUSD", "currency": "XBt", "currentQty": 5}]})
+        state.apply('{"table": "position", "action": "update", "data": '
+                    '[{"account": 1, "symbol": "XBTUSD", "currency": "XBt", "avgEntryPrice": 100}]}')
+        self.assertTrue(state.live)
+        self.assertEqual(state.position()["currentQty"], 5)
+        self.assertEqual(state.position()["avgEntryPrice"], 100)
+
+        state.apply({"table": "order", "action": "insert",
+                     "data": [{"orderID": "a", "ordStatus": "New", "leavesQty": 3}]})
+        state.apply({"table": "order", "action": "update",
+                     "data": [{"orderID": "a", "ordStatus": "Filled", "leavesQty": 0}]})
+        self.assertEqual(state.order("a")["ordStatus"], "Filled")
+        self.assertEqual(state.open_orders(), [])
+        state.apply({"table": "order", "action": "delete", "data": [{"orderID": "a"}]})
+        self.assertIsNone(state.order("a"))
+        self.assertEqual(seen, ["insert", "update", "delete"])
+
+        state.disconnected()
+        self.assertFalse(state.live)
+
+    def test_simulator_stream_keeps_client_cache_current(self):
+        sim, client, state = self._sim_client(fill_ratio=0.5, fill_delay=0.01)
+        self.assertTrue(state.wait_ready(1))
+        client.place_order("Buy", 100)
+        time.sleep(0.1)
+        self.assertEqual(state.position()["currentQty"], 100)
+        self.assertEqual(len(state.executions), 2)
+        self.assertEqual(client.cached_position(max_age=0)["currentQty"], 100)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            client.cached_position()
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+        sim.request_log.clear()
+        client.close_position()
+        self.assertEqual([r[:2] for r in sim.request_log], [("POST", "/api/v1/order")])
+        time.sleep(0.1)  # the second half of the close fills later
+        self.assertEqual(state.position()["currentQty"], 0)
+
+    def test_cache_expires_again_when_stream_drops(self):
+        _, client, state = self._sim_client()
+        client.position_ttl = 0.01
+        state.disconnected()
+        time.sleep(0.02)
+        self.assertIsNone(client.cached_position())
+
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "private.jsonl")
+            sim, client, state = self._sim_client()
+            state.record(path)
+            client.place_order("Sell", 7)
+            state.record(None)
+            copy = BitmexState()
+            copy.apply({"table": "position", "action": "partial", "keys": ["symbol"],
+                        "data": [{"symbol": "XBTUSD", "currentQty": 0}]})
+            self.assertEqual(replay(copy, path), 4)
+        self.assertEqual(copy.position()["currentQty"], -7)
+        self.assertEqual(copy.executions[0]["lastQty"], 7)
+
+    def test_auth_message(self):
+        op = auth_message("key", "secret")
+        key, expires, signature = op["args"]
+        expected = hmac.new(b"secret", f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        self.assertEqual((op["op"], key, signature), ("authKeyExpires", "key", expected))
+        self.assertEqual(realtime_url("https://testnet.bitmex.com"), "wss://testnet.bitmex.com/realtime")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# test_candle_archive.py
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from candle_archive import HEADER_SIZE, CandleArchive, CandleArchiveWriter, convert
+from feed_simulator import FeedSimulator
+
+
+def _candle(i):
+    return {
+        "timestamp": 1_700_000_000 + i * 60,
+        "open": 100.0 + i,
+        "high": 101.0 + i,
+        "low": 99.0 + i,
+        "close": 100.5 + i,
+        "volume": 3.0,
+    }
+
+
+class CandleArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "btc.emc")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_and_memmap_read(self):
+        with CandleArchiveWriter(self.path, "BTCUSDT", "1m") as writer:
+            writer.extend(_candle(i) for i in range(5))
+        with CandleArchiveWriter(self.path) as writer:
+            self.assertEqual(writer.count, 5)
+            writer.append(_candle(5))
+        archive = CandleArchive(self.path)
+        self.assertEqual((archive.symbol, archive.interval), ("BTCUSDT", "1m"))
+        self.assertEqual(len(archive), 6)
+        cols = archive.columns()
+        self.assertEqual(cols["timestamp"].dtype, np.int64)
+        self.assertEqual(cols["close"].tolist(), [100.5 + i for i in range(6)])
+        self.assertEqual(archive.tail(1), [_candle(5)])
+        self.assertEqual(list(FeedSimulator(self.path).candles()), [_candle(i) for i in range(6)])
+
+    def test_partial_record_is_truncated(self):
+        with CandleArchiveWriter(self.path) as writer:
+            writer.extend(_candle(i) for i in range(3))
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        with CandleArchiveWriter(self.path) as writer:
+            writer.append(_candle(3))
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + 4 * 48)
+        self.assertEqual(CandleArchive(self.path).tail(4)[-1], _candle(3))
+
+    def test_convert_csv(self):
+        src = os.path.join(self.tmp.name, "c.csv")
+        with open(src, "w", encoding="utf-8") as f:
+            f.write("timestamp,open,high,low,close,volume\n")
+            for i in range(4):
+                c = _candle(i)
+                f.write(",".join(str(c[k]) for k in ("timestamp", "open", "high", "low", "close", "volume")) + "\n")
+        self.assertEqual(convert(src, self.path), 4)
+        cols = FeedSimulator(self.path).columns()
+        self.assertEqual(cols["timestamp"].tolist(), [_candle(i)["timestamp"] for i in range(4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
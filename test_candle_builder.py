@@ -0,0 +1,115 @@
+# test_candle_builder.py
+import queue
+import time
+import unittest
+from unittest import mock
+
+import data_provider
+import latency_metrics
+from candle_builder import CandleBuilder
+from candle_store import CandleRingBuffer
+from tick_stream import Tick
+
+BASE = 1_700_000_040  # a minute boundary
+
+
+def _trade(ts, price, qty=1.0, symbol="BTCUSDT"):
+    return Tick(symbol, price, price, price, qty, ts, time.perf_counter())
+
+
+class CandleBuilderTest(unittest.TestCase):
+    def setUp(self):
+        latency_metrics.reset()
+        self.candles = []
+        self.mismatches = []
+        self.builder = CandleBuilder(
+            "btcusdt", 60, self.candles.append,
+            on_mismatch=lambda kline, diffs: self.mismatches.append(diffs),
+        )
+
+    def _feed(self, *ticks):
+        for tick in ticks:
+            self.builder.on_tick(tick)
+
+    def test_next_trade_closes_bar_and_partial_start_is_skipped(self):
+        self._feed(_trade(BASE + 30, 99.0), _trade(BASE + 60, 100.0, 2.0), _trade(BASE + 70, 103.0),
+                   _trade(BASE + 80, 98.0, 0.5), _trade(BASE + 119.9, 101.0))
+        self.assertEqual(self.candles, [])
+        self._feed(_trade(BASE + 120.2, 102.0))
+        self.assertEqual(len(self.candles), 1)
+        candle = self.candles[0]
+        self.assertEqual(
+            {k: candle[k] for k in ("timestamp", "open", "high", "low", "close", "volume", "source")},
+            {"timestamp": BASE + 60, "open": 100.0, "high": 103.0, "low": 98.0,
+             "close": 101.0, "volume": 4.5, "source": "trades"},
+        )
+        self.assertEqual(self.builder.stats["skipped"], 1)
+
+    def test_clock_closes_bar_and_empty_bar_is_flat(self):
+        self._feed(_trade(BASE + 10, 99.0), _trade(BASE + 60, 100.0), _trade(BASE + 90, 101.0))
+        self.assertIsNone(self.builder.close_due(BASE + 120.01))
+        closed = self.builder.close_due(BASE + 120.06)
+        self.assertEqual((closed["timestamp"], closed["close"]), (BASE + 60, 101.0))
+        self._feed(_trade(BASE + 119.5, 105.0))  # arrived after the close
+        self.assertEqual(self.builder.stats["late_trades"], 1)
+        self._feed(Tick("BTCUSDT", 101.0, 100.5, 101.5, 0.0, BASE + 150, time.perf_counter(), "book"))
+        empty = self.builder.close_due(BASE + 180.06)
+        self.assertEqual(
+            (empty["timestamp"], empty["open"], empty["high"], empty["close"], empty["volume"]),
+            (BASE + 120, 101.0, 101.0, 101.0, 0.0),
+        )
+        self.assertEqual(len(self.candles), 2)
+
+    def test_reconcile_with_official_kline(self):
+        self._feed(_trade(BASE + 10, 99.0), _trade(BASE + 60, 100.0), _trade(BASE + 120, 100.0),
+                   _trade(BASE + 180, 100.0))
+        official = {"timestamp": BASE + 60, "open": 100.0, "high": 100.0, "low": 100.0,
+                    "close": 100.0, "volume": 1.0}
+        self.assertTrue(self.builder.reconcile(official))
+        self.assertTrue(self.builder.reconcile({**official, "timestamp": BASE + 120, "high": 100.5}))
+        self.assertEqual(self.mismatches, [{"high": (100.0, 100.5)}])
+        self.assertEqual((self.builder.stats["matched"], self.builder.stats["corrected"]), (1, 1))
+        self.assertEqual(latency_metrics.histogram("candle.builder_lead").count, 2)
+
+        # the kline beat the builder: the bar is left to the feed and not emitted again
+        self.assertFalse(self.builder.reconcile({**official, "timestamp": BASE + 180}))
+        self._feed(_trade(BASE + 240, 100.0))
+        self.assertEqual(self.builder.stats["kline_first"], 1)
+        self.assertEqual([c["timestamp"] for c in self.candles], [BASE + 60, BASE + 120])
+
+
+class FeedIntegrationTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = queue.Queue()
+        patches = [
+            mock.patch.dict(data_provider.config.values, {"candle_journal": False, "candle_archive": None}),
+            mock.patch.object(data_provider, "_CANDLE_STORE", CandleRingBuffer(10)),
+            mock.patch.object(data_provider, "_CANDLE_QUEUE", self.queue),
+            mock.patch.object(data_provider, "_CANDLE_SINK", None),
+            mock.patch.object(data_provider, "_LAST_CANDLE_TS", None),
+            mock.patch.object(data_provider, "_DEFAULT_INTERVAL", "1m"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.builder = CandleBuilder(
+            "BTCUSDT", 60, data_provider.update_candle_feed, on_mismatch=data_provider.correct_candle
+        )
+        data_provider.set_candle_builder(self.builder)
+        self.addCleanup(data_provider.set_candle_builder, None)
+
+    def test_kline_corrects_instead_of_feeding_twice(self):
+        for ts, price in ((BASE + 10, 99.0), (BASE + 60, 100.0), (BASE + 120, 101.0)):
+            self.builder.on_tick(_trade(ts, price))
+        self.assertEqual(self.queue.get_nowait()["source"], "trades")
+        data_provider.update_candle_feed({"timestamp": BASE + 60, "open": 100.0, "high": 100.2,
+                                          "low": 100.0, "close": 100.0, "volume": 1.5})
+        self.assertTrue(self.queue.empty())
+        self.assertEqual(data_provider._CANDLE_STORE.last()["high"], 100.2)
+        data_provider.update_candle_feed({"timestamp": BASE + 120, "open": 101.0, "high": 101.0,
+                                          "low": 101.0, "close": 101.0, "volume": 1.0})
+        self.assertEqual(self.queue.get_nowait()["source"], "ws")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# test_candle_journal.py
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import data_provider
+from candle_archive import CandleArchive, CandleArchiveWriter
+from candle_store import CandleRingBuffer
+
+
+def _candle(ts):
+    return {
+        "timestamp": ts,
+        "open": 100.0,
+        "high": 101.0,
+        "low": 99.0,
+        "close": 100.5,
+        "volume": 3.0,
+    }
+
+
+class CandleJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal.emc")
+        now = time.time()
+        self.last_closed = int(now) // 60 * 60 - 60
+        clock = mock.Mock(wraps=time)
+        clock.time.return_value = now
+        patches = [
+            mock.patch.object(data_provider, "time", clock),
+            mock.patch.dict(data_provider.config.values, {"candle_archive": self.path}),
+            mock.patch.object(data_provider, "_CANDLE_STORE", CandleRingBuffer(1000)),
+            mock.patch.object(data_provider, "_LAST_CANDLE_TS", None),
+            mock.patch.object(data_provider, "_ARCHIVE_WRITER", None),
+            mock.patch.object(data_provider, "_DEFAULT_INTERVAL", "1m"),
+            # read the store without starting the live stream and feed monitor
+            mock.patch.object(data_provider, "_CANDLE_WS_STARTED", True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        if data_provider._ARCHIVE_WRITER is not None:
+            data_provider._ARCHIVE_WRITER.close()
+        self.tmp.cleanup()
+
+    def _journal(self, newest, count):
+        with CandleArchiveWriter(self.path, "BTCUSDT", "1m") as writer:
+            writer.extend(_candle(newest - (count - 1 - i) * 60) for i in range(count))
+
+    def test_current_journal_skips_rest(self):
+        self._journal(self.last_closed, 150)
+        with mock.patch.object(data_provider, "_fetch_rest_candles") as fetch:
+            self.assertTrue(data_provider._load_initial_candles("1m"))
+        fetch.assert_not_called()
+        self.assertEqual(len(data_provider._CANDLE_STORE), 150)
+        self.assertEqual(data_provider._LAST_CANDLE_TS, self.last_closed)
+
+    def test_stale_journal_fetches_only_missing(self):
+        self._journal(self.last_closed - 3 * 60, 20)
+        rest = [_candle(self.last_closed - i * 60) for i in range(4, -1, -1)]
+        with mock.patch.object(
+            data_provider, "_fetch_rest_candles", return_value=rest
+        ) as fetch:
+            self.assertTrue(data_provider._load_initial_candles("1m"))
+        self.assertEqual(fetch.call_args[0][1], 4)
+        rows = data_provider.get_live_candles(100)
+        self.assertEqual(len(rows), 23)
+        self.assertEqual(rows[-1]["timestamp"], self.last_closed)
+        data_provider._ARCHIVE_WRITER.close()
+        data_provider._ARCHIVE_WRITER = None
+        self.assertEqual(len(CandleArchive(self.path)), 23)
+
+    def test_gap_detection(self):
+        candles = [_candle(0), _candle(60), _candle(240)]
+        self.assertEqual(data_provider.find_gaps(candles, 60), [(60, 240)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# test_candle_store.py
+import unittest
+
+from candle_store import CandleRingBuffer
+
+
+def _candle(i):
+    return {
+        "timestamp": i * 60,
+        "open": float(i),
+        "high": i + 1.0,
+        "low": i - 1.0,
+        "close": i + 0.5,
+        "volume": 10.0 + i,
+    }
+
+
+class CandleRingBufferTest(unittest.TestCase):
+    def test_wraparound_keeps_newest(self):
+        store = CandleRingBuffer(5)
+        store.extend(_candle(i) for i in range(12))
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.count, 12)
+        snap = store.snapshot()
+        self.assertEqual(snap.close.tolist(), [7.5, 8.5, 9.5, 10.5, 11.5])
+        self.assertEqual(store.to_dicts(2), [_candle(10), _candle(11)])
+        self.assertEqual(store.last(), _candle(11))
+
+    def test_snapshot_is_readonly_view(self):
+        store = CandleRingBuffer(4)
+        store.extend(_candle(i) for i in range(6))
+        snap = store.snapshot(3)
+        with self.assertRaises(ValueError):
+            snap.close[0] = 0.0
+        store.extend(_candle(i) for i in range(6, 10))
+        self.assertEqual(snap.timestamp.tolist(), [180.0, 240.0, 300.0])
+
+    def test_empty(self):
+        store = CandleRingBuffer(3)
+        self.assertEqual(len(store.snapshot()), 0)
+        self.assertIsNone(store.last())
+
+
+if __name__ == "__main__":
+    unittest.main()
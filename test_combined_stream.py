@@ -0,0 +1,87 @@
+# test_combined_stream.py
+import json
+import time
+import unittest
+from unittest import mock
+
+import data_provider
+from binance_ws import BinanceCombinedWebSocket
+
+
+def _message(symbol, interval, open_ms, closed=True):
+    return json.dumps(
+        {
+            "stream": f"{symbol.lower()}@kline_{interval}",
+            "data": {
+                "e": "kline",
+                "s": symbol,
+                "k": {
+                    "t": open_ms,
+                    "T": open_ms + 59_999,
+                    "s": symbol,
+                    "i": interval,
+                    "o": "1",
+                    "h": "2",
+                    "l": "0.5",
+                    "c": "1.5",
+                    "v": "10",
+                    "x": closed,
+                },
+            },
+        }
+    )
+
+
+class CombinedStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.open_ms = (int(time.time()) // 60 - 1) * 60_000
+
+    def test_routes_closed_klines_per_stream(self):
+        received = []
+        client = BinanceCombinedWebSocket(
+            lambda s, i, c: received.append((s, i, c["timestamp"])),
+            [("BTCUSDT", "1m"), ("ETHUSDT", "1m")],
+        )
+        client._on_message(None, _message("BTCUSDT", "1m", self.open_ms, closed=False))
+        client._on_message(None, _message("BTCUSDT", "1m", self.open_ms))
+        client._on_message(None, _message("ETHUSDT", "1m", self.open_ms))
+        client._on_message(None, _message("BTCUSDT", "1m", self.open_ms))
+        client._on_message(None, json.dumps({"result": None, "id": 1}))
+        ts = self.open_ms // 1000
+        self.assertEqual(received, [("BTCUSDT", "1m", ts), ("ETHUSDT", "1m", ts)])
+
+    def test_subscribes_all_streams_on_one_connection(self):
+        pairs = [(f"SYM{i}USDT", "1m") for i in range(450)]
+        client = BinanceCombinedWebSocket(lambda *a: None, pairs)
+        client.ws = mock.Mock()
+        with mock.patch("binance_ws.time.sleep"):
+            client._on_open(client.ws)
+        sent = [json.loads(call.args[0]) for call in client.ws.send.call_args_list]
+        self.assertEqual([len(m["params"]) for m in sent], [200, 200, 50])
+        self.assertEqual(sent[0]["params"][0], "sym0usdt@kline_1m")
+
+        client.subscribe("BTCUSDT", "5m")
+        self.assertEqual(
+            json.loads(client.ws.send.call_args.args[0])["params"], ["btcusdt@kline_5m"]
+        )
+        with self.assertRaises(ValueError):
+            BinanceCombinedWebSocket(
+                lambda *a: None, [(f"S{i}", "1m") for i in range(1025)]
+            )
+
+    def test_feeds_keep_separate_stores_and_queues(self):
+        with mock.patch.object(data_provider, "_FEEDS", {}):
+            btc = data_provider.get_feed("btcusdt", "1m")
+            eth = data_provider.get_feed("ETHUSDT", "5m")
+            candle = {"timestamp": 60, "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 1}
+            data_provider._on_stream_candle("BTCUSDT", "1m", dict(candle))
+            data_provider._on_stream_candle("BTCUSDT", "1m", dict(candle))
+            data_provider._on_stream_candle("XRPUSDT", "1m", dict(candle))
+            self.assertEqual(len(btc.store), 1)
+            self.assertEqual(btc.queue.qsize(), 1)
+            self.assertEqual(len(eth.store), 0)
+            self.assertIs(data_provider.get_feed("BTCUSDT", "1m"), btc)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# test_early_signal.py
+import json
+import time
+import unittest
+
+import latency_metrics
+from binance_ws import BinanceCandleWebSocket
+from early_signal import EarlySignalMonitor
+from entry_logic import should_enter
+from indicator_engine import IndicatorEngine
+from kline_decoder import Kline
+
+CONFIG = {"lookback": 20, "puffer": 1.0, "volumen_factor": 1.2}
+
+
+def _history(n=30):
+    return [
+        {"timestamp": i * 60, "open": 100.0, "high": 101.0, "low": 99.0,
+         "close": 100.5 if i % 2 else 99.5, "volume": 10.0}
+        for i in range(n)
+    ]
+
+
+def _kline(ts, high, low, close, volume=5.0, closed=False):
+    return Kline("BTCUSDT", "1m", ts, ts + 59, 100.0, high, low, close, volume, closed)
+
+
+class EarlySignalTest(unittest.TestCase):
+    def setUp(self):
+        latency_metrics.reset()
+        self.engine = IndicatorEngine(lookback=CONFIG["lookback"])
+        for candle in _history():
+            self.engine.update(candle)
+        self.ts = 30 * 60
+        self.signals = []
+        self.monitor = EarlySignalMonitor(CONFIG, lambda d, k, w: self.signals.append((d, k.close)))
+        self.watch = self.monitor.arm(self.ts, self.engine, None)
+
+    def _close(self, kline):
+        candle = kline.to_candle()
+        values = self.engine.update(candle)
+        indicator = {**values, "mtf_ok": True, "prev_bull_signal": False, "prev_baer_signal": False}
+        return should_enter(candle, indicator, CONFIG).signal
+
+    def test_thresholds_and_single_fire(self):
+        self.assertEqual((self.watch.long_above, self.watch.short_below), (102.0, 98.0))
+        self.assertIsNone(self.monitor.on_kline(_kline(self.ts, 101.5, 99.5, 101.0)))
+        self.assertIsNone(self.monitor.on_kline(_kline(self.ts - 60, 110.0, 99.0, 109.0)))
+        self.assertEqual(self.monitor.on_kline(_kline(self.ts, 103.0, 99.5, 102.8), time.perf_counter()), "long")
+        self.assertIsNone(self.monitor.on_kline(_kline(self.ts, 104.0, 99.5, 103.5)))
+        self.assertEqual(self.signals, [("long", 102.8)])
+        self.assertEqual(self.engine.count, 30)
+
+        final = _kline(self.ts, 104.0, 99.5, 103.5, volume=12.0, closed=True)
+        signal = self._close(final)
+        self.assertEqual(signal, "long")
+        lead = self.monitor.on_close(self.ts, signal, time.time() + 30)
+        self.assertGreaterEqual(lead, 30)
+        self.assertEqual(self.monitor.stats["confirmed"], 1)
+        self.assertEqual(self.monitor.stats["updates"], 3)
+        self.assertEqual(latency_metrics.histogram("signal.early_lead").count, 1)
+
+    def test_unconfirmed_when_breakout_fails(self):
+        self.assertEqual(self.monitor.on_kline(_kline(self.ts, 100.5, 97.0, 97.5)), "short")
+        signal = self._close(_kline(self.ts, 100.5, 98.5, 100.0, closed=True))
+        self.assertIsNone(signal)
+        self.assertIsNone(self.monitor.on_close(self.ts, signal))
+        self.assertEqual(self.monitor.stats["unconfirmed"], 1)
+
+    def test_volume_strong_gates_before_evaluation(self):
+        monitor = EarlySignalMonitor({**CONFIG, "opt_volumen_strong": True})
+        watch = monitor.arm(self.ts, self.engine, None)
+        self.assertAlmostEqual(watch.volume_min, 12.0)
+        self.assertIsNone(monitor.on_kline(_kline(self.ts, 105.0, 99.5, 104.5, volume=11.0)))
+        self.assertEqual(monitor.on_kline(_kline(self.ts, 105.0, 99.5, 104.5, volume=13.0)), "long")
+
+    def test_websocket_forwards_open_klines(self):
+        ws = BinanceCandleWebSocket()
+        closed, updates = [], []
+        ws.on_candle = closed.append
+        ws.on_update = lambda kline, recv: updates.append(kline)
+        ts = int(time.time()) * 1000
+        frame = {"k": {"t": ts, "x": False, "o": "10", "h": "12", "l": "9", "c": "11", "v": "3"}}
+        ws._on_message(None, json.dumps(frame))
+        self.assertEqual(closed, [])
+        self.assertEqual([(k.high, k.closed) for k in updates], [(12.0, False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# test_exit_planner.py
+import threading
+import time
+import unittest
+from unittest import mock
+
+import realtime_runner
+from bitmex_client import BitmexClient
+from cooldown_manager import CooldownManager
+from bitmex_simulator import BitmexSimulator, attach
+from exit_planner import ExitPlanner
+from order_dispatcher import FILLED, REJECTED, state_from_response
+from risk_manager import RiskManager
+
+
+class ExitPlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.sent = threading.Event()
+
+        def send(legs):
+            self.batches.append([(leg.side, leg.quantity) for leg in legs])
+            self.sent.set()
+
+        self.planner = ExitPlanner(send)
+        self.addCleanup(self.planner.stop)
+
+    def _wait_batches(self, count, timeout=1.0):
+        deadline = time.time() + timeout
+        while len(self.batches) < count and time.time() < deadline:
+            time.sleep(0.005)
+
+    def test_schedule_returns_immediately_and_sends_later(self):
+        release = threading.Event()
+        send = self.planner.send
+
+        def slow_send(legs):
+            release.wait(1)
+            send(legs)
+
+        self.planner.send = slow_send
+        start = time.perf_counter()
+        self.planner.schedule("Sell", 5)
+        self.assertLess(time.perf_counter() - start, 0.01)
+        release.set()
+        self._wait_batches(1)
+        self.assertEqual(self.batches, [[("Sell", 5)]])
+
+    def test_held_legs_go_out_as_one_batch(self):
+        with self.planner.hold():
+            self.planner.schedule("Sell", 1)
+            self.planner.schedule("Sell", 2)
+            time.sleep(0.02)
+            self.assertEqual(self.batches, [])
+        self._wait_batches(1)
+        self.assertEqual(self.batches, [[("Sell", 1), ("Sell", 2)]])
+
+    def test_cancel_pending_by_tag(self):
+        with self.planner.hold():
+            self.planner.schedule("Buy", 3, tag="apc")
+            self.planner.schedule("Buy", 4, tag="apc")
+            self.planner.schedule("Buy", 9, tag="other")
+            self.assertEqual(self.planner.cancel("apc"), 2)
+            self.assertEqual([leg.tag for leg in self.planner.pending()], ["other"])
+        self._wait_batches(1)
+        time.sleep(0.05)
+        self.assertEqual(self.batches, [[("Buy", 9)]])
+
+class _Var:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class _ApcApp:
+    def __init__(self):
+        self.apc_enabled = _Var(True)
+        self.apc_rate = _Var("50")
+        self.apc_interval = _Var("60")
+        self.apc_min_profit = _Var("0.1")
+        self.apc_status_label = mock.Mock()
+        self.events = []
+
+    def log_event(self, msg):
+        self.events.append(msg)
+
+    def update_live_trade_pnl(self, pnl):
+        pass
+
+
+class RunnerApcTest(unittest.TestCase):
+    def test_one_planner_leg_per_interval(self):
+        planner = mock.Mock()
+        position = {"side": "long", "entry": 100.0, "sl": 90.0, "tp": 200.0, "amount": 10.0, "leverage": 1}
+        candle = {"open": 109, "high": 111, "low": 109, "close": 110, "volume": 1}
+        app = _ApcApp()
+        with mock.patch.object(realtime_runner, "exit_planner", planner):
+            for now in (1000.0, 1030.0, 1061.0):
+                realtime_runner.handle_existing_position(
+                    position, candle, app, 1000.0, True, CooldownManager(0), RiskManager(None, 1000.0),
+                    None, None, {"track_history": False}, now,
+                )
+        self.assertEqual(
+            planner.schedule.call_args_list,
+            [mock.call("SELL", 5.0, tag="apc"), mock.call("SELL", 2.5, tag="apc")],
+        )
+        self.assertEqual(position["amount"], 2.5)
+        self.assertEqual(position["apc_next"], 1121.0)
+        self.assertTrue(app.events[0].startswith("⚡️ Teilverkauf 5.00"))
+
+
+class BulkOrderTest(unittest.TestCase):
+    def test_bulk_legs_against_simulator(self):
+        with BitmexSimulator() as sim:
+            client = BitmexClient("sim-key", "sim-secret", base_url=sim.base_url)
+            self.addCleanup(client.session.close)
+            attach(client, sim)
+            client.place_orders([("Buy", 60), ("Buy", 40)])
+            self.assertEqual(sim.position["currentQty"], 100)
+            self.assertEqual([r[:2] for r in sim.request_log], [("POST", "/api/v1/order/bulk")])
+
+            legs = client.place_orders([("Sell", 30), ("Sell", 30)], reduce_only=True)
+            self.assertEqual(state_from_response(legs), FILLED)
+            self.assertEqual(sim.position["currentQty"], 40)
+
+            legs = client.place_orders([("Sell", 40), ("Sell", 10)], reduce_only=True)
+            self.assertEqual([leg["ordStatus"] for leg in legs], ["Filled", "Rejected"])
+            self.assertEqual(state_from_response(legs), REJECTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
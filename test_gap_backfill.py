@@ -0,0 +1,104 @@
+# test_gap_backfill.py
+import json
+import queue
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import data_provider
+from candle_store import CandleRingBuffer
+
+
+def _row(ts):
+    return [ts * 1000, "100", "101", "99", "100.5", "3", ts * 1000 + 59_999]
+
+
+class _KlineStub(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        query = {k: int(v[0]) for k, v in parse_qs(urlparse(self.path).query).items()
+                 if k in ("limit", "startTime", "endTime")}
+        self.requests.append(query)
+        start = query["startTime"] // 1000
+        end = query["endTime"] // 1000
+        rows = [_row(ts) for ts in range(start, end + 1, 60)][: query["limit"]]
+        body = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _candle(ts):
+    return {
+        "timestamp": ts,
+        "open": 100.0,
+        "high": 101.0,
+        "low": 99.0,
+        "close": 100.5,
+        "volume": 3.0,
+    }
+
+
+class GapBackfillTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), _KlineStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        _KlineStub.requests = []
+        self.base = (int(time.time()) // 60 - 2000) * 60
+        self.queue = queue.Queue()
+        patches = [
+            mock.patch.dict(
+                data_provider.config.values,
+                {
+                    "binance_rest_url": f"http://127.0.0.1:{self.server.server_port}",
+                    "candle_journal": False,
+                    "candle_archive": None,
+                },
+            ),
+            mock.patch.object(data_provider, "_CANDLE_STORE", CandleRingBuffer(2000)),
+            mock.patch.object(data_provider, "_CANDLE_QUEUE", self.queue),
+            mock.patch.object(data_provider, "_LAST_CANDLE_TS", None),
+            mock.patch.object(data_provider, "_DEFAULT_INTERVAL", "1m"),
+            # get_live_candles must read the store, not preload through the stub
+            mock.patch.object(data_provider, "_CANDLE_WS_STARTED", True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_gap_is_spliced_before_live_candle(self):
+        data_provider.update_candle_feed(_candle(self.base))
+        live = self.base + 1500 * 60
+        data_provider.update_candle_feed(_candle(live))
+
+        self.assertEqual(len(_KlineStub.requests), 2)
+        self.assertTrue(all(r["limit"] <= 1000 for r in _KlineStub.requests))
+        stamps = [c["timestamp"] for c in data_provider.get_live_candles(2000)]
+        self.assertEqual(stamps, list(range(self.base, live + 1, 60)))
+        sources = [self.queue.get_nowait()["source"] for _ in range(self.queue.qsize())]
+        self.assertEqual(len(sources), 1501)
+        self.assertEqual(sources[-1], "ws")
+        self.assertEqual(set(sources[1:-1]), {"backfill"})
+
+    def test_no_request_without_gap(self):
+        data_provider.update_candle_feed(_candle(self.base))
+        data_provider.update_candle_feed(_candle(self.base + 60))
+        self.assertEqual(_KlineStub.requests, [])
+        self.assertEqual(data_provider.backfill_gap(self.base + 60), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
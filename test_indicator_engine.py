@@ -0,0 +1,83 @@
+# test_indicator_engine.py
+import random
+import unittest
+
+from andac_entry_master import AndacEntryMaster
+from indicator_engine import IndicatorEngine
+from indicator_utils import calculate_atr, calculate_ema
+
+
+def _candles(n, seed=1):
+    rnd = random.Random(seed)
+    price = 30000.0
+    out = []
+    for i in range(n):
+        open_ = price
+        price += rnd.uniform(-50, 50)
+        high = max(open_, price) + rnd.uniform(0, 20)
+        low = min(open_, price) - rnd.uniform(0, 20)
+        out.append({
+            "timestamp": i * 60,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": price,
+            "volume": rnd.uniform(1, 100),
+        })
+    return out
+
+
+class IndicatorEngineTest(unittest.TestCase):
+    def test_matches_list_helpers(self):
+        lookback = 20
+        engine = IndicatorEngine(lookback=lookback)
+        candles = _candles(300)
+        for i, candle in enumerate(candles):
+            values = engine.update(candle)
+            history = candles[max(0, i - 99):i + 1]
+            closes = [c["close"] for c in history]
+            recent = history[-(lookback + 1):-1]
+            self.assertAlmostEqual(values["atr"], calculate_atr(history, 14), places=6)
+            expected_ema = calculate_ema(closes[-20:], 20)
+            if expected_ema is None:
+                self.assertIsNone(values["ema"])
+            else:
+                self.assertAlmostEqual(values["ema"], expected_ema, places=6)
+            self.assertAlmostEqual(values["rsi"], AndacEntryMaster._rsi(closes, 14), places=6)
+            if recent:
+                self.assertEqual(values["high_lookback"], max(c["high"] for c in recent))
+                self.assertEqual(values["low_lookback"], min(c["low"] for c in recent))
+                self.assertAlmostEqual(
+                    values["avg_volume"],
+                    sum(c["volume"] for c in recent) / len(recent),
+                    places=6,
+                )
+                self.assertEqual(values["prev_close"], history[-2]["close"])
+
+    def test_first_candle_defaults(self):
+        engine = IndicatorEngine()
+        candle = _candles(1)[0]
+        values = engine.update(candle)
+        self.assertEqual(values["high_lookback"], candle["high"])
+        self.assertEqual(values["atr"], 0.0)
+        self.assertEqual(values["rsi"], 50.0)
+        self.assertIsNone(values["prev_close"])
+
+    def test_peek_matches_update_without_committing(self):
+        engine = IndicatorEngine(lookback=20)
+        for candle in _candles(200, seed=3):
+            peek = engine.peek()
+            partial = {**candle, "high": candle["high"] + 5, "volume": candle["volume"] / 2}
+            peek.values(partial)
+            self.assertEqual(engine.peek(), peek)
+            expected = peek.values(candle)
+            values = engine.update(candle)
+            for key, value in expected.items():
+                if value is None:
+                    self.assertIsNone(values[key])
+                else:
+                    self.assertAlmostEqual(values[key], value, places=6, msg=key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# test_intrabar_monitor.py
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import realtime_runner
+from cooldown_manager import CooldownManager
+from intrabar_monitor import IntrabarMonitor
+from risk_manager import RiskManager
+from tick_stream import Tick, TickReplay, parse_tick
+
+
+def _tick(price, symbol="BTCUSDT", bid=None, ask=None, ts=0.0):
+    return Tick(symbol, price, bid or price, ask or price, 1.0, ts, time.perf_counter())
+
+
+class _App:
+    def __init__(self):
+        self.events = []
+        self.live_pnl = 0.0
+
+    def log_event(self, msg):
+        self.events.append(msg)
+
+    def update_live_trade_pnl(self, pnl):
+        pass
+
+    def update_pnl(self, pnl):
+        pass
+
+    def update_capital(self, capital):
+        pass
+
+    def update_last_trade(self, *args):
+        pass
+
+
+class TickParseTest(unittest.TestCase):
+    def test_agg_trade_and_book_ticker(self):
+        trade = parse_tick('{"e":"aggTrade","E":1,"s":"BTCUSDT","p":"30000.5","q":"0.2","T":1700000000123}')
+        self.assertEqual((trade.symbol, trade.price, trade.bid, trade.qty), ("BTCUSDT", 30000.5, 30000.5, 0.2))
+        self.assertAlmostEqual(trade.time, 1700000000.123)
+        book = parse_tick(json.dumps({"stream": "btcusdt@bookTicker", "data": {
+            "u": 1, "s": "BTCUSDT", "b": "99.5", "B": "1", "a": "100.5", "A": "2"}}))
+        self.assertEqual((book.kind, book.price), ("book", 100.0))
+        self.assertEqual((book.exit_price("long"), book.exit_price("short")), (99.5, 100.5))
+        self.assertIsNone(parse_tick('{"result":null,"id":1}'))
+
+
+class IntrabarMonitorTest(unittest.TestCase):
+    def test_fires_once_on_first_crossing(self):
+        fired = []
+        monitor = IntrabarMonitor(lambda w, reason, price, tick: fired.append((w.key, reason, price)))
+        monitor.watch("a", "btcusdt", "long", sl=95.0, tp=110.0)
+        monitor.watch("b", "BTCUSDT", "short", sl=105.0, tp=90.0)
+        monitor.watch("c", "ETHUSDT", "long", sl=1.0, tp=2.0)
+        replay = TickReplay([_tick(p) for p in (100, 96, 94.5, 93, 89.9, 80)], monitor.on_tick)
+        self.assertEqual(replay.run(), 6)
+        self.assertEqual(fired, [("a", "sl", 94.5), ("b", "tp", 89.9)])
+        self.assertTrue(monitor.watching("c"))
+        self.assertEqual(monitor.ticks, 6)
+
+    def test_book_ticker_uses_exit_side(self):
+        fired = []
+        monitor = IntrabarMonitor(lambda w, reason, price, tick: fired.append((reason, price)))
+        monitor.watch(1, "BTCUSDT", "short", sl=101.0, tp=None)
+        monitor.on_tick(_tick(100.5, bid=100.0, ask=101.0))
+        self.assertEqual(fired, [("sl", 101.0)])
+
+    def test_unwatch_and_update(self):
+        monitor = IntrabarMonitor()
+        monitor.watch(1, "BTCUSDT", "long", sl=95.0, tp=110.0)
+        self.assertTrue(monitor.update(1, sl=99.0))
+        self.assertEqual(monitor.on_tick(_tick(98.0)), 1)
+        self.assertFalse(monitor.unwatch(1))
+        self.assertFalse(monitor.update(1, tp=120.0))
+
+    def test_replay_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "ticks.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write("time,price\n0.00,100\n0.05,101\n0.10,102\n")
+            jsonl_path = os.path.join(tmp, "ticks.jsonl")
+            with open(jsonl_path, "w", encoding="utf-8") as f:
+                for i, price in enumerate((100, 99)):
+                    f.write(json.dumps({"e": "aggTrade", "s": "BTCUSDT", "p": str(price), "q": "1", "T": i}) + "\n")
+            prices = []
+            replay = TickReplay(csv_path, lambda t: prices.append((t.symbol, t.price)), speed=1.0, symbol="btcusdt")
+            start = time.perf_counter()
+            replay.start()
+            self.assertTrue(replay.done.wait(2))
+            self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+            self.assertEqual(prices, [("BTCUSDT", 100.0), ("BTCUSDT", 101.0), ("BTCUSDT", 102.0)])
+            self.assertEqual(TickReplay(jsonl_path, lambda t: None).run(), 2)
+
+
+class RunnerIntrabarTest(unittest.TestCase):
+    def setUp(self):
+        self.monitor = IntrabarMonitor(realtime_runner._on_intrabar_exit)
+        patcher = mock.patch.multiple(realtime_runner, intrabar_monitor=self.monitor, intrabar_live=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.position = {"side": "long", "entry": 100.0, "sl": 95.0, "tp": 110.0,
+                         "amount": 10.0, "leverage": 1, "entry_index": 0}
+
+    def _handle(self, candle):
+        return realtime_runner.handle_existing_position(
+            self.position, candle, _App(), 1000.0, False, CooldownManager(0), RiskManager(None, 1000.0),
+            None, None, {"track_history": False}, time.time(), None, 1,
+        )
+
+    def test_tick_exit_is_booked_at_tick_price(self):
+        realtime_runner._watch_position(self.position)
+        self.monitor.on_tick(_tick(94.0, symbol=realtime_runner.BINANCE_SYMBOL))
+        self.assertEqual(self.position["tick_exit"]["price"], 94.0)
+        position, capital, _, _, closed = self._handle(
+            {"open": 99, "high": 99, "low": 90, "close": 96, "volume": 1})
+        self.assertTrue(closed)
+        self.assertIsNone(position)
+        expected = realtime_runner.simulated_trade_result(100.0, 94.0, 10.0, "long", 1, 1000.0, 0.0004)
+        self.assertAlmostEqual(capital, 1000.0 + expected)
+
+    def test_candle_exit_claims_the_watch(self):
+        realtime_runner._watch_position(self.position)
+        *_, closed = self._handle({"open": 99, "high": 99, "low": 90, "close": 96, "volume": 1})
+        self.assertTrue(closed)
+        self.assertEqual(self.monitor.on_tick(_tick(80.0, symbol=realtime_runner.BINANCE_SYMBOL)), 0)
+        self.assertNotIn("tick_exit", self.position)
+
+
+if __name__ == "__main__":
+    unittest.main()
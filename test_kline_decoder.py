@@ -0,0 +1,44 @@
+# test_kline_decoder.py
+import json
+import unittest
+from unittest import mock
+
+import kline_decoder
+from bench_kline_decoder import _frame, legacy_decode
+from kline_decoder import KlineDecoder, available_backends, is_open_frame
+
+
+class KlineDecoderTest(unittest.TestCase):
+    def test_open_frame_rejected_before_parsing(self):
+        message = _frame(1_700_000_000_000, False)
+        self.assertTrue(is_open_frame(message))
+        self.assertTrue(is_open_frame(message.encode()))
+        self.assertTrue(is_open_frame(json.dumps({"k": {"x": False}})))
+        decoder = KlineDecoder("json")
+        with mock.patch.object(kline_decoder.json, "loads") as loads:
+            self.assertIsNone(decoder.decode(message))
+        loads.assert_not_called()
+
+    def test_closed_frame_matches_legacy_parser(self):
+        message = _frame(1_700_000_000_000, True)
+        for backend in available_backends():
+            kline = KlineDecoder(backend).decode(message)
+            self.assertEqual(kline.symbol, "BTCUSDT")
+            self.assertEqual(kline.interval, "1m")
+            self.assertEqual(kline.close_time, 1_700_000_059)
+            self.assertEqual(kline.to_candle(), legacy_decode(message))
+
+    def test_combined_stream_payload(self):
+        inner = json.loads(_frame(1_700_000_000_000, True))
+        message = json.dumps({"stream": "btcusdt@kline_1m", "data": inner})
+        kline = KlineDecoder("json").decode(message)
+        self.assertEqual(kline.open_time, 1_700_000_000)
+
+    def test_backend_selection(self):
+        self.assertEqual(KlineDecoder("auto").backend, available_backends()[0])
+        with self.assertRaises(ValueError):
+            KlineDecoder("yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# test_latency_metrics.py
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer
+
+import latency_metrics
+from bitmex_client import BitmexClient
+from latency_metrics import LatencyHistogram
+from test_bitmex_client import SECRET, _BitmexStub
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        rnd = random.Random(1)
+        values = sorted(int(rnd.expovariate(1 / 5000)) for _ in range(20000))
+        hist = LatencyHistogram()
+        for value in values:
+            hist.record(value)
+        for pct in (50, 90, 99, 99.9):
+            exact = values[int(len(values) * pct / 100) - 1]
+            self.assertAlmostEqual(hist.percentile(pct), exact, delta=exact * 0.02 + 1)
+        self.assertEqual(hist.max, values[-1])
+        self.assertEqual(hist.count, len(values))
+
+    def test_merge_and_reset(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(10)
+        b.record(1_000_000)
+        a.merge(b)
+        self.assertEqual((a.count, a.min, a.max), (2, 10, 1_000_000))
+        a.reset()
+        self.assertEqual(a.percentile(50), 0)
+
+
+class OrderTraceTest(unittest.TestCase):
+    def setUp(self):
+        latency_metrics.reset()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _BitmexStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = BitmexClient(
+            "key", SECRET, base_url=f"http://127.0.0.1:{self.server.server_port}"
+        )
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        latency_metrics.reset()
+
+    def test_signal_to_response_stages_recorded(self):
+        close = time.time() - 0.05
+        with latency_metrics.signal_trace("entry", close) as trace:
+            with latency_metrics.order_trace("entry"):
+                self.client.place_order("Buy", 10)
+        self.assertIsNone(latency_metrics.current_trace())
+        self.assertEqual(list(trace.stamps), ["candle_close", "signal", "signed", "sent", "response"])
+        stats = latency_metrics.snapshot()
+        for name in ("signal->signed", "signed->sent", "sent->response", "tick_to_trade"):
+            self.assertEqual(stats[f"entry.{name}"]["count"], 1)
+        self.assertGreaterEqual(stats["entry.tick_to_trade"]["p50_us"], 50_000)
+        self.assertEqual(stats["retries"]["count"], 1)
+
+    def test_untraced_exit_starts_own_trace(self):
+        with latency_metrics.order_trace("exit"):
+            self.client.place_order("Sell", 10, reduce_only=True)
+        self.assertIn("exit.sent->response", latency_metrics.snapshot())
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class CandleTraceTest(unittest.TestCase):
+    def setUp(self):
+        latency_metrics.reset()
+        self.addCleanup(latency_metrics.reset)
+
+    def test_frame_to_decision_stages(self):
+        import global_state
+        from bench_kline_decoder import _frame
+        from binance_ws import BinanceCandleWebSocket
+        from signal_worker import SignalWorker
+
+        def handler(candle):
+            latency_metrics.stamp_candle(candle, "indicators")
+            latency_metrics.stamp_candle(candle, "signal")
+
+        worker = SignalWorker(handler)
+        worker.start()
+        self.addCleanup(worker.stop)
+
+        def on_candle(candle):
+            latency_metrics.stamp_candle(candle, "queued")
+            worker.queue.put(candle)
+
+        ws = BinanceCandleWebSocket(on_candle=on_candle, interval="1m")
+        ts = int(time.time() - 61) * 1000  # closed, but inside the staleness window
+        with mock.patch.object(global_state, "last_candle_ts", None):
+            ws._on_message(None, _frame(ts, True))
+        deadline = time.time() + 1
+        while not latency_metrics.histogram("candle.total").count and time.time() < deadline:
+            time.sleep(0.005)
+
+        names = set(latency_metrics.snapshot())
+        for stage in ("ws_recv->decoded", "decoded->queued", "queued->dequeued",
+                      "dequeued->indicators", "indicators->signal", "signal->done", "total"):
+            self.assertIn(f"candle.{stage}", names)
+        self.assertIn("candle.queued->dequeued", latency_metrics.summary_table("candle"))
+
+        text = latency_metrics.export_prometheus()
+        self.assertIn("# TYPE entrymaster_stage_latency_seconds summary", text)
+        self.assertIn('entrymaster_stage_latency_seconds_count{stage="candle.total"} 1', text)
+        self.assertIn('stage="candle.total",quantile="0.99"', text)
+
+    def test_tracing_can_be_disabled(self):
+        candle = {"timestamp": 0, "close": 1.0}
+        with mock.patch.object(latency_metrics, "CANDLE_TRACING", False):
+            latency_metrics.stamp_candle(candle, "ws_recv")
+        self.assertNotIn("_trace", candle)
+        self.assertIsNone(latency_metrics.finish_candle(candle))
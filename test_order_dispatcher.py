@@ -0,0 +1,119 @@
+# test_order_dispatcher.py
+import threading
+import time
+import unittest
+from unittest import mock
+
+import latency_metrics
+import realtime_runner
+from bitmex_client import BitmexClient
+from bitmex_simulator import BitmexSimulator, attach
+from intrabar_monitor import IntrabarMonitor
+from order_dispatcher import ACKED, FILLED, PENDING, REJECTED, OrderDispatcher
+
+
+class OrderDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = OrderDispatcher()
+        self.addCleanup(self.dispatcher.shutdown)
+
+    def _client(self, **kwargs):
+        sim = BitmexSimulator(**kwargs)
+        self.addCleanup(sim.stop)
+        client = BitmexClient("sim-key", "sim-secret", base_url=sim.base_url)
+        self.addCleanup(client.session.close)
+        attach(client, sim)
+        return client
+
+    def test_submit_returns_before_the_call_finishes(self):
+        release = threading.Event()
+        ticket = self.dispatcher.submit("entry", lambda: release.wait(1) and {"ordStatus": "Filled"})
+        self.assertEqual(ticket.state, PENDING)
+        release.set()
+        self.dispatcher.wait(ticket, 1)
+        self.assertEqual(ticket.state, FILLED)
+        states = [t.state for t in self.dispatcher.drain()]
+        self.assertEqual(states, [FILLED, FILLED])  # same ticket queued on submit and on fill
+        self.assertEqual(self.dispatcher.drain(), [])
+
+    def test_state_machine_against_simulator(self):
+        client = self._client(fill_ratio=0.5, fill_delay=0.01)
+        events = []
+        self.dispatcher.subscribe(lambda t: events.append(t.state))
+        acked = self.dispatcher.submit("entry", client.place_order, "Buy", 100)
+        self.dispatcher.wait(acked, 1)
+        self.assertEqual((acked.state, acked.filled_qty), (ACKED, 50))
+
+        update = dict(acked.result, ordStatus="Filled", cumQty=100, leavesQty=0)
+        self.assertIs(self.dispatcher.update_from_exchange(update), acked)
+        self.assertEqual((acked.state, acked.filled_qty), (FILLED, 100))
+
+        failed = self.dispatcher.submit("exit", client.place_order, "Buy", 1, reduce_only=True)
+        self.dispatcher.wait(failed, 1)
+        self.assertEqual(failed.state, REJECTED)
+        self.assertIn("400", failed.error)
+        self.assertEqual(events, [ACKED, FILLED, REJECTED])
+        self.assertEqual(self.dispatcher.open_orders(), [])
+
+    def test_orders_keep_submission_order_and_trace(self):
+        latency_metrics.reset()
+        self.addCleanup(latency_metrics.reset)
+        seen = []
+
+        def order(n):
+            time.sleep(0.01 * (3 - n))
+            latency_metrics.mark("response")
+            seen.append(n)
+            return {"ordStatus": "Filled"}
+
+        with latency_metrics.signal_trace("entry", time.time() - 1, time.time()) as trace:
+            tickets = [self.dispatcher.submit("entry", order, n) for n in range(3)]
+        for ticket in tickets:
+            self.dispatcher.wait(ticket, 1)
+        self.assertEqual(seen, [0, 1, 2])
+        self.assertIn("response", trace.stamps)
+
+
+
+class _App:
+    def __init__(self):
+        self.position = None
+        self.current_position = None
+        self.events = []
+
+    def log_event(self, msg):
+        self.events.append(msg)
+
+
+class RunnerOrderEventsTest(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = OrderDispatcher()
+        self.addCleanup(self.dispatcher.shutdown)
+        self.monitor = IntrabarMonitor()
+        patcher = mock.patch.multiple(
+            realtime_runner, order_dispatcher=self.dispatcher, intrabar_monitor=self.monitor
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rejected_entry_is_reported_once_and_dropped(self):
+        app = _App()
+        position = {"side": "long", "entry": 100.0, "sl": 95.0, "tp": 110.0, "amount": 1.0, "leverage": 1}
+        app.position = position
+        realtime_runner._watch_position(position)
+        ticket = realtime_runner._dispatch("entry", lambda: None)
+        ticket.meta.update(position=position, fee=0.5)
+        self.dispatcher.wait(ticket, 1)
+
+        settled = realtime_runner._handle_order_events(app)
+        self.assertEqual(settled, [ticket])
+        self.assertEqual(ticket.state, REJECTED)
+        self.assertEqual(realtime_runner._handle_order_events(app), [])
+
+        realtime_runner._drop_rejected_entry(position, app)
+        self.assertIsNone(app.position)
+        self.assertFalse(self.monitor.watching(id(position)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# test_order_scheduler.py
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+
+import requests
+
+from bitmex_client import BitmexClient
+from bitmex_simulator import BitmexSimulator, attach
+from order_dispatcher import REJECTED, OrderDispatcher
+from order_scheduler import OrderScheduler, OrderSuperseded, TokenBucket
+
+
+class OrderSchedulerTest(unittest.TestCase):
+    def _setup(self, sim_kwargs=None, **kwargs):
+        self.sim = BitmexSimulator(**(sim_kwargs or {}))
+        self.addCleanup(self.sim.stop)
+        self.client = BitmexClient("sim-key", "sim-secret", base_url=self.sim.base_url)
+        self.addCleanup(self.client.session.close)
+        attach(self.client, self.sim)
+        self.scheduler = OrderScheduler(self.client, **kwargs)
+        self.addCleanup(self.scheduler.shutdown)
+        return self.scheduler
+
+    def _block_worker(self, scheduler):
+        release = threading.Event()
+        started = threading.Event()
+        scheduler.submit_priority("exit", lambda: (started.set(), release.wait(2)))
+        started.wait(1)
+        return release
+
+    def _posts(self):
+        return sum(1 for verb, path, _ in self.sim.request_log if verb == "POST")
+
+    def test_bucket_follows_rate_limit_headers(self):
+        scheduler = self._setup({"rate_limit": 60})
+        scheduler.submit(self.client.place_order, "Buy", 1).result(1)
+        self.assertEqual(scheduler.bucket.capacity, 60)
+        self.assertAlmostEqual(scheduler.bucket.tokens, 59, delta=0.5)
+
+        bucket = TokenBucket(capacity=10, per_second=10)
+        bucket.tokens = 2.5
+        self.assertGreater(bucket.take(reserve=2), 0)  # entries keep the reserve
+        self.assertEqual(bucket.take(), 0)
+
+    def test_retries_are_requeued_within_budget(self):
+        scheduler = self._setup({"error_503": 1.0, "seed": 1}, max_attempts=3, max_backoff=0.01)
+        future = scheduler.submit_priority("exit", self.client.place_order, "Buy", 1)
+        with self.assertRaises(requests.HTTPError):
+            future.result(2)
+        self.assertEqual(self._posts(), 3)
+        self.assertEqual(scheduler.budget.remaining, 8)
+
+        scheduler.budget.limit = 3  # one spent slot left once the entry reserve is kept back
+        scheduler.budget._spent.clear()
+        with self.assertRaises(requests.HTTPError):
+            scheduler.submit(self.client.place_order, "Buy", 1).result(2)
+        self.assertEqual(self._posts(), 5)
+
+    def test_exit_overtakes_entry_waiting_for_retry(self):
+        scheduler = self._setup({"error_503": 1.0}, max_backoff=5.0)
+        entry = scheduler.submit(self.client.place_order, "Buy", 1)
+        deadline = time.time() + 1
+        while not self.sim.request_log and time.time() < deadline:
+            time.sleep(0.005)
+        start = time.perf_counter()
+        exit_ = scheduler.submit_priority("exit", lambda: "closed")
+        self.assertEqual(exit_.result(1), "closed")
+        self.assertLess(time.perf_counter() - start, 0.2)
+        with self.assertRaises(OrderSuperseded):
+            entry.result(1)
+
+    def test_priorities_and_superseded_tickets(self):
+        scheduler = self._setup()
+        release = self._block_worker(scheduler)
+        seen = []
+        entry = scheduler.submit(seen.append, "entry")
+        query = scheduler.submit_priority("query", seen.append, "query")
+        release.set()
+        entry.result(1)
+        query.result(1)
+        self.assertEqual(seen, ["query", "entry"])
+
+        dispatcher = OrderDispatcher(scheduler)
+        release = self._block_worker(scheduler)
+        ticket = dispatcher.submit("entry", self.client.place_order, "Buy", 1)
+        dispatcher.submit("exit", lambda: {"ordStatus": "Filled"})
+        release.set()
+        with self.assertRaises(CancelledError):
+            ticket.future.result(1)
+        self.assertEqual((ticket.state, ticket.error), (REJECTED, "abgebrochen"))
+
+    def test_position_queries_are_coalesced(self):
+        self._setup({"latency": 0.05})
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.scheduler.get_position()))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(2)
+        gets = [r for r in self.sim.request_log if r[:2] == ("GET", "/api/v1/position")]
+        self.assertEqual(len(results), 5)
+        self.assertLess(len(gets), 5)
+        self.scheduler.get_position(max_age=30)
+        self.assertEqual(
+            len([r for r in self.sim.request_log if r[:2] == ("GET", "/api/v1/position")]),
+            len(gets),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
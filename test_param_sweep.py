@@ -0,0 +1,43 @@
+# test_param_sweep.py
+import json
+import os
+import tempfile
+import unittest
+
+from backtester import run_backtest
+from param_sweep import apply_to_tuning_config, load_results, random_search, run_sweep, write_results
+from test_backtester import _columns
+
+
+class ParamSweepTest(unittest.TestCase):
+    def test_sweep_matches_direct_backtest(self):
+        cols = _columns(3000)
+        configs = random_search(6, seed=3)
+        rows = run_sweep(cols, configs, workers=2)
+        self.assertEqual([r["rank"] for r in rows], list(range(1, 7)))
+        self.assertEqual(rows, sorted(rows, key=lambda r: r["pnl"], reverse=True))
+        for row in rows:
+            params = {k: row[k] for k in configs[0]}
+            self.assertEqual(row["trades"], run_backtest(cols, params).trade_count)
+
+    def test_results_roundtrip_into_tuning_config(self):
+        cols = _columns(1000)
+        rows = run_sweep(cols, random_search(2, seed=1), workers=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            table = os.path.join(tmp, "sweep.csv")
+            tuning = os.path.join(tmp, "tuning_config.json")
+            with open(tuning, "w", encoding="utf-8") as f:
+                json.dump({"capital_var": "1000"}, f)
+            write_results(rows, table)
+            best = load_results(table)[0]
+            apply_to_tuning_config(best, tuning)
+            with open(tuning, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        self.assertEqual(state["capital_var"], "1000")
+        self.assertEqual(state["andac_lookback"], str(rows[0]["lookback"]))
+        self.assertIs(state["andac_opt_engulf"], rows[0]["opt_engulf"])
+        self.assertEqual(state["take_profit_atr_multiplier"], rows[0]["take_profit_atr_multiplier"])
+
+
+if __name__ == "__main__":
+    unittest.main()
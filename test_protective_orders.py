@@ -0,0 +1,156 @@
+# test_protective_orders.py
+import threading
+import time
+import unittest
+from unittest import mock
+
+import bitmex_interface
+import entry_handler
+import exit_handler
+from bitmex_client import BitmexClient
+from bitmex_simulator import BitmexSimulator, attach
+from bitmex_state import BitmexState
+from order_scheduler import OrderScheduler
+from protective_orders import ProtectiveOrders
+
+
+class ProtectiveOrdersTest(unittest.TestCase):
+    def setUp(self):
+        self.sim = BitmexSimulator(price=100.0)
+        self.addCleanup(self.sim.stop)
+        self.client = self._client()
+        self.state = BitmexState()
+        self.state.attach(self.client)
+        self.sim.add_listener(self.state.apply)
+        self.exits = []
+        self.protection = self._protection(self.client, self.state)
+
+    def _client(self):
+        client = BitmexClient("sim-key", "sim-secret", base_url=self.sim.base_url)
+        self.addCleanup(client.session.close)
+        attach(client, self.sim)
+        return client
+
+    def _protection(self, client, state=None):
+        protection = ProtectiveOrders(client, state, on_exit=lambda *a: self.exits.append(a))
+        if state is not None:
+            state.subscribe("order", protection.on_order)
+            state.subscribe("position", protection.on_position)
+        return protection
+
+    def _resting(self):
+        return sorted(
+            (o["ordType"], o["side"], o["orderQty"], o.get("stopPx") or o["price"])
+            for o in self.sim.orders.values()
+            if o["ordStatus"] == "New"
+        )
+
+    def test_stop_fill_cancels_take_profit(self):
+        self.client.place_order("Buy", 100)
+        self.protection.place("long", 100, sl=95.0, tp=110.0)
+        self.assertEqual(self._resting(), [("Limit", "Sell", 100, 110.0), ("Stop", "Sell", 100, 95.0)])
+        self.assertEqual(self.sim.move_price(97.0), 0)
+        self.assertEqual(self.sim.move_price(94.0), 1)
+        self.assertEqual(self.sim.position["currentQty"], 0)
+        self.assertEqual(self._resting(), [])
+        self.assertEqual(self.exits, [("sl", 94.0)])
+        self.assertIsNone(self.protection.active)
+
+    def test_take_profit_fills_at_limit_for_short(self):
+        self.client.place_order("Sell", 50)
+        self.protection.place("short", 50, sl=105.0, tp=90.0)
+        self.sim.move_price(89.0)
+        self.assertEqual(self.exits, [("tp", 90.0)])
+        self.assertEqual(self.sim.position["currentQty"], 0)
+        self.assertEqual(self._resting(), [])
+
+    def test_amend_and_follow_partial_close(self):
+        self.client.place_order("Buy", 100)
+        self.protection.place("long", 100, sl=95.0, tp=110.0)
+        self.protection.amend(sl=98.0)
+        self.client.place_order("Sell", 40, reduce_only=True)
+        self.assertEqual(self._resting(), [("Limit", "Sell", 60, 110.0), ("Stop", "Sell", 60, 98.0)])
+        self.client.place_order("Sell", 60, reduce_only=True)
+        self.assertEqual(self._resting(), [])
+        self.assertEqual(self.exits, [])
+
+    def test_reconcile_after_restart(self):
+        self.client.place_order("Buy", 100)
+        self._protection(self.client).place("long", 100, sl=95.0, tp=110.0)
+        self.client.place_order("Sell", 30, reduce_only=True)  # not streamed: sizes drift
+
+        restarted = self._protection(self._client())
+        self.assertEqual(restarted.reconcile(), "adopted")
+        self.assertEqual((restarted.active.sl, restarted.active.tp, restarted.active.quantity), (95.0, 110.0, 70))
+        self.assertEqual(self._resting(), [("Limit", "Sell", 70, 110.0), ("Stop", "Sell", 70, 95.0)])
+
+        self.client.cancel_orders([restarted.active.sl_id])
+        again = self._protection(self._client())
+        self.assertEqual(again.reconcile(), "unprotected")
+        self.assertFalse(again.active.sl_live)
+
+        self.client.close_position()
+        self.assertEqual(self._protection(self._client()).reconcile(), "flat")
+        self.assertEqual(self._resting(), [])
+
+    def test_entry_and_close_through_handlers(self):
+        client = self._client()  # REST-only cache, fills are applied from the responses
+        protection = ProtectiveOrders(client, self.state)
+        scheduler = OrderScheduler(client)
+        self.addCleanup(scheduler.shutdown)
+        with mock.patch.multiple(bitmex_interface, client=client, protection=protection, scheduler=scheduler):
+            entry_handler.open_position("BUY", 20, sl=95.0, tp=110.0)
+            self.assertEqual(self._resting(), [("Limit", "Sell", 20, 110.0), ("Stop", "Sell", 20, 95.0)])
+            exit_handler.close_partial_position(5)
+            self.assertEqual(protection.active.quantity, 15)
+            exit_handler.close_position()
+        self.assertEqual(self._resting(), [])
+        self.assertEqual(self.sim.position["currentQty"], 0)
+        self.assertEqual(
+            [r[:2] for r in self.sim.request_log if r[1] == "/api/v1/order" and r[0] != "POST"],
+            [("PUT", "/api/v1/order"), ("PUT", "/api/v1/order"), ("DELETE", "/api/v1/order")],
+        )
+
+    def test_stream_callbacks_leave_rest_to_the_scheduler(self):
+        scheduler = OrderScheduler(self.client)
+        self.addCleanup(scheduler.shutdown)
+        state = BitmexState()
+        self.sim.add_listener(state.apply)
+        protection = ProtectiveOrders(self.client, state, on_exit=lambda *a: self.exits.append(a), executor=scheduler)
+        state.subscribe("order", protection.on_order)
+        state.subscribe("position", protection.on_position)
+        threads = []
+        for name in ("amend_order", "cancel_orders"):
+            call = getattr(self.client, name)
+
+            def record(*args, _call=call, **kwargs):
+                threads.append(threading.current_thread().name)
+                return _call(*args, **kwargs)
+
+            setattr(self.client, name, record)
+
+        self.client.place_order("Buy", 100)
+        protection.place("long", 100, sl=95.0, tp=110.0)
+        self.client.place_order("Sell", 40, reduce_only=True)
+        self._settle(scheduler)
+        self.assertEqual(self._resting(), [("Limit", "Sell", 60, 110.0), ("Stop", "Sell", 60, 95.0)])
+        self.sim.move_price(94.0)
+        self._settle(scheduler)
+        self.assertEqual(self._resting(), [])
+        self.assertEqual(self.exits, [("sl", 94.0)])
+        self.assertTrue(threads)
+        self.assertEqual(set(threads), {"order-scheduler"})
+
+    @staticmethod
+    def _settle(scheduler, timeout=2.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not scheduler.backlog:
+                time.sleep(0.05)
+                if not scheduler.backlog:
+                    return
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+# test_rolling_extrema.py
+import random
+import unittest
+
+from rolling_extrema import RollingExtrema
+
+
+class RollingExtremaTest(unittest.TestCase):
+    def test_matches_window_scan(self):
+        rnd = random.Random(7)
+        for length in (1, 20, 250):
+            extrema = RollingExtrema(length)
+            highs, lows = [], []
+            for i in range(1500):
+                high = rnd.uniform(100, 200)
+                low = high - rnd.uniform(0, 50)
+                if highs:
+                    self.assertEqual(extrema.high_lookback, max(highs[-length:]))
+                    self.assertEqual(extrema.low_lookback, min(lows[-length:]))
+                extrema.push(i, high, low)
+                highs.append(high)
+                lows.append(low)
+
+    def test_empty_and_order(self):
+        extrema = RollingExtrema(5)
+        self.assertIsNone(extrema.high_lookback)
+        extrema.push(3, 10.0, 5.0)
+        with self.assertRaises(ValueError):
+            extrema.push(3, 11.0, 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
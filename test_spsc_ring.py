@@ -0,0 +1,87 @@
+# test_spsc_ring.py
+import queue
+import threading
+import time
+import unittest
+
+from signal_worker import SignalWorker
+from spsc_ring import SpscRing
+
+
+class SpscRingTest(unittest.TestCase):
+    def test_fifo_wraparound_and_bounds(self):
+        ring = SpscRing(3)
+        for round_ in range(4):
+            for i in range(3):
+                ring.put_nowait((round_, i))
+            self.assertTrue(ring.full())
+            with self.assertRaises(queue.Full):
+                ring.put_nowait("x")
+            self.assertEqual([ring.get_nowait() for _ in range(3)], [(round_, i) for i in range(3)])
+        with self.assertRaises(queue.Empty):
+            ring.get(timeout=0.01)
+        stats = ring.stats()
+        self.assertEqual((stats["puts"], stats["gets"], stats["dropped"]), (12, 12, 4))
+        self.assertEqual((stats["depth"], stats["max_depth"]), (0, 3))
+
+    def test_blocking_get_wakes_on_put(self):
+        ring = SpscRing(4)
+        got = []
+        consumer = threading.Thread(target=lambda: got.append(ring.get(timeout=2)))
+        consumer.start()
+        time.sleep(0.02)
+        ring.put("candle")
+        consumer.join(1)
+        self.assertEqual(got, ["candle"])
+        self.assertLess(ring.stats()["max_wait_ms"], 50)
+
+    def test_blocking_put_waits_for_space(self):
+        ring = SpscRing(1)
+        ring.put(1)
+        threading.Timer(0.02, ring.get).start()
+        start = time.perf_counter()
+        ring.put(2, timeout=1)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.01)
+        self.assertEqual(ring.get_nowait(), 2)
+        with self.assertRaises(queue.Full):
+            ring.put(3)
+            ring.put(4, timeout=0.01)
+
+    def test_cross_thread_order(self):
+        ring = SpscRing(16)
+        count = 20000
+        received = []
+
+        def consume():
+            for _ in range(count):
+                received.append(ring.get(timeout=2))
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for i in range(count):
+            ring.put(i, timeout=2)
+        consumer.join(5)
+        self.assertEqual(received, list(range(count)))
+        self.assertLessEqual(ring.max_depth, 16)
+
+    def test_signal_worker_uses_ring(self):
+        done = threading.Event()
+        seen = []
+
+        def handler(candle):
+            seen.append(candle["timestamp"])
+            if len(seen) == 3:
+                done.set()
+
+        worker = SignalWorker(handler)
+        self.assertIsInstance(worker.queue, SpscRing)
+        worker.start()
+        self.addCleanup(worker.stop)
+        for ts in (1, 2, 3):
+            worker.submit({"timestamp": ts})
+        self.assertTrue(done.wait(1))
+        self.assertEqual(seen, [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
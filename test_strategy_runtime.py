@@ -0,0 +1,125 @@
+# test_strategy_runtime.py
+import threading
+import time
+import unittest
+
+import data_provider
+from backtester import run_backtest
+from strategy_runtime import RuntimeScheduler, StrategyRuntime, shard_count, shard_of
+from test_backtester import _columns
+
+
+def _rows(cols):
+    keys = list(cols)
+    return [{k: float(cols[k][i]) for k in keys} for i in range(len(cols["close"]))]
+
+
+class StrategyRuntimeTest(unittest.TestCase):
+    def test_matches_backtest_bar_for_bar(self):
+        cols = _columns(1500)
+        config = {"puffer": 5.0, "cooldown": 0}
+        expected = [t for t in run_backtest(cols, config).trades if t["reason"] != "end"]
+        runtime = StrategyRuntime("btcusdt", "1m", config)
+        events = []
+        for candle in _rows(cols):
+            events.extend(runtime.on_candle(candle))
+        self.assertGreater(len(expected), 5)
+        self.assertEqual(len(runtime.trades), len(expected))
+        for got, want in zip(runtime.trades, expected):
+            for field in ("entry_index", "exit_index", "side", "reason", "sl", "tp"):
+                self.assertEqual(got[field], want[field], field)
+            self.assertAlmostEqual(got["pnl"], want["pnl"], places=6)
+        self.assertEqual([e["type"] for e in events[:2]], ["entry", "exit"])
+        self.assertEqual(events[0]["symbol"], "BTCUSDT")
+
+    def test_trade_limit_stops_new_entries(self):
+        runtime = StrategyRuntime("ETHUSDT", "1m", {"puffer": 5.0, "max_trades": 2})
+        for candle in _rows(_columns(1500)):
+            runtime.on_candle(candle)
+        self.assertEqual(len(runtime.trades), 2)
+        self.assertFalse(runtime.running)
+
+    def test_warm_up_skips_signals_and_duplicates(self):
+        rows = _rows(_columns(300))
+        runtime = StrategyRuntime("BTCUSDT", "1m", {"puffer": 5.0})
+        self.assertEqual(runtime.warm_up(rows[:200]), 200)
+        self.assertEqual(runtime.trades, [])
+        self.assertEqual(runtime.on_candle(rows[150]), [])
+        self.assertEqual(runtime.index, 199)
+
+
+class RuntimeSchedulerTest(unittest.TestCase):
+    PAIRS = [("BTCUSDT", "1m"), ("ETHUSDT", "1m"), ("SOLUSDT", "5m")]
+
+    def _feed(self, scheduler, seeds):
+        data = {key: _rows(_columns(400, seed=seed)) for key, seed in zip(self.PAIRS, seeds)}
+        for i in range(400):
+            for key, rows in data.items():
+                scheduler.submit(*key, rows[i])
+        return data
+
+    def _reference(self, data):
+        states = {}
+        for key, rows in data.items():
+            runtime = StrategyRuntime(*key, {"puffer": 5.0})
+            for candle in rows:
+                runtime.on_candle(candle)
+            states[key] = (runtime.capital, len(runtime.trades))
+        return states
+
+    def _wait_states(self, scheduler, count, timeout=10.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            states = scheduler.states()
+            if all(s["last_ts"] == count for s in states):
+                return {(s["symbol"], s["interval"]): (s["capital"], s["trades"]) for s in states}
+            time.sleep(0.05)
+        self.fail("Scheduler hat nicht alle Candles verarbeitet")
+
+    def test_single_thread_shard_via_stream_sink(self):
+        events = []
+        scheduler = RuntimeScheduler(self.PAIRS, {"puffer": 5.0}, on_event=events.append).start()
+        self.addCleanup(scheduler.stop)
+        self.assertEqual(scheduler.processes, 0)
+        data_provider.set_stream_sink(scheduler.submit)
+        self.addCleanup(data_provider.set_stream_sink, None)
+        feed = data_provider.CandleFeed("BTCUSDT", "1m")
+        data = {key: _rows(_columns(400, seed=seed)) for key, seed in zip(self.PAIRS, (1, 2, 3))}
+        for i in range(400):
+            for key, rows in data.items():
+                if key == ("BTCUSDT", "1m"):
+                    feed.append(rows[i])
+                else:
+                    scheduler.submit(*key, rows[i])
+        self.assertEqual(feed.queue.qsize(), 0)
+        self.assertEqual(len(feed.store), 400)
+        self.assertEqual(self._wait_states(scheduler, 399 * 60), self._reference(data))
+        self.assertEqual({e["symbol"] for e in events}, {"BTCUSDT", "ETHUSDT", "SOLUSDT"})
+        self.assertFalse(scheduler.submit("XRPUSDT", "1m", data[self.PAIRS[0]][0]))
+
+    def test_process_shards_match_in_process_results(self):
+        lock = threading.Lock()
+        events = []
+
+        def on_event(event):
+            with lock:
+                events.append(event)
+
+        scheduler = RuntimeScheduler(self.PAIRS, {"puffer": 5.0}, processes=2, on_event=on_event).start()
+        self.addCleanup(scheduler.stop)
+        data = self._feed(scheduler, (4, 5, 6))
+        self.assertEqual(self._wait_states(scheduler, 399 * 60, timeout=30), self._reference(data))
+        scheduler.stop()
+        self.assertFalse(any(shard.process.is_alive() for shard in scheduler.shards))
+        self.assertTrue(events)
+
+    def test_sharding(self):
+        self.assertEqual(shard_count(10, per_process=200), 0)
+        self.assertGreaterEqual(shard_count(1000, per_process=200), 1)
+        self.assertEqual(shard_of(("BTCUSDT", "1m"), 4), shard_of(("BTCUSDT", "1m"), 4))
+        spread = {shard_of((f"SYM{i}USDT", "1m"), 4) for i in range(50)}
+        self.assertEqual(spread, {0, 1, 2, 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+# tick_stream.py
+"""Binance aggTrade/bookTicker ticks over WebSocket, plus a file replay stand-in."""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Union
+
+from websocket import WebSocketApp
+
+from binance_ws import BaseWebSocket
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+Message = Union[str, bytes]
+
+
+class Tick(NamedTuple):
+    symbol: str
+    price: float
+    bid: float
+    ask: float
+    qty: float
+    time: float  # exchange time in s; receive time for bookTicker
+    recv: float  # time.perf_counter() when the message arrived
+    kind: str = "trade"
+
+    def exit_price(self, side: str) -> float:
+        """Price a market exit of a *side* position would hit."""
+        return self.bid if side == "long" else self.ask
+
+
+def tick_from_mapping(data: dict, recv: Optional[float] = None) -> Optional[Tick]:
+    if "data" in data:
+        data = data["data"]
+    recv = time.perf_counter() if recv is None else recv
+    event = data.get("e")
+    if event in ("aggTrade", "trade"):
+        price = float(data["p"])
+        return Tick(data["s"], price, price, price, float(data["q"]), data["T"] / 1000, recv, "trade")
+    if "b" in data and "a" in data and "u" in data:
+        bid = float(data["b"])
+        ask = float(data["a"])
+        ts = data["T"] / 1000 if "T" in data else time.time()
+        return Tick(data["s"], (bid + ask) / 2, bid, ask, 0.0, ts, recv, "book")
+    return None
+
+
+def parse_tick(message: Message, recv: Optional[float] = None) -> Optional[Tick]:
+    """Decode one aggTrade/trade/bookTicker frame (single or combined stream)."""
+    return tick_from_mapping(_loads(message), recv)
+
+
+def tick_stream_url(symbol: str, streams: Iterable[str] = ("aggTrade", "bookTicker")) -> str:
+    names = "/".join(f"{symbol.lower()}@{name}" for name in streams)
+    return f"wss://stream.binance.com:9443/stream?streams={names}"
+
+
+class BinanceTickWebSocket(BaseWebSocket):
+    """aggTrade + bookTicker of one symbol on a combined connection."""
+
+    def __init__(
+        self,
+        symbol: str,
+        on_tick: Callable[[Tick], None],
+        streams: Iterable[str] = ("aggTrade", "bookTicker"),
+    ) -> None:
+        super().__init__(tick_stream_url(symbol, streams), self._on_message)
+        self.symbol = symbol.upper()
+        self.on_tick = on_tick
+        self.backoff = [1, 2, 5, 10]
+        self._retry_count = 0
+        self.last_tick: Optional[Tick] = None
+
+    def _run(self) -> None:
+        while self._running:
+            self.ws = WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            try:
+                self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                logger.error("Tick-WS Fehler: %s", e)
+            if not self._running:
+                break
+            self._retry_count += 1
+            time.sleep(self.backoff[min(self._retry_count, len(self.backoff)) - 1])
+
+    def _on_open(self, ws) -> None:
+        self._retry_count = 0
+        logger.info("⚡ Tick-Stream %s verbunden", self.symbol)
+
+    def _on_message(self, ws, message) -> None:
+        recv = time.perf_counter()
+        try:
+            tick = parse_tick(message, recv)
+        except Exception as exc:
+            logger.warning("Tick-Nachricht fehlerhaft: %s", exc)
+            return
+        if tick is None:
+            return
+        self.last_tick = tick
+        try:
+            self.on_tick(tick)
+        except Exception as exc:
+            logger.error("Tick-Verarbeitung fehlgeschlagen: %s", exc)
+
+    def _on_error(self, ws, error) -> None:
+        logger.error("Tick-WS Fehler: %s", error)
+
+    def _on_close(self, ws, status_code, msg) -> None:
+        logger.info("Tick-WS geschlossen: %s %s", status_code, msg)
+
+
+def _load_ticks(source: Any, symbol: str) -> List[Any]:
+    if not isinstance(source, str):
+        return list(source)
+    with open(source, encoding="utf-8") as f:
+        if source.endswith(".csv"):
+            rows = []
+            for row in csv.DictReader(f):
+                price = float(row["price"])
+                rows.append(Tick(row.get("symbol", symbol), price, float(row.get("bid") or price),
+                                 float(row.get("ask") or price), float(row.get("qty") or 0),
+                                 float(row["time"]), 0.0, row.get("kind", "trade")))
+            return rows
+        return [line for line in f if line.strip()]
+
+
+class TickReplay:
+    """Feed recorded ticks to *on_tick* with the interface of the WebSocket.
+
+    *source* is a JSON-lines file of raw stream frames, a CSV with
+    ``time,price`` (optional ``bid,ask,qty``) or an iterable of frames,
+    mappings or :class:`Tick` values. ``speed=0`` replays as fast as
+    possible, ``1.0`` in real time based on the tick timestamps.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        on_tick: Callable[[Tick], None],
+        speed: float = 0.0,
+        symbol: str = "",
+    ) -> None:
+        self.source = source
+        self.on_tick = on_tick
+        self.speed = speed
+        self.symbol = symbol.upper()
+        self.count = 0
+        self.done = threading.Event()
+        self._running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def _ticks(self) -> Iterable[Tick]:
+        for item in _load_ticks(self.source, self.symbol):
+            if isinstance(item, Tick):
+                yield item
+            elif isinstance(item, dict):
+                tick = tick_from_mapping(item)
+                if tick is not None:
+                    yield tick
+            else:
+                tick = parse_tick(item)
+                if tick is not None:
+                    yield tick
+
+    def run(self) -> int:
+        """Replay in the calling thread; returns the number of ticks sent."""
+        self._running = True
+        previous = None
+        for tick in self._ticks():
+            if not self._running:
+                break
+            if self.speed > 0 and previous is not None and tick.time > previous:
+                time.sleep((tick.time - previous) / self.speed)
+            previous = tick.time
+            self.on_tick(tick._replace(recv=time.perf_counter()))
+            self.count += 1
+        self._running = False
+        self.done.set()
+        return self.count
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.done.clear()
+        self.thread = threading.Thread(target=self.run, name="tick-replay", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)